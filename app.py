@@ -4,20 +4,150 @@ Provides web-based interface for the game
 Includes Abschreibungen, Zinsen, and Steuern
 """
 
-from flask import Flask, render_template, request, jsonify, session, send_file
-import json
+from flask import Flask, render_template, request, jsonify, session, send_file, Response, g
+import io
 import os
+import time
+import uuid
+from contextlib import ExitStack
+from functools import partial
 from datetime import datetime
-from factory_simulator import FactorySimulator, GameParameters, QuarterResult
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+from factory_simulator import QUARTERS_PER_YEAR, RESULT_FIELDS, FactorySimulator, GameParameters, QuarterResult
+from game_store import GameBusy, create_game_store
+from excel_report import XLSX_MIMETYPE
+from report_cache import create_report_cache, report_key
+from market_engine import SessionRegistry
+from event_stream import EventBroker
+from leaderboard import METRICS, LeaderboardService
+from metrics import metrics
+from werkzeug.utils import secure_filename
+from cohort_export import CohortWriter
+from decision_log import MAX_LOTS, create_decision_log
+from batch_simulator import PARAMETER_FIELDS
+from sensitivity import sensitivity_analysis
+from forecast import forecast
+from export_jobs import DONE, FAILED, ExportQueueFull, create_export_queue
+from offload import (
+    OffloadBusy, OffloadTimeout, apply_plan_result, create_offloader, play_plan, save_workbook, streaming_workbook_bytes,
+    template_workbook_bytes
+)
+from result_json import JSON_MIMETYPE, dumps, export_bytes, history_rows, quarter_dict
 
 app = Flask(__name__)
 app.secret_key = 'factory_simulation_secret_key_2025'
 
-# Store simulators in memory (in production, use database)
-simulators = {}
+# Game state backend: in-process by default, set GAME_STORE_URL=sqlite:///games.db
+# to share games between several gunicorn workers
+simulators = create_game_store()
+
+# Generated reports keyed by game state hash (see report_cache.py)
+reports = create_report_cache()
+
+# Append-only decision log per game (see decision_log.py), enabled with
+# DECISION_LOG_DIR; logged games missing from the store are replayed at startup
+decision_log = create_decision_log()
+decision_log.recover(simulators)
+
+# Multiplayer market sessions (see market_engine.py); kept in this process,
+# so run a single worker or sticky sessions when teams share a market
+market_sessions = SessionRegistry()
+
+# Server-Sent Events per game and per session (see event_stream.py)
+events = EventBroker()
+
+# Rankings of all games and per session, updated after every quarter (see leaderboard.py)
+leaderboards = LeaderboardService()
+simulators.on_evict(leaderboards.remove)
+
+# Entries per leaderboard page at most
+MAX_LEADERBOARD_PAGE = 100
+
+# Per-quarter fields returned by /api/get_summary
+SUMMARY_RESULT_FIELDS = (
+    'quarter', 'sales_revenue', 'herstellungskosten', 'gross_profit', 'ebit',
+    'profit_before_tax', 'tax', 'net_profit', 'cash_ending'
+)
+
+# Upper bound for the quarters of one /api/simulate_quarters request
+MAX_BATCH_QUARTERS = int(os.environ.get('MAX_BATCH_QUARTERS', 10000))
+
+# Upper bound for the values per parameter of one /api/sensitivity sweep
+MAX_SENSITIVITY_POINTS = 101
+
+# Longest game the start screen may configure (in quarters)
+MAX_HORIZON = int(os.environ.get('MAX_HORIZON', 400))
+
+# CPU-bound work (workbooks, long batch plans, sweeps) runs in a bounded
+# process pool so that light requests stay responsive (see offload.py)
+offloader = create_offloader()
+
+# Plans of at least this many quarters per game are simulated in the pool
+OFFLOAD_MIN_QUARTERS = int(os.environ.get('OFFLOAD_MIN_QUARTERS', 200))
+
+# Workbooks requested via /api/export_jobs, built in the background (see export_jobs.py)
+export_jobs = create_export_queue()
+
+# Gauges read on every /metrics scrape (stage histograms need METRICS_ENABLED=1)
+metrics.gauge('factory_live_games', 'Games in the game store', lambda: len(simulators))
+metrics.gauge('factory_game_store_bytes', 'Approximate size of the game store', lambda: simulators.size_bytes())
+metrics.gauge('factory_report_cache_bytes', 'Bytes held by the report cache', lambda: reports.current_bytes)
+metrics.gauge('factory_report_cache_entries', 'Reports in the report cache', lambda: len(reports))
+metrics.gauge('factory_market_sessions', 'Open market sessions', lambda: len(market_sessions))
+metrics.gauge('factory_event_subscribers', 'Open event streams', lambda: events.subscriber_count())
+metrics.gauge('factory_export_jobs_queued', 'Export jobs waiting', lambda: export_jobs.count('queued'))
+metrics.gauge('factory_export_jobs_running', 'Export jobs being built', lambda: export_jobs.count('running'))
+
+
+@app.errorhandler(OffloadBusy)
+@app.errorhandler(ExportQueueFull)
+@app.errorhandler(GameBusy)
+def offload_busy(error):
+    response = jsonify({'success': False, 'error': 'Server busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+@app.errorhandler(OffloadTimeout)
+def offload_timeout(error):
+    return jsonify({'success': False, 'error': str(error)}), 504
+
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        metrics.set_endpoint(request.endpoint or 'unknown')
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        metrics.observe(metrics.current_endpoint(), 'total', time.perf_counter() - started)
+    return response
+
+
+def json_response(data, status=200):
+    """JSON response encoded by result_json (orjson when installed)"""
+    return Response(dumps(data), status=status, mimetype=JSON_MIMETYPE)
+
+
+def not_modified(etag):
+    """304 response if the client already holds the report with this ETag"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Attach the ETag and make clients revalidate before reusing the report"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 @app.route('/')
@@ -26,28 +156,43 @@ def index():
     return render_template('index.html')
 
 
+def parse_parameters(data):
+    """Game parameters the start screen lets the user change"""
+    horizon = int(data.get('horizon', 4))
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON} quarters")
+    return GameParameters(
+        base_sales_price=float(data.get('base_sales_price', 13.0)),
+        base_material_price=float(data.get('base_material_price', 3.0)),
+        base_production_cost=float(data.get('base_production_cost', 3.0)),
+        base_assembly_cost=float(data.get('base_assembly_cost', 1.0)),
+        base_overhead_cost=float(data.get('base_overhead_cost', 6.0)),
+        horizon=horizon
+    )
+
+
 @app.route('/api/start_game', methods=['POST'])
 def start_game():
     """Initialize a new game"""
     data = request.json
     
     # Create game parameters
-    params = GameParameters(
-        base_sales_price=float(data.get('base_sales_price', 13.0)),
-        base_material_price=float(data.get('base_material_price', 3.0)),
-        base_production_cost=float(data.get('base_production_cost', 3.0)),
-        base_assembly_cost=float(data.get('base_assembly_cost', 1.0)),
-        base_overhead_cost=float(data.get('base_overhead_cost', 6.0))
-    )
+    try:
+        params = parse_parameters(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     # Create simulator
     game_id = data.get('game_id', 'default')
     simulator = FactorySimulator(params)
     simulators[game_id] = simulator
+    decision_log.start(game_id, params)
+    record_rankings(game_id, simulator)  # A restarted game leaves the rankings
     
     return jsonify({
         'success': True,
         'game_id': game_id,
+        'horizon': params.horizon,
         'initial_state': {
             'cash': simulator.cash,
             'accounts_receivable': simulator.accounts_receivable,
@@ -63,106 +208,490 @@ def start_game():
     })
 
 
+def parse_decisions(data):
+    """simulate_quarter keyword arguments from a request dict, with the game defaults"""
+    decisions = {
+        'sales_price': float(data.get('sales_price', 13.0)),
+        'marketing_budget': float(data.get('marketing_budget', 0)),
+        'production_lots': int(data.get('production_lots', 2)),
+        'material_purchase_lots': int(data.get('material_purchase_lots', 2)),
+        'material_market_factor': float(data.get('material_market_factor', 1.0)),
+        'overhead_factor': float(data.get('overhead_factor', 1.0))
+    }
+    # Lots must fit the decision log's int32 fields
+    for name in ('production_lots', 'material_purchase_lots'):
+        if not 0 <= decisions[name] <= MAX_LOTS:
+            raise ValueError(f"{name} must be between 0 and {MAX_LOTS}")
+    return decisions
+
+
+def current_state(simulator):
+    """Cash, receivables and inventories as returned by the game endpoints"""
+    return {
+        'cash': simulator.cash,
+        'accounts_receivable': simulator.accounts_receivable,
+        'raw_material_inventory': simulator.raw_material_inventory,
+        'work_in_progress': simulator.work_in_progress,
+        'finished_goods_inventory': simulator.finished_goods_inventory
+    }
+
+
+def publish_quarter(game_id, simulator):
+    """Push the new quarter and the updated running totals to the game's event stream"""
+    events.publish(f"game:{game_id}", 'quarter', {
+        'game_id': game_id,
+        'result': simulator.results.row_dict(-1),
+        'totals': simulator.get_summary()
+    })
+
+
+def record_rankings(game_id, simulator):
+    """Move the game on the leaderboards (and its session's board)"""
+    session = market_sessions.session_for_game(game_id)
+    leaderboards.record(game_id, simulator.get_summary(), session.session_id if session else None)
+
+
+def refresh_leaderboards():
+    """Move the games other workers changed in a shared store on the boards"""
+    if not simulators.shared:
+        return
+    last, changed = simulators.changes(leaderboards.synced_to)
+    if changed is None:
+        # First call, or this worker fell behind the retained changes: all games
+        def games():
+            for game_id in simulators.game_ids():
+                simulator = simulators.get(game_id)
+                if simulator is not None:
+                    session = market_sessions.session_for_game(game_id)
+                    yield game_id, simulator.get_summary(), session.session_id if session else None
+
+        leaderboards.rebuild(games())
+    else:
+        for game_id in dict.fromkeys(changed):  # Each game once, however often it changed
+            simulator = simulators.get(game_id)
+            if simulator is None:
+                leaderboards.remove(game_id)
+            else:
+                record_rankings(game_id, simulator)
+    leaderboards.synced_to = last
+
+
+def sse_response(channel):
+    """Event stream response, resuming after the client's Last-Event-ID"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+    return Response(events.stream(channel, last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+    })
+
+
+def market_game_error(game_id):
+    """Error response if the game is a team of a market session"""
+    if market_sessions.session_for_game(game_id) is None:
+        return None
+    return jsonify({
+        'success': False,
+        'error': 'Game belongs to a market session, submit decisions via /api/session/submit'
+    }), 409
+
+
 @app.route('/api/simulate_quarter', methods=['POST'])
 def simulate_quarter():
     """Simulate one quarter with given decisions"""
+    with metrics.stage('parse'):
+        data = request.json
+        game_id = data.get('game_id', 'default')
+        try:
+            decisions = parse_decisions(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid decision: {e}'}), 400
+    
+    with simulators.lock(game_id):  # No other request changes the game until it is stored
+        with metrics.stage('load'):
+            simulator = simulators.get(game_id)
+        if simulator is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+        locked = market_game_error(game_id)
+        if locked is not None:
+            return locked
+    
+        # Logged before the game changes: neither the game nor the store runs ahead of the log
+        with metrics.stage('log'):
+            decision_log.quarter(game_id, decisions)
+        with metrics.stage('simulate'):
+            simulator.simulate_quarter(**decisions)
+        with metrics.stage('store'):
+            simulators[game_id] = simulator  # Write back so other workers see the new quarter
+        with metrics.stage('notify'):
+            record_rankings(game_id, simulator)
+            publish_quarter(game_id, simulator)
+    
+        with metrics.stage('serialize'):
+            # Latest quarter straight from the result columns
+            result_dict = quarter_dict(simulator.results)
+        
+            return json_response({
+                'success': True,
+                'result': result_dict,
+                'current_state': {
+                    'cash': simulator.cash,
+                    'accounts_receivable': simulator.accounts_receivable,
+                    'raw_material_inventory': simulator.raw_material_inventory,
+                    'work_in_progress': simulator.work_in_progress,
+                    'finished_goods_inventory': simulator.finished_goods_inventory
+                }
+            })
+
+
+@app.route('/api/simulate_quarters', methods=['POST'])
+def simulate_quarters():
+    """
+    Simulate several quarters in one request
+    
+    Body: {"game_id": ..., "decisions": [{...}, ...]} for one game or
+    {"games": {"<game_id>": [{...}, ...], ...}} for several games; each
+    decision dict takes the /api/simulate_quarter fields. The new quarters
+    of every game are returned column-wise in the order of "fields".
+    All plans are played first and only then applied: if one game fails
+    (e.g. 503 when the offload pool is busy), no game is changed.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+    if 'games' in data:
+        plans = data['games']
+    else:
+        plans = {data.get('game_id', 'default'): data.get('decisions', [])}
+    
+    if not isinstance(plans, dict) or not all(isinstance(p, list) for p in plans.values()):
+        return jsonify({'success': False, 'error': 'Expected a list of decisions per game'}), 400
+    if sum(len(p) for p in plans.values()) > MAX_BATCH_QUARTERS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_QUARTERS} quarters per request'}), 400
+    
+    try:
+        plans = {game_id: [parse_decisions(d) for d in plan] for game_id, plan in plans.items()}
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid decision: {e}'}), 400
+    
+    with ExitStack() as held:
+        for game_id in sorted(plans):  # One order for all requests, so no two wait for each other
+            held.enter_context(simulators.lock(game_id))
+        
+        games = {}
+        for game_id in plans:
+            simulator = simulators.get(game_id)
+            if simulator is None:
+                return jsonify({'success': False, 'error': f'Game not found: {game_id}'}), 404
+            locked = market_game_error(game_id)
+            if locked is not None:
+                return locked
+            games[game_id] = simulator
+    
+        # Play every plan on a copy of its game; long plans in the offload pool
+        played = {}
+        for game_id, plan in plans.items():
+            state = games[game_id].to_state(include_results=False)
+            if len(plan) >= OFFLOAD_MIN_QUARTERS:
+                played[game_id] = offloader.run(play_plan, state, plan)
+            else:
+                played[game_id] = play_plan(state, plan)
+    
+        response = {}
+        for game_id, plan in plans.items():
+            simulator = games[game_id]
+            first = len(simulator.results)
+            rows, end_state = played[game_id]
+            for decisions in plan:
+                decision_log.quarter(game_id, decisions)
+            apply_plan_result(simulator, rows, end_state)
+            simulators[game_id] = simulator
+            record_rankings(game_id, simulator)
+            response[game_id] = {
+                'columns': simulator.results.columns_from(first),
+                'current_state': current_state(simulator),
+                'summary': simulator.get_summary()
+            }
+            events.publish(f"game:{game_id}", 'quarters', {
+                'game_id': game_id,
+                'fields': RESULT_FIELDS,
+                'columns': response[game_id]['columns'],
+                'totals': response[game_id]['summary']
+            })
+    
+        return jsonify({
+            'success': True,
+            'fields': RESULT_FIELDS,
+            'games': response
+        })
+
+
+@app.route('/api/rewind', methods=['POST'])
+def rewind():
+    """Undo quarters: continue the game from the end of the given quarter"""
     data = request.json
     game_id = data.get('game_id', 'default')
     
-    if game_id not in simulators:
-        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    with simulators.lock(game_id):
+        simulator = simulators.get(game_id)
+        if simulator is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+        locked = market_game_error(game_id)
+        if locked is not None:
+            return locked
     
-    simulator = simulators[game_id]
-    
-    # Extract decisions
-    sales_price = float(data.get('sales_price', 13.0))
-    marketing_budget = float(data.get('marketing_budget', 0))
-    production_lots = int(data.get('production_lots', 2))
-    material_purchase_lots = int(data.get('material_purchase_lots', 2))
-    material_market_factor = float(data.get('material_market_factor', 1.0))
-    overhead_factor = float(data.get('overhead_factor', 1.0))
-    
-    # Run simulation
-    result = simulator.simulate_quarter(
-        sales_price=sales_price,
-        marketing_budget=marketing_budget,
-        production_lots=production_lots,
-        material_purchase_lots=material_purchase_lots,
-        material_market_factor=material_market_factor,
-        overhead_factor=overhead_factor
-    )
+        # Default: undo the last quarter
+        try:
+            quarter = int(data.get('quarter', simulator.current_quarter - 1))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'quarter must be an integer'}), 400
+        try:
+            simulator.rewind(quarter)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        decision_log.rewind(game_id, quarter)
+        simulators[game_id] = simulator
+        record_rankings(game_id, simulator)
+        events.publish(f"game:{game_id}", 'rewind', {
+            'game_id': game_id,
+            'quarter': simulator.current_quarter,
+            'totals': simulator.get_summary()
+        })
     
-    # Convert result to dict
-    result_dict = {
-        'quarter': result.quarter,
-        'material_purchase_lots': result.material_purchase_lots,
-        'production_lots': result.production_lots,
-        'sales_price': result.sales_price,
-        'sales_volume': result.sales_volume,
-        'sales_revenue': result.sales_revenue,
-        'material_cost': result.material_cost,
-        'production_cost': result.production_cost,
-        'assembly_cost': result.assembly_cost,
-        'herstellungskosten': result.herstellungskosten,
-        'overhead_cost': result.overhead_cost,
-        'marketing_cost': result.marketing_cost,
-        'depreciation': result.depreciation,
-        'interest': result.interest,
-        'total_operating_cost': result.total_operating_cost,
-        'gross_profit': result.gross_profit,
-        'ebit': result.ebit,
-        'profit_before_tax': result.profit_before_tax,
-        'tax': result.tax,
-        'net_profit': result.net_profit,
-        'raw_material_inventory': result.raw_material_inventory,
-        'work_in_progress': result.work_in_progress,
-        'finished_goods_inventory': result.finished_goods_inventory,
-        'cash_beginning': result.cash_beginning,
-        'cash_ending': result.cash_ending,
-        'accounts_receivable': result.accounts_receivable
-    }
+        return jsonify({
+            'success': True,
+            'game_id': game_id,
+            'current_quarter': simulator.current_quarter,
+            'current_state': current_state(simulator),
+            'summary': simulator.get_summary()
+        })
+
+
+@app.route('/api/fork', methods=['POST'])
+def fork():
+    """Branch a game at a quarter into a new game ("what-if")"""
+    data = request.json
+    game_id = data.get('game_id', 'default')
+    
+    with simulators.lock(game_id):
+        simulator = simulators.get(game_id)
+        if simulator is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+        try:
+            quarter = int(data.get('quarter', simulator.current_quarter))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'quarter must be an integer'}), 400
+        new_game_id = data.get('new_game_id') or f"{game_id}-{uuid.uuid4().hex[:8]}"
+        if new_game_id in simulators:
+            return jsonify({'success': False, 'error': 'Game already exists'}), 409
+        try:
+            branch = simulator.fork(quarter)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        decision_log.fork(game_id, new_game_id, quarter)
+        simulators[new_game_id] = branch
+        record_rankings(new_game_id, branch)
+    
+        return jsonify({
+            'success': True,
+            'game_id': new_game_id,
+            'parent_game_id': game_id,
+            'current_quarter': branch.current_quarter,
+            'current_state': current_state(branch),
+            'summary': branch.get_summary()
+        })
+
+
+@app.route('/api/session/create', methods=['POST'])
+def create_session():
+    """Create a market session; every team plays its own game in the shared market"""
+    data = request.json
+    session_id = data.get('session_id') or uuid.uuid4().hex[:8]
+    team_ids = data.get('teams', [])
+    
+    try:
+        session = market_sessions.create(session_id, team_ids, parse_parameters(data))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Team games are regular games for summaries and exports
+    for team_id, simulator in session.teams.items():
+        simulators[team_id] = simulator
+        decision_log.start(team_id, session.params)
+        record_rankings(team_id, simulator)
     
     return jsonify({
         'success': True,
-        'result': result_dict,
-        'current_state': {
-            'cash': simulator.cash,
-            'accounts_receivable': simulator.accounts_receivable,
-            'raw_material_inventory': simulator.raw_material_inventory,
-            'work_in_progress': simulator.work_in_progress,
-            'finished_goods_inventory': simulator.finished_goods_inventory
-        }
+        'session_id': session_id,
+        'teams': list(session.teams),
+        'initial_state': current_state(next(iter(session.teams.values())))
     })
 
 
+@app.route('/api/session/submit', methods=['POST'])
+def submit_decisions():
+    """Submit a team's decisions; the quarter resolves once all teams have submitted"""
+    data = request.json
+    session = market_sessions.get(data.get('session_id'))
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    game_id = data.get('game_id')
+    if game_id not in session.teams:
+        return jsonify({'success': False, 'error': 'Team not in session'}), 404
+    
+    try:
+        decisions = parse_decisions(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid decision: {e}'}), 400
+    results = session.submit(game_id, decisions)
+    channel = f"session:{session.session_id}"
+    if results is None:
+        waiting_for = session.waiting_for()
+        events.publish(channel, 'submitted', {
+            'session_id': session.session_id,
+            'quarter': session.quarter + 1,
+            'game_id': game_id,
+            'waiting_for': waiting_for
+        })
+        return jsonify({
+            'success': True,
+            'resolved': False,
+            'quarter': session.quarter + 1,
+            'waiting_for': waiting_for
+        })
+    
+    for team_id, simulator in session.teams.items():
+        decision_log.quarter(team_id, *session.last_quarter[team_id])
+        simulators[team_id] = simulator
+        record_rankings(team_id, simulator)
+        publish_quarter(team_id, simulator)
+    team_results = {team_id: session.teams[team_id].results.row_dict(-1) for team_id in results}
+    events.publish(channel, 'quarter', {
+        'session_id': session.session_id,
+        'quarter': session.quarter,
+        'results': team_results,
+        'totals': {team_id: simulator.get_summary() for team_id, simulator in session.teams.items()}
+    })
+    events.publish(channel, 'leaderboard', {
+        'session_id': session.session_id,
+        'quarter': session.quarter,
+        'top': {metric: leaderboards.page(metric, 0, 10, session.session_id)[1] for metric in METRICS}
+    })
+    return jsonify({
+        'success': True,
+        'resolved': True,
+        'quarter': session.quarter,
+        'results': team_results
+    })
+
+
+@app.route('/api/session/status', methods=['GET'])
+def session_status():
+    """Current quarter of a session and the teams still to submit"""
+    session = market_sessions.get(request.args.get('session_id'))
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'session_id': session.session_id,
+        'quarter': session.quarter,
+        'teams': list(session.teams),
+        'waiting_for': session.waiting_for()
+    })
+
+
+@app.route('/api/events', methods=['GET'])
+def game_events():
+    """Server-Sent Events of one game: each new quarter with the running totals"""
+    game_id = request.args.get('game_id', 'default')
+    if simulators.get(game_id) is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    return sse_response(f"game:{game_id}")
+
+
+@app.route('/api/session/events', methods=['GET'])
+def session_events():
+    """Server-Sent Events of a market session: submissions and resolved quarters"""
+    session = market_sessions.get(request.args.get('session_id'))
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    return sse_response(f"session:{session.session_id}")
+
+
+@app.route('/api/leaderboard', methods=['GET'])
+def leaderboard():
+    """
+    One page of the ranking by total_net_profit, final_cash or return_on_sales
+    
+    Query: metric, offset, limit, session_id (board of a market session
+    instead of all games), game_id (additionally return that game's ranks)
+    """
+    metric = request.args.get('metric', 'total_net_profit')
+    session_id = request.args.get('session_id')
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(MAX_LEADERBOARD_PAGE, max(1, int(request.args.get('limit', 10))))
+        refresh_leaderboards()
+        total, entries = leaderboards.page(metric, offset, limit, session_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = {
+        'success': True,
+        'metric': metric,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'entries': entries
+    }
+    game_id = request.args.get('game_id')
+    if game_id:
+        response['ranks'] = leaderboards.ranks(game_id, session_id)
+    return jsonify(response)
+
+
 @app.route('/api/get_summary', methods=['GET'])
 def get_summary():
     """Get game summary"""
     game_id = request.args.get('game_id', 'default')
     
-    if game_id not in simulators:
+    simulator = simulators.get(game_id)
+    if simulator is None:
         return jsonify({'success': False, 'error': 'Game not found'}), 404
     
-    simulator = simulators[game_id]
-    summary = simulator.get_summary()
+    with metrics.stage('summary'):
+        summary = simulator.get_summary()
     
-    return jsonify({
+    # format=compact: results as {"fields": [...], "rows": [[...], ...]}
+    compact = request.args.get('format') == 'compact'
+    with metrics.stage('serialize'):
+        return json_response({
+            'success': True,
+            'summary': summary,
+            'results': history_rows(simulator.results, SUMMARY_RESULT_FIELDS, compact)
+        })
+
+
+@app.route('/api/annual_summary', methods=['GET'])
+def annual_summary():
+    """Totals per business year, for multi-year games"""
+    game_id = request.args.get('game_id', 'default')
+    
+    simulator = simulators.get(game_id)
+    if simulator is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+    return json_response({
         'success': True,
-        'summary': summary,
-        'results': [
-            {
-                'quarter': r.quarter,
-                'sales_revenue': r.sales_revenue,
-                'herstellungskosten': r.herstellungskosten,
-                'gross_profit': r.gross_profit,
-                'ebit': r.ebit,
-                'profit_before_tax': r.profit_before_tax,
-                'tax': r.tax,
-                'net_profit': r.net_profit,
-                'cash_ending': r.cash_ending
-            }
-            for r in simulator.results
-        ]
+        'horizon': simulator.params.horizon,
+        'quarters_per_year': QUARTERS_PER_YEAR,
+        'current_quarter': simulator.current_quarter,
+        'years': simulator.annual_rollups()
     })
 
 
@@ -171,18 +700,49 @@ def export_results():
     """Export game results as JSON"""
     game_id = request.args.get('game_id', 'default')
 
-    if game_id not in simulators:
+    simulator = simulators.get(game_id)
+    if simulator is None:
         return jsonify({'success': False, 'error': 'Game not found'}), 404
 
-    simulator = simulators[game_id]
-    filename = f"factory_results_{game_id}.json"
-    simulator.export_results(filename)
-
-    return jsonify({
+    # format=compact: quarters as arrays under one list of field names
+    compact = request.args.get('format') == 'compact'
+    etag = report_key('json-compact' if compact else 'json', simulator)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    filename = f"factory_results_{game_id}{'_compact' if compact else ''}.json"
+    payload, _ = reports.get_or_build(etag, lambda: export_bytes(simulator, compact))
+    # The cache is keyed by state, the file by game: a hit may come from
+    # another game or an earlier state of this one, so the file is always written
+    with open(filename, 'wb') as f:
+        f.write(payload)
+
+    return with_etag(jsonify({
         'success': True,
         'filename': filename,
         'message': 'Results exported successfully'
-    })
+    }), etag)
+
+
+# In-memory report builders by export_excel mode; both give the same workbook
+REPORT_BUILDERS = {
+    'template': template_workbook_bytes,  # Numbers patched into a cached skeleton
+    'stream': streaming_workbook_bytes    # Write-only workbook built from scratch
+}
+
+
+def build_streaming_report(simulator, mode='template'):
+    """xlsx bytes of the in-memory report, built in the offload pool"""
+    return build_streaming_report_from_state(simulator.to_state(), mode)
+
+
+def build_streaming_report_from_state(state, mode='template'):
+    with metrics.stage('xlsx_offload'):
+        payload, timings = offloader.run(REPORT_BUILDERS[mode], state)
+    # xlsx_build / xlsx_save were timed in the worker process
+    metrics.record(timings)
+    return payload
 
 
 @app.route('/api/export_excel', methods=['GET'])
@@ -190,297 +750,219 @@ def export_excel():
     """Export game results as a multi-sheet professional Excel report"""
     game_id = request.args.get('game_id', 'default')
 
-    if game_id not in simulators:
+    simulator = simulators.get(game_id)
+    if simulator is None:
         return jsonify({'success': False, 'error': 'Game not found'}), 404
 
-    simulator = simulators[game_id]
-    results = simulator.results
-    summary = simulator.get_summary()
-    params = simulator.params
+    filename = f"TechGear_Report_{game_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+
+    # Default: build the workbook in memory from the cached skeleton, nothing is stored on disk
+    mode = request.args.get('mode', 'template')
+    if mode != 'classic':
+        mode = mode if mode in REPORT_BUILDERS else 'template'
+        etag = report_key('xlsx', simulator)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        # A cached workbook keeps the "generiert am" time of its first build
+        payload, _ = reports.get_or_build(etag, lambda: build_streaming_report(simulator, mode))
+        response = send_file(io.BytesIO(payload), mimetype=XLSX_MIMETYPE, as_attachment=True,
+                             download_name=filename, etag=False)
+        return with_etag(response, etag)
+
+    # Save file
+    exports_dir = os.path.join(os.getcwd(), 'exports')
+    os.makedirs(exports_dir, exist_ok=True)
+
+    filepath = os.path.join(exports_dir, filename)
+    with metrics.stage('xlsx_offload'):
+        offloader.run(save_workbook, simulator.to_state(), filepath)
 
-    # Create workbook
-    wb = Workbook()
+    return send_file(filepath, as_attachment=True, download_name=filename)
+
+
+def export_job_response(job, status=200):
+    result = job.to_dict()
+    result['status_url'] = f"/api/export_jobs/status?job_id={job.job_id}"
+    if job.status == DONE:
+        result['download_url'] = f"/api/export_jobs/download?job_id={job.job_id}"
+    return jsonify(dict(result, success=True)), status
+
+
+@app.route('/api/export_jobs', methods=['POST'])
+def create_export_job():
+    """Queue an Excel export; returns a job id to poll instead of the workbook"""
+    data = request.json or {}
+    game_id = data.get('game_id', 'default')
+
+    simulator = simulators.get(game_id)
+    if simulator is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+
+    key = report_key('xlsx', simulator)
+    filename = f"TechGear_Report_{game_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    state = simulator.to_state()  # The game may go on while the job waits
+
+    def build():
+        payload = build_streaming_report_from_state(state)
+        reports.put(key, payload)
+        return payload
+
+    job, _ = export_jobs.submit(key, game_id, filename, build, payload=reports.get(key))
+    return export_job_response(job, 200 if job.status == DONE else 202)
+
+
+@app.route('/api/export_jobs/status', methods=['GET'])
+def export_job_status():
+    job = export_jobs.get(request.args.get('job_id', ''))
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return export_job_response(job)
+
+
+@app.route('/api/export_jobs/download', methods=['GET'])
+def download_export_job():
+    job = export_jobs.get(request.args.get('job_id', ''))
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    if job.status == FAILED:
+        return jsonify({'success': False, 'error': job.error}), 500
+    if job.status != DONE:
+        return jsonify({'success': False, 'error': 'Export not finished yet', 'status': job.status}), 409
+
+    cached = not_modified(job.key)
+    if cached is not None:
+        return cached
+    response = send_file(io.BytesIO(job.payload), mimetype=XLSX_MIMETYPE, as_attachment=True,
+                         download_name=job.filename, etag=False)
+    return with_etag(response, job.key)
+
+
+@app.route('/api/sensitivity', methods=['POST'])
+def sensitivity():
+    """
+    How net profit and final cash respond to each GameParameters field
     
-    # Styles
-    style_header = PatternFill(start_color="667eea", end_color="667eea", fill_type="solid")
-    style_subheader = PatternFill(start_color="e2e8f0", end_color="e2e8f0", fill_type="solid")
-    style_success = PatternFill(start_color="c6f6d5", end_color="c6f6d5", fill_type="solid")
-    style_danger = PatternFill(start_color="fed7d7", end_color="fed7d7", fill_type="solid")
+    Body: {"game_id": ... (or the start screen parameters), "plan": [{...}, ...],
+    "parameters": [...], "method": "tornado" | "finite_difference",
+    "rel_step": 0.1, "points": 3}; see sensitivity.py. Without a plan,
+    the horizon's quarters with the default decisions at the base sales
+    price are used.
+    """
+    data = request.json or {}
+    game_id = data.get('game_id')
+    if game_id is not None:
+        simulator = simulators.get(game_id)
+        if simulator is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+        params = simulator.params
+    else:
+        try:
+            params = parse_parameters(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
     
-    font_title = Font(bold=True, size=16, color="2d3748")
-    font_header = Font(bold=True, color="FFFFFF")
-    font_bold = Font(bold=True)
+    plan = data.get('plan')
+    if plan is not None and not isinstance(plan, list):
+        return jsonify({'success': False, 'error': 'Expected a list of decisions as plan'}), 400
+    if plan is not None and len(plan) > MAX_BATCH_QUARTERS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_QUARTERS} quarters per plan'}), 400
+    try:
+        points = int(data.get('points', 3))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'points must be an integer'}), 400
+    if points > MAX_SENSITIVITY_POINTS:
+        return jsonify({'success': False, 'error': f'At most {MAX_SENSITIVITY_POINTS} points'}), 400
     
-    border_thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    try:
+        analysis = offloader.run(partial(
+            sensitivity_analysis,
+            params,
+            plan=[parse_decisions(d) for d in plan] if plan is not None else None,
+            parameters=data.get('parameters') or PARAMETER_FIELDS,
+            method=data.get('method', 'tornado'),
+            rel_step=float(data['rel_step']) if 'rel_step' in data else None,
+            points=points
+        ))
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
-    def setup_header(ws, title, subtitle):
-        ws.merge_cells('A1:F1')
-        ws['A1'] = title
-        ws['A1'].font = font_title
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        ws.merge_cells('A2:F2')
-        ws['A2'] = subtitle
-        ws['A2'].font = Font(italic=True, color="718096")
-        ws['A2'].alignment = Alignment(horizontal='center')
-        
-        ws.merge_cells('A3:F3')
-        ws['A3'] = f"TechGear Solutions GmbH - Report generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        ws['A3'].alignment = Alignment(horizontal='center')
-
-    # ==========================================
-    # SHEET 1: Management Summary
-    # ==========================================
-    ws_sum = wb.active
-    ws_sum.title = "Management Summary"
-    setup_header(ws_sum, "📊 Management Summary", "Wichtigste Kennzahlen auf einen Blick")
-    
-    # KPIs Table
-    ws_sum['A5'] = "Finanz-Kennzahlen (Gesamtjahr)"
-    ws_sum['A5'].font = Font(bold=True, size=12)
-    
-    kpis = [
-        ("Gesamtumsatz", summary['total_revenue'], "M"),
-        ("Reingewinn (Netto)", summary['total_net_profit'], "M"),
-        ("Umsatzrendite (ROS)", summary['return_on_sales'], "%"),
-        ("Endbestand Kasse", summary['final_cash'], "M"),
-        ("Gesamte Steuern", summary['total_tax'], "M")
-    ]
-    
-    row = 6
-    for label, value, unit in kpis:
-        ws_sum[f'A{row}'] = label
-        ws_sum[f'B{row}'] = value
-        ws_sum[f'B{row}'].number_format = f'0.00 "{unit}"'
-        ws_sum[f'B{row}'].font = font_bold
-        
-        # Color coding for Profit and Cash
-        if "Netto" in label or "Kasse" in label:
-             ws_sum[f'B{row}'].fill = style_success if value >= 0 else style_danger
-             
-        row += 1
-
-    ws_sum.column_dimensions['A'].width = 25
-    ws_sum.column_dimensions['B'].width = 15
-
-    # ==========================================
-    # SHEET 2: GuV Detail
-    # ==========================================
-    ws_guv = wb.create_sheet("GuV Detail")
-    setup_header(ws_guv, "📉 Gewinn- und Verlustrechnung", "Detaillierte Aufstellung nach Quartalen")
-    
-    headers = ['Position', 'Q1', 'Q2', 'Q3', 'Q4', 'GESAMT']
-    for col, h in enumerate(headers, 1):
-        cell = ws_guv.cell(row=5, column=col, value=h)
-        cell.fill = style_header
-        cell.font = font_header
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Data Rows
-    guv_rows = [
-        ("Umsatzerlöse", "sales_revenue", False),
-        ("Herstellungskosten", "herstellungskosten", True), # True = negative
-        ("= Bruttoergebnis", "gross_profit", False, True), # True = bold row
-        ("Gemeinkosten", "overhead_cost", True),
-        ("Marketing", "marketing_cost", True),
-        ("Abschreibungen", "depreciation", True),
-        ("= EBIT", "ebit", False, True),
-        ("Zinsen", "interest", True),
-        ("= Gewinn vor Steuern", "profit_before_tax", False, True),
-        ("Steuern", "tax", True),
-        ("= Gewinn nach Steuern", "net_profit", False, True)
-    ]
-    
-    current_row = 6
-    for label, attr, is_expense, *is_bold in guv_rows:
-        ws_guv.cell(row=current_row, column=1, value=label).font = font_bold if is_bold else None
-        
-        total_val = 0
-        for i, r in enumerate(results):
-            val = getattr(r, attr)
-            total_val += val
-            
-            # Flip sign for expenses for visual representation? 
-            # Standard GuV usually lists positive numbers but subtracts them.
-            # Let's keep them positive but maybe red text?
-            # Or use negative numbers as in the app.py logic. 
-            # The app.py logic used negative numbers for visual clarity.
-            
-            display_val = -val if is_expense else val
-            
-            c = ws_guv.cell(row=current_row, column=i+2, value=display_val)
-            c.number_format = '0.00 "M"'
-            if is_bold: c.font = font_bold
-            if is_expense: c.font = Font(color="C00000")
-            if "Brutto" in label or "EBIT" in label or "Gewinn" in label:
-                c.fill = style_subheader
-        
-        # Total Column
-        total_display = -total_val if is_expense else total_val
-        c_total = ws_guv.cell(row=current_row, column=6, value=total_display)
-        c_total.number_format = '0.00 "M"'
-        c_total.font = font_bold
-        c_total.border = Border(left=Side(style='double'))
-        
-        current_row += 1
-
-    ws_guv.column_dimensions['A'].width = 30
-    for i in range(2, 7): ws_guv.column_dimensions[get_column_letter(i)].width = 15
-
-    # ==========================================
-    # SHEET 3: Cashflow & Bilanz
-    # ==========================================
-    ws_bal = wb.create_sheet("Cashflow & Bilanz")
-    setup_header(ws_bal, "💰 Cashflow & Vermögenswerte", "Liquiditätsrechnung und Bestandsbewertung")
-    
-    # Cashflow Headers
-    ws_bal['A5'] = "CASHFLOW RECHNUNG"
-    ws_bal['A5'].font = Font(bold=True, size=12, color="667eea")
-    
-    headers = ['Position', 'Q1', 'Q2', 'Q3', 'Q4']
-    for col, h in enumerate(headers, 1):
-        ws_bal.cell(row=6, column=col, value=h).font = font_bold
-        ws_bal.cell(row=6, column=col).border = Border(bottom=Side(style='medium'))
-
-    # Cashflow Data Construction
-    # Recalculate explicit flows for clarity
-    cf_rows = [
-        "Anfangsbestand Kasse",
-        "+ Einzahlungen (Forderungen)",
-        "- Ausz. Operativ (Mat/Prod/Gemein/Mark)",
-        "- Ausz. Finanzen (Zinsen/Steuern)",
-        "= Endbestand Kasse"
-    ]
-    
-    r_idx = 7
-    for label in cf_rows:
-        ws_bal.cell(row=r_idx, column=1, value=label)
-        r_idx += 1
-        
-    for i, res in enumerate(results):
-        col = i + 2
-        # Start
-        ws_bal.cell(row=7, column=col, value=res.cash_beginning).number_format = '0.00'
-        
-        # In (Receivables from prev quarter)
-        inflow = res.cash_beginning + res.sales_revenue - res.cash_ending + res.total_operating_cost # Reverse eng? 
-        # Actually simpler: Inflow = Receivables collected. 
-        # logic: cash_end = cash_start + receivables_collected - total_cash_costs
-        # receivables_collected = cash_end - cash_start + total_cash_costs
-        # Wait, simpler: The simulator logic says "Cash in: customer payments (previous quarter receivables)".
-        # In Q1, we collect initial receivables.
-        
-        # Let's recalculate based on simulator logic:
-        # cash_in = self.accounts_receivable (from PREVIOUS state).
-        # We don't have previous state easily in 'results' list alone without looking back.
-        # But we can infer: inflow = (cash_ending - cash_beginning) + total_cash_costs
-        
-        cash_costs_op = (res.material_cost + res.production_cost + res.assembly_cost + 
-                        res.overhead_cost + res.marketing_cost)
-        cash_costs_fin = res.interest + res.tax
-        total_out = cash_costs_op + cash_costs_fin
-        
-        inflow = (res.cash_ending - res.cash_beginning) + total_out
-        
-        ws_bal.cell(row=8, column=col, value=inflow).number_format = '0.00'
-        ws_bal.cell(row=9, column=col, value=-cash_costs_op).number_format = '0.00'
-        ws_bal.cell(row=10, column=col, value=-cash_costs_fin).number_format = '0.00'
-        
-        c_end = ws_bal.cell(row=11, column=col, value=res.cash_ending)
-        c_end.number_format = '0.00'
-        c_end.font = font_bold
-        c_end.fill = style_subheader
-
-    # Asset Valuation (Inventory)
-    r_start = 14
-    ws_bal[f'A{r_start}'] = "VERMÖGENSWERTE (Indikativ)"
-    ws_bal[f'A{r_start}'].font = Font(bold=True, size=12, color="667eea")
-    
-    # Valuation Logic
-    # Raw = Base Price (3.0)
-    # WIP = Mat + Prod (3.0 + 3.0 = 6.0)
-    # Finished = Mat + Prod + Assembly (3.0 + 3.0 + 1.0 = 7.0)
-    val_raw = params.base_material_price
-    val_wip = params.base_material_price + params.base_production_cost
-    val_fin = params.base_material_price + params.base_production_cost + params.base_assembly_cost
-    
-    asset_rows = ["Liquide Mittel", "Forderungen (aus Verkauf)", "Vorräte (Bewertet)", "SUMME UMLAUFVERMÖGEN"]
-    for i, l in enumerate(asset_rows):
-        ws_bal.cell(row=r_start+1+i, column=1, value=l)
-
-    for i, res in enumerate(results):
-        col = i + 2
-        # Cash
-        ws_bal.cell(row=r_start+1, column=col, value=res.cash_ending).number_format = '0.00'
-        # Receivables
-        ws_bal.cell(row=r_start+2, column=col, value=res.accounts_receivable).number_format = '0.00'
-        
-        # Inventory Value
-        inv_val = (res.raw_material_inventory * val_raw) + \
-                  (res.work_in_progress * val_wip) + \
-                  (res.finished_goods_inventory * val_fin)
-        ws_bal.cell(row=r_start+3, column=col, value=inv_val).number_format = '0.00'
-        
-        # Sum
-        total_assets = res.cash_ending + res.accounts_receivable + inv_val
-        c_sum = ws_bal.cell(row=r_start+4, column=col, value=total_assets)
-        c_sum.number_format = '0.00'
-        c_sum.font = font_bold
-        c_sum.border = Border(top=Side(style='thin'), bottom=Side(style='double'))
-
-    ws_bal.column_dimensions['A'].width = 35
-    
-    # ==========================================
-    # SHEET 4: Produktion & Lager
-    # ==========================================
-    ws_prod = wb.create_sheet("Produktion & Lager")
-    setup_header(ws_prod, "🏭 Produktion & Logistik", "Mengenströme und Lagerbestände")
-    
-    headers = ['Kennzahl', 'Q1', 'Q2', 'Q3', 'Q4']
-    for col, h in enumerate(headers, 1):
-        ws_prod.cell(row=5, column=col, value=h).font = font_bold
-        ws_prod.cell(row=5, column=col).fill = style_subheader
-
-    prod_data = [
-        ("MENGENSTRÖME", "", ""),
-        ("Einkauf (Lose)", "material_purchase_lots", "0"),
-        ("Produktion (Lose)", "production_lots", "0"),
-        ("Absatz (Lose)", "sales_volume", "0"),
-        ("", "", ""),
-        ("LAGERBESTÄNDE (Ende)", "", ""),
-        ("Rohmaterial", "raw_material_inventory", "0"),
-        ("Halbfertigware (WIP)", "work_in_progress", "0"),
-        ("Fertigware", "finished_goods_inventory", "0"),
-        ("", "", ""),
-        ("MARKT-DATEN", "", ""),
-        ("Verkaufspreis", "sales_price", "0.00"),
-        ("Marketing-Budget", "marketing_cost", "0.00")
-    ]
-    
-    curr_row = 6
-    for label, attr, fmt in prod_data:
-        cell = ws_prod.cell(row=curr_row, column=1, value=label)
-        if attr == "": # Section Header
-            cell.font = Font(bold=True, color="667eea")
-        else:
-            for i, res in enumerate(results):
-                val = getattr(res, attr)
-                c = ws_prod.cell(row=curr_row, column=i+2, value=val)
-                c.number_format = fmt
-                c.alignment = Alignment(horizontal='center')
-        curr_row += 1
-
-    ws_prod.column_dimensions['A'].width = 30
+    return json_response(dict(analysis, success=True))
 
-    # Save file
+
+@app.route('/api/forecast', methods=['POST'])
+def forecast_plans():
+    """
+    Projected cash and inventories of candidate plans, without playing them
+    
+    Body: {"game_id": ..., "plans": [plan, ...], "quarters": N}; a plan is
+    a list of N decision dicts (as for /api/simulate_quarter) or one dict
+    used for every quarter. Without "quarters", the rest of the game's
+    horizon is projected. The game is not changed; see forecast.py.
+    """
+    data = request.json or {}
+    game_id = data.get('game_id', 'default')
+    
+    simulator = simulators.get(game_id)
+    if simulator is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+    plans = data.get('plans')
+    if not isinstance(plans, list) or not plans:
+        return jsonify({'success': False, 'error': 'Expected a list of plans'}), 400
+    try:
+        quarters = int(data['quarters']) if 'quarters' in data else None
+        if (quarters or 1) * len(plans) > MAX_BATCH_QUARTERS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_QUARTERS} plan quarters per request'}), 400
+        plans = [
+            parse_decisions(plan) if isinstance(plan, dict) else [parse_decisions(d) for d in plan]
+            for plan in plans
+        ]
+        with metrics.stage('simulate'):
+            projection = forecast(simulator, plans, quarters)
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    with metrics.stage('serialize'):
+        return json_response(dict(projection, success=True, game_id=game_id))
+
+
+@app.route('/api/export_cohort', methods=['GET'])
+def export_cohort():
+    """Export all games (or one market session) into one columnar cohort file"""
+    session_filter = request.args.get('session_id')
+
+    def session_of(game_id):
+        session = market_sessions.session_for_game(game_id)
+        return session.session_id if session is not None else None
+
+    # Games of one session next to each other, so that their row groups fill up
+    game_ids = [(session_of(game_id) or '', game_id) for game_id in simulators.game_ids()]
+    if session_filter is not None:
+        game_ids = [entry for entry in game_ids if entry[0] == session_filter]
+    game_ids.sort()
+
+    # Session ids come from the client; only their safe characters reach the file name
+    filename = f"cohort_{secure_filename(session_filter or '') or 'all'}_{datetime.now().strftime('%Y%m%d_%H%M')}.fcol"
     exports_dir = os.path.join(os.getcwd(), 'exports')
     os.makedirs(exports_dir, exist_ok=True)
-
-    filename = f"TechGear_Report_{game_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
     filepath = os.path.join(exports_dir, filename)
-    wb.save(filepath)
 
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    with CohortWriter(filepath) as writer:
+        for session_id, game_id in game_ids:
+            simulator = simulators.get(game_id)  # Loaded one at a time
+            if simulator is not None:
+                writer.add_game(game_id, simulator, session_id)
+
+    return send_file(filepath, as_attachment=True, download_name=filename,
+                     mimetype='application/octet-stream')
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage timings and gauges in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
 if __name__ == '__main__':
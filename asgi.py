@@ -0,0 +1,35 @@
+"""
+ASGI entry point for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+Serves the Flask app from an ASGI server, e.g.
+
+    uvicorn asgi:application --workers 2
+
+The Flask views stay synchronous: every request runs in a thread of a
+pool of ASGI_THREADS threads while the server's event loop keeps
+accepting connections. CPU-bound work is not done in these threads but
+in the offload process pool (see offload.py), so slow exports do not
+hold the GIL while /api/simulate_quarter requests wait.
+
+Every open event stream (/api/events) keeps one thread busy; raise
+ASGI_THREADS for many hundred concurrent streams.
+
+Requires the a2wsgi package (pip install a2wsgi) in addition to an ASGI
+server such as uvicorn; both are optional in requirements.txt.
+"""
+
+import os
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError as e:
+    raise ImportError("asgi.py requires the a2wsgi package: pip install a2wsgi uvicorn") from e
+
+from app import app
+
+
+# Threads running Flask views (open event streams included)
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 64))
+
+application = WSGIMiddleware(app, workers=ASGI_THREADS)
@@ -0,0 +1,327 @@
+"""
+Vectorized batch engine for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+Advances N independent simulator states in lockstep using NumPy arrays.
+Every rule of FactorySimulator.simulate_quarter (demand, costs, GuV,
+taxes, inventories and cash flow) is reproduced with the same float
+evaluation order, so each path matches the scalar engine exactly.
+Results are returned as column arrays keyed by QuarterResult field name
+instead of one dataclass per quarter.
+"""
+
+from dataclasses import asdict, fields
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from factory_simulator import (
+    QUARTERS_PER_YEAR, RESULT_FIELDS, RESULT_INT_FIELDS as INT_FIELDS, SUMMARY_TOTALS, FactorySimulator, GameParameters,
+    QuarterResult
+)
+
+
+# GameParameters fields that enter the simulation (the horizon only sets the game length)
+PARAMETER_FIELDS = tuple(f.name for f in fields(GameParameters) if f.name != 'horizon')
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like the builtin round(x, 2)
+
+    np.round scales by 100 before rounding, which can differ from the
+    correctly rounded builtin when x * 100 lands next to a .5 tie. Only
+    those few elements are re-rounded in Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = np.abs(values * 100.0)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        idx = np.flatnonzero(near_tie)
+        flat = rounded.reshape(-1)
+        source = values.reshape(-1)
+        for i in idx:
+            flat[i] = round(float(source[i]), 2)
+    return rounded
+
+
+class BatchSimulator:
+    """Simulation engine for N independent Factory games played in lockstep"""
+
+    def __init__(self, n: int, parameters: GameParameters = None,
+                 overrides: Mapping[str, Sequence[float]] = None,
+                 keep_history: bool = True):
+        """
+        Args:
+            n: Number of independent games (paths)
+            parameters: Shared game parameters (defaults to GameParameters())
+            overrides: Per-path values for single GameParameters fields,
+                e.g. {'competitor_price': array_of_n_prices}
+            keep_history: Keep the column arrays of every quarter in results
+        """
+        self.n = int(n)
+        self.params = parameters or GameParameters()
+        self.keep_history = keep_history
+        self.current_quarter = 0
+        self.results: List[Dict[str, np.ndarray]] = []
+
+        # One array per parameter so that single fields can vary per path
+        base = asdict(self.params)
+        overrides = overrides or {}
+        unknown = set(overrides) - set(PARAMETER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown GameParameters fields: {sorted(unknown)}")
+        self.p: Dict[str, np.ndarray] = {}
+        for name in PARAMETER_FIELDS:
+            value = overrides.get(name, base[name])
+            self.p[name] = self._column(value, np.float64)
+
+        # Initial state (from original game)
+        self.cash = np.full(self.n, 28.0)
+        self.accounts_receivable = np.full(self.n, 26.0)
+        self.raw_material_inventory = np.full(self.n, 2, dtype=np.int64)
+        self.work_in_progress = np.full(self.n, 2, dtype=np.int64)
+        self.finished_goods_inventory = np.full(self.n, 2, dtype=np.int64)
+
+        # Totals of the current business year for year-end reporting
+        self.annual_depreciation = np.zeros(self.n)
+        self.annual_interest = np.zeros(self.n)
+        self.annual_tax = np.zeros(self.n)
+
+        # Running totals for get_summary
+        self.totals = {key: np.zeros(self.n) for key, _ in SUMMARY_TOTALS}
+
+    @classmethod
+    def from_simulator(cls, simulator: FactorySimulator, n: int, **kwargs) -> 'BatchSimulator':
+        """
+        Create N copies of the current state of a scalar simulator
+
+        The running summary totals are copied as well, so get_summary()
+        covers the simulator's quarters plus the ones simulated on the batch.
+        """
+        batch = cls(n, simulator.params, **kwargs)
+        batch.current_quarter = simulator.current_quarter
+        batch.cash[:] = simulator.cash
+        batch.accounts_receivable[:] = simulator.accounts_receivable
+        batch.raw_material_inventory[:] = simulator.raw_material_inventory
+        batch.work_in_progress[:] = simulator.work_in_progress
+        batch.finished_goods_inventory[:] = simulator.finished_goods_inventory
+        batch.annual_depreciation[:] = simulator.annual_depreciation
+        batch.annual_interest[:] = simulator.annual_interest
+        batch.annual_tax[:] = simulator.annual_tax
+        for key, attr in SUMMARY_TOTALS:
+            batch.totals[key][:] = simulator.results.totals[attr]
+        return batch
+
+    def _column(self, value, dtype, name: str = 'value') -> np.ndarray:
+        """Broadcast a scalar or per-path sequence to an array of length n"""
+        column = np.asarray(value)
+        if dtype is np.int64 and column.dtype.kind not in 'iub':
+            # Lot counts, like whole_number(): integral floats (2.0) pass, fractions are not truncated
+            if column.dtype.kind != 'f' or not np.all(np.mod(column, 1.0) == 0.0):
+                raise ValueError(f"{name} must be whole numbers, got {value!r}")
+        column = column.astype(dtype, copy=False)
+        if column.ndim == 0:
+            return np.full(self.n, column, dtype=dtype)
+        if column.shape != (self.n,):
+            raise ValueError(f"Expected {self.n} values, got shape {column.shape}")
+        return column
+
+    def calculate_demand(self, sales_price: np.ndarray, marketing_spend: np.ndarray) -> np.ndarray:
+        """Vectorized FactorySimulator.calculate_demand"""
+        p = self.p
+
+        # Price effect on demand
+        price_ratio = sales_price / p['base_sales_price']
+        price_effect = 1.0 - (price_ratio - 1.0) * p['price_elasticity']
+
+        # Marketing effect on demand
+        marketing_effect = 1.0 + (marketing_spend * p['marketing_effectiveness'])
+
+        # Competitive effect
+        competitor = p['competitor_price']
+        competitive_penalty = np.where(sales_price > competitor, 0.85,
+                                       np.where(sales_price < competitor, 1.15, 1.0))
+
+        # Calculate total demand
+        demand = p['market_demand_base'] * price_effect * marketing_effect * competitive_penalty
+
+        return np.maximum(1, np.rint(demand)).astype(np.int64)  # At least 1 lot
+
+    def calculate_production_cost(self, lots: np.ndarray) -> np.ndarray:
+        """Vectorized FactorySimulator.calculate_production_cost"""
+        base_cost = lots * self.p['base_production_cost']
+        adjusted_cost = base_cost * self.p['production_efficiency'] * self.p['quality_factor']
+        return round2(adjusted_cost)
+
+    def calculate_material_cost(self, lots: np.ndarray, market_factor: np.ndarray) -> np.ndarray:
+        """Vectorized FactorySimulator.calculate_material_cost"""
+        return round2(lots * self.p['base_material_price'] * market_factor)
+
+    def simulate_quarter(self,
+                         sales_price=None,
+                         marketing_budget=0.0,
+                         production_lots=2,
+                         material_purchase_lots=2,
+                         material_market_factor=1.0,
+                         overhead_factor=1.0) -> Dict[str, np.ndarray]:
+        """
+        Simulate one quarter for all paths
+
+        Every decision may be a scalar (same for all paths) or a sequence of
+        length n. Returns one array of length n per QuarterResult field.
+        """
+        # Checked before any state changes (use base price if not specified)
+        if sales_price is None:
+            sales_price = self.p['base_sales_price']
+        sales_price = self._column(sales_price, np.float64)
+        marketing_budget = self._column(marketing_budget, np.float64)
+        production_lots = self._column(production_lots, np.int64, 'production_lots')
+        material_purchase_lots = self._column(material_purchase_lots, np.int64, 'material_purchase_lots')
+        material_market_factor = self._column(material_market_factor, np.float64)
+        overhead_factor = self._column(overhead_factor, np.float64)
+
+        self.current_quarter += 1
+        cash_beginning = self.cash.copy()
+
+        # First quarter of a new business year: the annual totals start again
+        if self.current_quarter > 1 and (self.current_quarter - 1) % QUARTERS_PER_YEAR == 0:
+            self.annual_depreciation.fill(0.0)
+            self.annual_interest.fill(0.0)
+            self.annual_tax.fill(0.0)
+
+        # Demand, capped by finished goods inventory
+        sales_volume = self.calculate_demand(sales_price, marketing_budget)
+        sales_volume = np.minimum(sales_volume, self.finished_goods_inventory)
+
+        sales_revenue = sales_volume * sales_price
+
+        # Costs
+        material_cost = self.calculate_material_cost(material_purchase_lots, material_market_factor)
+        production_cost = self.calculate_production_cost(production_lots)
+        assembly_cost = production_lots * self.p['base_assembly_cost']
+        herstellungskosten = material_cost + production_cost + assembly_cost
+
+        overhead_cost = self.p['base_overhead_cost'] * overhead_factor
+        marketing_cost = marketing_budget
+
+        depreciation = self.p['depreciation_per_quarter']
+        self.annual_depreciation += depreciation
+
+        # GuV structure
+        gross_profit = sales_revenue - herstellungskosten
+        ebit = gross_profit - overhead_cost - depreciation
+
+        interest = self.p['interest_per_quarter']
+        self.annual_interest += interest
+
+        profit_before_tax = ebit - interest
+        tax = np.maximum(0.0, profit_before_tax * self.p['tax_rate'])
+        self.annual_tax += tax
+        net_profit = profit_before_tax - tax
+
+        # Cash outflows (no depreciation)
+        total_cash_costs = (material_cost + production_cost + assembly_cost +
+                            overhead_cost + marketing_cost + interest + tax)
+
+        # Inventories (WIP is produced and assembled within the quarter)
+        self.raw_material_inventory += material_purchase_lots
+        self.raw_material_inventory -= production_lots
+        self.finished_goods_inventory += production_lots
+        self.finished_goods_inventory -= sales_volume
+
+        # Cash flow: collect last quarter's receivables, pay cash costs
+        self.cash += self.accounts_receivable
+        self.cash -= total_cash_costs
+        self.accounts_receivable = sales_revenue
+
+        result = {
+            'quarter': np.full(self.n, self.current_quarter, dtype=np.int64),
+            'material_purchase_lots': material_purchase_lots,
+            'production_lots': production_lots,
+            'sales_price': sales_price,
+            'sales_volume': sales_volume,
+            'sales_revenue': sales_revenue,
+            'material_cost': material_cost,
+            'production_cost': production_cost,
+            'assembly_cost': assembly_cost,
+            'herstellungskosten': herstellungskosten,
+            'overhead_cost': overhead_cost,
+            'marketing_cost': marketing_cost,
+            'depreciation': depreciation,
+            'interest': interest,
+            'total_operating_cost': total_cash_costs,
+            'gross_profit': gross_profit,
+            'ebit': ebit,
+            'profit_before_tax': profit_before_tax,
+            'tax': tax,
+            'net_profit': net_profit,
+            'raw_material_inventory': self.raw_material_inventory.copy(),
+            'work_in_progress': self.work_in_progress.copy(),
+            'finished_goods_inventory': self.finished_goods_inventory.copy(),
+            'cash_beginning': cash_beginning,
+            'cash_ending': self.cash.copy(),
+            'accounts_receivable': self.accounts_receivable
+        }
+
+        for key, attr in SUMMARY_TOTALS:
+            self.totals[key] += result[attr]
+
+        if self.keep_history:
+            self.results.append(result)
+        return result
+
+    def run(self, decisions: Sequence[Mapping]) -> Dict[str, np.ndarray]:
+        """
+        Simulate several quarters in a row
+
+        Args:
+            decisions: One dict of simulate_quarter keyword arguments per quarter
+
+        Returns:
+            One array of shape (quarters, n) per QuarterResult field
+        """
+        quarters = [self.simulate_quarter(**decision) for decision in decisions]
+        if not quarters:
+            return {name: np.empty((0, self.n)) for name in RESULT_FIELDS}
+        return {name: np.stack([q[name] for q in quarters]) for name in RESULT_FIELDS}
+
+    def get_summary(self) -> Dict[str, np.ndarray]:
+        """Vectorized FactorySimulator.get_summary, one array per key"""
+        if self.current_quarter == 0:
+            return {}
+
+        t = self.totals
+        quarters = self.current_quarter
+        total_revenue = t['total_revenue']
+        total_net_profit = t['total_net_profit']
+        safe_revenue = np.where(total_revenue > 0, total_revenue, 1.0)
+        return_on_sales = np.where(total_revenue > 0, total_net_profit / safe_revenue * 100, 0.0)
+
+        return {
+            "quarters_played": np.full(self.n, quarters, dtype=np.int64),
+            "total_revenue": round2(total_revenue),
+            "total_herstellungskosten": round2(t['total_herstellungskosten']),
+            "total_gross_profit": round2(t['total_gross_profit']),
+            "total_overhead": round2(t['total_overhead']),
+            "total_marketing": round2(t['total_marketing']),
+            "total_depreciation": round2(t['total_depreciation']),
+            "total_ebit": round2(t['total_ebit']),
+            "total_interest": round2(t['total_interest']),
+            "total_profit_before_tax": round2(t['total_ebit'] - t['total_interest']),
+            "total_tax": round2(t['total_tax']),
+            "total_net_profit": round2(total_net_profit),
+            "average_profit_per_quarter": round2(total_net_profit / quarters),
+            "final_cash": round2(self.cash),
+            "return_on_sales": round2(return_on_sales)
+        }
+
+    def path_result(self, index: int, quarter: int) -> QuarterResult:
+        """Return a single path's quarter as a QuarterResult (1-based quarter)"""
+        columns = self.results[quarter - 1 - (self.current_quarter - len(self.results))]
+        values = {}
+        for name in RESULT_FIELDS:
+            value = columns[name][index]
+            values[name] = int(value) if name in INT_FIELDS else float(value)
+        return QuarterResult(**values)
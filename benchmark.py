@@ -0,0 +1,481 @@
+"""
+Benchmarks for the Factory Business Simulation
+Measures latency and peak memory of fixed cases (single quarters, long
+games, many parallel games, get_summary, JSON export (stdlib json vs.
+result_json, per quarter and per history), /api/export_excel through the
+Flask test client, ...) and the memory the result history needs per
+quarter.
+
+The cases are registered with @benchmark and run by this script without
+extra dependencies. With pytest-benchmark installed, tests/test_benchmarks.py
+runs the same cases through its `benchmark` fixture, e.g.
+`pytest tests/test_benchmarks.py --benchmark-autosave` and later
+`--benchmark-compare --benchmark-compare-fail=median:25%`.
+
+Usage:
+    python benchmark.py                       # all benchmarks
+    python benchmark.py excel                 # only benchmarks whose name contains "excel"
+    python benchmark.py memory                # only the memory per quarter
+    python benchmark.py --save-baseline       # save the results as baseline
+    python benchmark.py --check               # compare with the baseline, exit code 1 on regressions
+    python benchmark.py --check --threshold 0.5 simulate
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from factory_simulator import FactorySimulator, ResultHistory
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark; the decorated function returns the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def measure(func: Callable[[], object], repeat: int = 20) -> Dict[str, float]:
+    """Median/min latency in ms and peak traced memory in KiB of func()"""
+    func()  # Warm-up (imports, caches)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "peak_kib": peak / 1024
+    }
+
+
+def played_game(quarters: int = 4) -> FactorySimulator:
+    """Simulator with a fixed, deterministic decision sequence"""
+    simulator = FactorySimulator()
+    for q in range(quarters):
+        simulator.simulate_quarter(
+            sales_price=12.5 + 0.5 * (q % 3),
+            marketing_budget=1.0 * (q % 2),
+            production_lots=2 + q % 2,
+            material_purchase_lots=2 + q % 2
+        )
+    return simulator
+
+
+# ==========================================
+# Simulation
+# ==========================================
+
+@benchmark("simulate_quarter_single")
+def bench_simulate_quarter():
+    """New game plus one quarter"""
+    return lambda: FactorySimulator().simulate_quarter(sales_price=12.5, marketing_budget=1.0)
+
+
+@benchmark("simulate_400q")
+def bench_long_horizon():
+    """One game over 400 quarters (100 years)"""
+    return lambda: played_game(400)
+
+
+def bench_fork(quarters: int):
+    """fork() at the last quarter (re-adds the annual totals of the current year only)"""
+    return played_game(quarters).fork
+
+
+for _quarters in (4, 400):
+    benchmark(f"fork_{_quarters}q")(lambda q=_quarters: bench_fork(q))
+
+
+@benchmark("simulate_1000games_scalar")
+def bench_parallel_scalar():
+    """1000 independent games of 4 quarters, one FactorySimulator each"""
+    return lambda: [played_game(4) for _ in range(1000)]
+
+
+@benchmark("simulate_100000games_batch")
+def bench_parallel_batch():
+    """100000 games of 4 quarters in the vectorized BatchSimulator"""
+    from batch_simulator import BatchSimulator
+
+    def run():
+        batch = BatchSimulator(100000, keep_history=False)
+        for q in range(4):
+            batch.simulate_quarter(sales_price=12.5 + 0.5 * (q % 3), marketing_budget=1.0 * (q % 2),
+                                   production_lots=2 + q % 2, material_purchase_lots=2 + q % 2)
+        return batch
+    return run
+
+
+# ==========================================
+# JSON export
+# ==========================================
+
+def bench_export_json(quarters: int):
+    """export_data() through the stdlib json module (reference for result_json)"""
+    simulator = played_game(quarters)
+    return lambda: json.dumps(simulator.export_data(), indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def bench_export_fast(quarters: int, compact: bool):
+    """export_results payload as built by the app (result_json)"""
+    from result_json import export_bytes
+    simulator = played_game(quarters)
+    return lambda: export_bytes(simulator, compact)
+
+
+def bench_quarter_json(fast: bool):
+    """One quarter result as returned by /api/simulate_quarter"""
+    from dataclasses import asdict
+    from result_json import quarter_bytes
+    simulator = played_game(40)
+    if fast:
+        return lambda: quarter_bytes(simulator.results)
+    return lambda: json.dumps(asdict(simulator.results[-1])).encode('utf-8')
+
+
+for _quarters in (4, 40, 400):
+    benchmark(f"export_json_{_quarters}q")(lambda q=_quarters: bench_export_json(q))
+    benchmark(f"export_fast_{_quarters}q")(lambda q=_quarters: bench_export_fast(q, False))
+    benchmark(f"export_compact_{_quarters}q")(lambda q=_quarters: bench_export_fast(q, True))
+benchmark("quarter_json_asdict")(lambda: bench_quarter_json(False))
+benchmark("quarter_json_fast")(lambda: bench_quarter_json(True))
+
+
+# ==========================================
+# Excel export
+# ==========================================
+
+def bench_excel_classic(quarters: int):
+    """Current path: styled in-memory workbook saved as a whole"""
+    from excel_report import build_workbook
+    simulator = played_game(quarters)
+
+    def run():
+        buffer = io.BytesIO()
+        build_workbook(simulator).save(buffer)
+        return buffer
+    return run
+
+
+def bench_excel_streaming(quarters: int):
+    """Write-only workbook with named styles, streamed into a buffer"""
+    from excel_report import write_report_streaming
+    simulator = played_game(quarters)
+    return lambda: write_report_streaming(simulator)
+
+
+def bench_excel_template(quarters: int):
+    """Numbers patched into the cached skeleton (skeleton built during setup)"""
+    from excel_report import write_report_template
+    simulator = played_game(quarters)
+    write_report_template(simulator)
+    return lambda: write_report_template(simulator)
+
+
+def bench_excel_endpoint(cached: bool):
+    """GET /api/export_excel through the Flask test client (report cache cold or warm)"""
+    import app as web
+    client = web.app.test_client()
+    game_id = "benchmark"
+    web.simulators[game_id] = played_game(4)
+
+    def run():
+        if not cached:
+            web.reports.clear()
+        response = client.get(f"/api/export_excel?game_id={game_id}")
+        assert response.status_code == 200
+        return response.data
+    return run
+
+
+for _quarters in (4, 40):
+    benchmark(f"excel_classic_{_quarters}q")(lambda q=_quarters: bench_excel_classic(q))
+    benchmark(f"excel_streaming_{_quarters}q")(lambda q=_quarters: bench_excel_streaming(q))
+    benchmark(f"excel_template_{_quarters}q")(lambda q=_quarters: bench_excel_template(q))
+benchmark("api_export_excel")(lambda: bench_excel_endpoint(cached=False))
+benchmark("api_export_excel_cached")(lambda: bench_excel_endpoint(cached=True))
+
+
+# ==========================================
+# Summary
+# ==========================================
+
+def bench_summary(quarters: int):
+    """get_summary() on a long game (running totals, independent of length)"""
+    simulator = played_game(quarters)
+    return simulator.get_summary
+
+
+for _quarters in (4, 400):
+    benchmark(f"summary_{_quarters}q")(lambda q=_quarters: bench_summary(q))
+
+
+# ==========================================
+# Multiplayer market
+# ==========================================
+
+def bench_market_clearing(teams: int):
+    """allocate_demand for one quarter of a session with many teams"""
+    from market_engine import allocate_demand
+    from factory_simulator import GameParameters
+    params = GameParameters()
+    prices = [9.0 + (i * 7919 % 800) / 100 for i in range(teams)]
+    marketing = [0.5 * (i % 5) for i in range(teams)]
+    return lambda: allocate_demand(params, prices, marketing)
+
+
+for _teams in (10, 500):
+    benchmark(f"market_clearing_{_teams}teams")(lambda n=_teams: bench_market_clearing(n))
+
+
+# ==========================================
+# Leaderboard
+# ==========================================
+
+def filled_leaderboard(games: int):
+    from leaderboard import Leaderboard
+    board = Leaderboard()
+    for i in range(games):
+        board.update(f"game_{i}", {
+            'total_net_profit': (i * 7919 % games) / 10,
+            'final_cash': (i * 104729 % games) / 10,
+            'return_on_sales': (i * 1299709 % games) / 100,
+            'quarters_played': 4
+        })
+    return board
+
+
+def bench_leaderboard_update(games: int):
+    """Move one game on all three rankings of a full board"""
+    board = filled_leaderboard(games)
+    summary = {'total_net_profit': 1.0, 'final_cash': 2.0, 'return_on_sales': 3.0, 'quarters_played': 5}
+    return lambda: board.update("game_0", summary)
+
+
+def bench_leaderboard_page(games: int):
+    """One page of 20 entries from the middle of the ranking"""
+    board = filled_leaderboard(games)
+    return lambda: board.page('final_cash', games // 2, 20)
+
+
+for _games in (1000, 100000):
+    benchmark(f"leaderboard_update_{_games}games")(lambda n=_games: bench_leaderboard_update(n))
+    benchmark(f"leaderboard_page_{_games}games")(lambda n=_games: bench_leaderboard_page(n))
+
+
+# ==========================================
+# Cohort export
+# ==========================================
+
+def bench_cohort_export(games: int, quarters: int):
+    """All games of a cohort into one columnar file (in memory)"""
+    from cohort_export import write_cohort
+    cohort = [(f"team_{i}", played_game(quarters), f"session_{i // 10}") for i in range(games)]
+    return lambda: write_cohort(io.BytesIO(), cohort)
+
+
+benchmark("cohort_export_500games_40q")(lambda: bench_cohort_export(500, 40))
+
+
+# ==========================================
+# Sensitivity analysis
+# ==========================================
+
+def bench_sensitivity(points: int):
+    """Tornado sweep of all 17 GameParameters over a 4 quarter plan"""
+    from sensitivity import sensitivity_analysis
+    return lambda: sensitivity_analysis(points=points)
+
+
+for _points in (3, 101):
+    benchmark(f"sensitivity_17params_{_points}points")(lambda n=_points: bench_sensitivity(n))
+
+
+# ==========================================
+# Forecast
+# ==========================================
+
+def bench_forecast(plans: int, quarters: int):
+    """Projection of candidate plans from a game's current state (one batch run)"""
+    from forecast import forecast
+    simulator = played_game(4)
+    candidates = [{'sales_price': 11.0 + 0.25 * i, 'production_lots': 2 + i % 2} for i in range(plans)]
+    return lambda: forecast(simulator, candidates, quarters)
+
+
+for _plans, _quarters in ((1, 4), (5, 8), (100, 40)):
+    benchmark(f"forecast_{_plans}plans_{_quarters}q")(lambda n=_plans, q=_quarters: bench_forecast(n, q))
+
+
+# ==========================================
+# Decision log
+# ==========================================
+
+def bench_decision_replay(quarters: int):
+    """Rebuild a game from its decision log records"""
+    from decision_log import decode_records, encode_quarter, encode_start, replay
+    simulator = played_game(0)
+    data = encode_start(simulator.params) + b''.join(
+        encode_quarter({'sales_price': 12.5, 'production_lots': 2 + q % 2,
+                        'material_purchase_lots': 2 + q % 2}) for q in range(quarters)
+    )
+    return lambda: replay(decode_records(data))
+
+
+benchmark("decision_replay_400q")(lambda: bench_decision_replay(400))
+
+
+# ==========================================
+# Instrumentation overhead
+# ==========================================
+
+def bench_metrics_stages(enabled: bool):
+    """The seven stage blocks of one /api/simulate_quarter request"""
+    from metrics import Metrics
+    registry = Metrics(enabled=enabled)
+    registry.set_endpoint("simulate_quarter")
+    stages = ('parse', 'load', 'simulate', 'store', 'notify', 'serialize', 'total')
+
+    def run():
+        for name in stages:
+            with registry.stage(name):
+                pass
+    return run
+
+
+benchmark("metrics_stages_disabled")(lambda: bench_metrics_stages(False))
+benchmark("metrics_stages_enabled")(lambda: bench_metrics_stages(True))
+
+
+# ==========================================
+# Result history memory
+# ==========================================
+
+def traced_bytes(build: Callable[[], object]) -> int:
+    """Bytes still allocated by the object build() returns"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    obj = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return after - before
+
+
+def history_bytes_per_quarter(quarters: int = 10000) -> Dict[str, float]:
+    """Bytes per quarter of a list of QuarterResults vs. the columnar ResultHistory"""
+    rows = [tuple(values) for values in played_game(4).results.rows()]
+    rows = [rows[q % 4] for q in range(quarters)]
+    columnar = ResultHistory(rows)
+    dataclasses = traced_bytes(lambda: list(columnar))
+    columns = traced_bytes(lambda: ResultHistory(rows))
+    return {
+        "list_of_dataclasses": dataclasses / quarters,
+        "result_history": columns / quarters
+    }
+
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+def run_benchmarks(pattern: str = "") -> Dict[str, Dict[str, float]]:
+    """Run all matching benchmarks and print the result table"""
+    results = {}
+    print(f"{'Benchmark':<30} {'Median ms':>10} {'Min ms':>10} {'Peak KiB':>10}")
+    print("-" * 64)
+    for name, setup in BENCHMARKS.items():
+        if pattern not in name:
+            continue
+        stats = measure(setup())
+        results[name] = stats
+        print(f"{name:<30} {stats['median_ms']:>10.2f} {stats['min_ms']:>10.2f} {stats['peak_kib']:>10.1f}")
+    return results
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                     threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Benchmarks whose median got slower than the baseline by more than
+    `threshold` (relative) and `min_delta_ms` (absolute, ignores noise
+    on sub-millisecond cases)
+    """
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference['median_ms'] * (1 + threshold)
+        if stats['median_ms'] > limit and stats['median_ms'] - reference['median_ms'] > min_delta_ms:
+            regressions.append(
+                f"{name}: {stats['median_ms']:.2f} ms > {reference['median_ms']:.2f} ms "
+                f"(+{(stats['median_ms'] / reference['median_ms'] - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the Factory simulation")
+    parser.add_argument("pattern", nargs="?", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="FILE",
+                        help=f"save the results as baseline (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--check", nargs="?", const=DEFAULT_BASELINE, metavar="FILE",
+                        help="compare with the baseline, exit code 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative slowdown of the median (default: 0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="smaller slowdowns count as noise (default: 0.05 ms)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.pattern)
+
+    if args.pattern in ("", "memory_per_quarter"):  # All benchmarks or just this table
+        print()
+        print(f"{'Memory per quarter':<30} {'Bytes':>10}")
+        print("-" * 41)
+        for name, size in history_bytes_per_quarter().items():
+            print(f"{name:<30} {size:>10.0f}")
+
+    if args.save_baseline:
+        baseline = {}
+        try:
+            with open(args.save_baseline, encoding='utf-8') as f:
+                baseline = json.load(f)  # Keep entries of benchmarks not run this time
+        except FileNotFoundError:
+            pass
+        baseline.update(results)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved: {args.save_baseline}")
+
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.threshold * 100:.0f}% slower than {args.check}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Columnar bulk export of many games (e.g. a whole semester cohort)
+Planspiel BWL für BDE - WiSe 2025/26
+
+All quarter histories go into one file in a column-oriented layout
+(similar to Parquet/Arrow, but only needs numpy):
+
+    MAGIC
+    row group 0: one contiguous buffer per column (little-endian int64/float64)
+    row group 1: ...
+    footer: JSON with the columns, the row groups and the games
+    footer length (uint64) + MAGIC
+
+Row groups are partitioned by market session: every row group holds
+quarters of games of one session only (single player games form the
+partition SOLO_SESSION), so a reader can load one session without
+touching the rest of the file. The writer streams: rows are buffered per
+session and written as soon as a row group is full or the next game
+belongs to another session, so the cohort is never held in memory as a
+whole. Add games grouped by session, otherwise a session is split into
+many small row groups.
+
+Besides the RESULT_FIELDS columns every row has a GAME_COLUMN value, the
+index of its game in the footer's game list. The footer also keeps each
+game's parameters and end state, which is what CohortReader needs to
+rebuild FactorySimulator instances.
+"""
+
+import json
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from factory_simulator import RESULT_FIELDS, RESULT_INT_FIELDS, FactorySimulator
+
+
+MAGIC = b'FCOL0001'
+FORMAT_VERSION = 1
+ROW_GROUP_ROWS = 64 * 1024  # Rows (quarters) per row group before it is written
+SOLO_SESSION = ''  # Partition of the games that do not belong to a market session
+GAME_COLUMN = 'game'
+
+COLUMN_DTYPES = {GAME_COLUMN: np.dtype('<i8')}
+COLUMN_DTYPES.update(
+    (name, np.dtype('<i8') if name in RESULT_INT_FIELDS else np.dtype('<f8')) for name in RESULT_FIELDS
+)
+COLUMNS = (GAME_COLUMN,) + RESULT_FIELDS
+
+_TRAILER = struct.Struct('<Q')
+
+
+class _Partition:
+    """Rows of one session waiting for their row group to be written"""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self):
+        self.columns: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        self.rows = 0
+
+
+class CohortWriter:
+    """
+    Streams games into a columnar cohort file
+
+    Usage:
+        with CohortWriter(path) as writer:
+            for game_id, simulator, session_id in games:
+                writer.add_game(game_id, simulator, session_id)
+    """
+
+    def __init__(self, target, row_group_rows: int = ROW_GROUP_ROWS):
+        """
+        Args:
+            target: File path or binary file object opened for writing
+            row_group_rows: Rows buffered per session before a row group is written
+        """
+        if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+            self._file: BinaryIO = open(target, 'wb')
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+        self.row_group_rows = row_group_rows
+        self._offset = 0
+        self._partitions: Dict[str, _Partition] = {}
+        self._row_groups: List[Dict] = []
+        self._games: List[Dict] = []
+        self._pending_games: Dict[str, List[Dict]] = {}  # Games whose row group is not written yet
+        self._session: Optional[str] = None  # Session of the previous game
+        self._closed = False
+        self._write(MAGIC)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+    def add_game(self, game_id: str, simulator: FactorySimulator, session_id: Optional[str] = None):
+        """Append all quarters of one game (a game never spans two row groups)"""
+        if self._closed:
+            raise ValueError("CohortWriter is closed")
+        session_id = session_id or SOLO_SESSION
+        if self._session != session_id and self._session in self._partitions:
+            self._flush(self._session)  # Partition key changed: the previous session is complete
+        self._session = session_id
+        partition = self._partitions.get(session_id)
+        if partition is None:
+            partition = self._partitions[session_id] = _Partition()
+
+        results = simulator.results
+        quarters = len(results)
+        game_index = len(self._games)
+        state = simulator.to_state(include_results=False)  # The quarters live in the columns
+        game = {
+            'game_id': game_id,
+            'session_id': session_id,
+            'quarters': quarters,
+            'start': partition.rows,
+            'state': state
+        }
+        self._games.append(game)
+        self._pending_games.setdefault(session_id, []).append(game)
+
+        if quarters:
+            partition.columns[GAME_COLUMN].append(np.full(quarters, game_index, dtype=COLUMN_DTYPES[GAME_COLUMN]))
+            for name in RESULT_FIELDS:
+                partition.columns[name].append(np.array(results.column(name), dtype=COLUMN_DTYPES[name]))
+            partition.rows += quarters
+        if partition.rows >= self.row_group_rows:
+            self._flush(session_id)
+
+    def _flush(self, session_id: str):
+        """Write the buffered rows of a session as one row group"""
+        partition = self._partitions.pop(session_id)
+        games = self._pending_games.pop(session_id, [])
+        row_group = len(self._row_groups)
+        columns = {}
+        for name in COLUMNS:
+            columns[name] = self._offset
+            parts = partition.columns[name]
+            if parts:
+                self._write(np.concatenate(parts).tobytes())
+        self._row_groups.append({'session_id': session_id, 'rows': partition.rows, 'columns': columns})
+        for game in games:
+            game['row_group'] = row_group
+
+    def close(self):
+        """Write the remaining row groups and the footer"""
+        if self._closed:
+            return
+        for session_id in list(self._partitions):
+            self._flush(session_id)
+        footer = json.dumps({
+            'version': FORMAT_VERSION,
+            'columns': [[name, COLUMN_DTYPES[name].str] for name in COLUMNS],
+            'row_groups': self._row_groups,
+            'games': self._games
+        }, separators=(',', ':')).encode('utf-8')
+        self._write(footer)
+        self._write(_TRAILER.pack(len(footer)))
+        self._write(MAGIC)
+        self._closed = True
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> 'CohortWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def write_cohort(target, games: Iterable[Tuple[str, FactorySimulator, Optional[str]]],
+                 row_group_rows: int = ROW_GROUP_ROWS) -> int:
+    """
+    Write (game_id, simulator, session_id) triples to a cohort file
+
+    Returns:
+        Number of games written
+    """
+    count = 0
+    with CohortWriter(target, row_group_rows) as writer:
+        for game_id, simulator, session_id in games:
+            writer.add_game(game_id, simulator, session_id)
+            count += 1
+    return count
+
+
+class CohortReader:
+    """
+    Reads a cohort file written by CohortWriter
+
+    Only the footer is read up front; column data is read per row group
+    when it is requested.
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source: File path or seekable binary file object
+        """
+        if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+            self._file: BinaryIO = open(source, 'rb')
+            self._owns_file = True
+        else:
+            self._file = source
+            self._owns_file = False
+
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a cohort file")
+        self._file.seek(-(len(MAGIC) + _TRAILER.size), 2)
+        footer_length, = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Cohort file is truncated")
+        self._file.seek(-(len(MAGIC) + _TRAILER.size + footer_length), 2)
+        footer = json.loads(self._file.read(footer_length))
+        if footer['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cohort file version: {footer['version']}")
+
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in footer['columns']}
+        self.row_groups: List[Dict] = footer['row_groups']
+        self.games: List[Dict] = footer['games']
+        self._game_index = {game['game_id']: i for i, game in enumerate(self.games)}
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> 'CohortReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def sessions(self) -> List[str]:
+        """Session ids in the file (SOLO_SESSION for single player games)"""
+        return list(dict.fromkeys(game['session_id'] for game in self.games))
+
+    def game_ids(self, session_id: Optional[str] = None) -> List[str]:
+        """Games of one session, or of all sessions if session_id is None"""
+        return [game['game_id'] for game in self.games
+                if session_id is None or game['session_id'] == session_id]
+
+    def _read(self, row_group: Dict, name: str, start: int = 0, count: Optional[int] = None) -> np.ndarray:
+        dtype = self.dtypes[name]
+        count = row_group['rows'] - start if count is None else count
+        self._file.seek(row_group['columns'][name] + start * dtype.itemsize)
+        return np.frombuffer(self._file.read(count * dtype.itemsize), dtype=dtype)
+
+    def read_columns(self, names: Sequence[str] = COLUMNS, session_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of all rows of one session (or of the whole file)
+
+        The GAME_COLUMN values index into self.games.
+        """
+        groups = [g for g in self.row_groups if session_id is None or g['session_id'] == session_id]
+        columns = {}
+        for name in names:
+            parts = [self._read(group, name) for group in groups]
+            columns[name] = np.concatenate(parts) if parts else np.empty(0, dtype=self.dtypes[name])
+        return columns
+
+    def iter_row_groups(self, names: Sequence[str] = COLUMNS,
+                        session_id: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        """(session_id, columns) per row group, one group in memory at a time"""
+        for group in self.row_groups:
+            if session_id is None or group['session_id'] == session_id:
+                yield group['session_id'], {name: self._read(group, name) for name in names}
+
+    def load_simulator(self, game_id: str) -> FactorySimulator:
+        """Rebuild one game exactly as it was exported"""
+        game = self.games[self._game_index[game_id]]
+        state = dict(game['state'])
+        if game['quarters']:
+            group = self.row_groups[game['row_group']]
+            columns = [self._read(group, name, game['start'], game['quarters']).tolist() for name in RESULT_FIELDS]
+            state['results'] = list(zip(*columns))
+        else:
+            state['results'] = []
+        return FactorySimulator.from_state(state)
+
+    def load_simulators(self, session_id: Optional[str] = None) -> Iterator[Tuple[str, FactorySimulator]]:
+        """(game_id, simulator) for the games of one session or of all sessions"""
+        for game_id in self.game_ids(session_id):
+            yield game_id, self.load_simulator(game_id)
@@ -0,0 +1,324 @@
+"""
+Append-only decision logs and replay for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+simulate_quarter is deterministic given the GameParameters and the
+decisions of every quarter, so a game can be stored as its decisions
+alone and rebuilt by replaying them. Each game has one log file with
+binary records:
+
+- START:   parameters of the game (JSON); starts the log
+- QUARTER: the six decision inputs plus the demand allocated by a
+           shared market (-1 = calculated by the simulator), 45 bytes
+- REWIND:  the quarter the game was rewound to
+
+A quarter costs 45 bytes in the log instead of the 26 result values
+(208 bytes as float64, several times that as JSON) of the game state.
+Records are only appended, so a crash can at worst cut off the last
+record, which the reader ignores; recover() truncates such a torn tail
+so that new records follow the last complete one.
+
+Enable logging in the app with DECISION_LOG_DIR=<directory>; games
+missing from the game store (e.g. after a restart with the in-memory
+store) are then replayed from their logs at startup. Games started
+before logging was enabled have no log: their quarters, rewinds and
+forks are not logged (a log without its START record could not be
+replayed). Market sessions
+themselves are not logged: their team games are recovered as regular
+games.
+"""
+
+import json
+import logging
+import math
+import os
+import struct
+import threading
+from dataclasses import asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from factory_simulator import FactorySimulator, GameParameters
+
+
+# simulate_quarter keyword arguments stored per quarter, in record order
+DECISION_FIELDS = (
+    'sales_price', 'marketing_budget', 'production_lots', 'material_purchase_lots',
+    'material_market_factor', 'overhead_factor'
+)
+
+START = b'S'
+QUARTER = b'Q'
+REWIND = b'R'
+
+_QUARTER = struct.Struct('<ddiiddi')  # DECISION_FIELDS + demand
+_LENGTH = struct.Struct('<I')
+
+LOG_SUFFIX = '.log'
+
+# Lot counts and demand are stored as int32
+MAX_LOTS = 2 ** 31 - 1
+
+logger = logging.getLogger(__name__)
+
+
+def encode_start(params: GameParameters) -> bytes:
+    payload = json.dumps({'params': asdict(params)}, separators=(',', ':')).encode('utf-8')
+    return START + _LENGTH.pack(len(payload)) + payload
+
+
+def encode_quarter(decisions: Dict, demand: Optional[int] = None) -> bytes:
+    """One QUARTER record (decisions as passed to simulate_quarter)"""
+    price = decisions.get('sales_price')
+    for name in ('production_lots', 'material_purchase_lots'):
+        if not -MAX_LOTS <= decisions.get(name, 2) <= MAX_LOTS:
+            raise ValueError(f"{name} out of range: {decisions.get(name)}")
+    return QUARTER + _QUARTER.pack(
+        math.nan if price is None else price,
+        decisions.get('marketing_budget', 0.0),
+        decisions.get('production_lots', 2),
+        decisions.get('material_purchase_lots', 2),
+        decisions.get('material_market_factor', 1.0),
+        decisions.get('overhead_factor', 1.0),
+        -1 if demand is None else demand
+    )
+
+
+def encode_rewind(quarter: int) -> bytes:
+    return REWIND + _LENGTH.pack(quarter)
+
+
+def decode_records(data: bytes) -> Iterator[Tuple[bytes, object]]:
+    """
+    (kind, value) per record: START -> parameter dict, QUARTER ->
+    (decisions, demand), REWIND -> quarter. An incomplete last record
+    (interrupted write) ends the log.
+    """
+    for kind, value, _ in _scan_records(data):
+        yield kind, value
+
+
+def complete_length(data: bytes) -> int:
+    """Bytes up to the end of the last complete record (drops a torn tail)"""
+    length = 0
+    for _, _, length in _scan_records(data):
+        pass
+    return length
+
+
+def _scan_records(data: bytes) -> Iterator[Tuple[bytes, object, int]]:
+    """(kind, value, offset after the record) per complete record"""
+    view = memoryview(data)
+    position, end = 0, len(data)
+    while position < end:
+        kind = bytes(view[position:position + 1])
+        position += 1
+        if kind == QUARTER:
+            if position + _QUARTER.size > end:
+                return
+            values = _QUARTER.unpack_from(view, position)
+            position += _QUARTER.size
+            decisions = dict(zip(DECISION_FIELDS, values))
+            if math.isnan(decisions['sales_price']):
+                decisions['sales_price'] = None
+            yield kind, (decisions, None if values[6] < 0 else values[6]), position
+        elif kind in (START, REWIND):
+            if position + _LENGTH.size > end:
+                return
+            value, = _LENGTH.unpack_from(view, position)
+            position += _LENGTH.size
+            if kind == REWIND:
+                yield kind, value, position
+                continue
+            if position + value > end:
+                return
+            params = json.loads(bytes(view[position:position + value]))['params']
+            position += value
+            yield kind, params, position
+        else:
+            raise ValueError(f"Corrupt decision log: unknown record {kind!r} at byte {position - 1}")
+
+
+def effective_quarters(records) -> Tuple[Dict, List[Tuple[Dict, Optional[int]]]]:
+    """Parameters and the (decisions, demand) of the quarters still in the game after rewinds"""
+    params, quarters = None, []
+    for kind, value in records:
+        if kind == START:
+            params, quarters = value, []
+        elif kind == QUARTER:
+            quarters.append(value)
+        else:
+            del quarters[value:]
+    if params is None:
+        raise ValueError("Decision log has no START record")
+    return params, quarters
+
+
+def replay(records) -> FactorySimulator:
+    """Rebuild a game from its decoded records"""
+    params, quarters = effective_quarters(records)
+    simulator = FactorySimulator(GameParameters(**params))
+    for decisions, demand in quarters:
+        simulator.simulate_quarter(demand=demand, **decisions)
+    return simulator
+
+
+class DecisionLog:
+    """One append-only log file per game in a directory"""
+
+    def __init__(self, directory: str, fsync: bool = False):
+        """
+        Args:
+            directory: Directory of the log files (created if missing)
+            fsync: Sync every record to disk (survives power loss, not
+                   only process crashes, at the cost of a disk flush)
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, game_id: str) -> str:
+        return os.path.join(self.directory, quote(game_id, safe='') + LOG_SUFFIX)
+
+    def _write(self, game_id: str, data: bytes, mode: str = 'ab'):
+        with self._lock:
+            path = self._path(game_id)
+            if mode == 'ab' and not os.path.exists(path):
+                return  # Game started before logging was enabled
+            with open(path, mode) as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def start(self, game_id: str, params: GameParameters):
+        """Begin a new log for the game (replaces an earlier game with this id)"""
+        self._write(game_id, encode_start(params), 'wb')
+
+    def quarter(self, game_id: str, decisions: Dict, demand: Optional[int] = None):
+        self._write(game_id, encode_quarter(decisions, demand))
+
+    def rewind(self, game_id: str, quarter: int):
+        self._write(game_id, encode_rewind(quarter))
+
+    def fork(self, game_id: str, new_game_id: str, quarter: int):
+        """Log of a branch: the parent's first `quarter` quarters (nothing if the parent has no log)"""
+        try:
+            records = self.records(game_id)
+        except FileNotFoundError:
+            logger.warning("Decision log %s: no log, branch %s is not logged either", game_id, new_game_id)
+            return
+        params, quarters = effective_quarters(records)
+        self._write(new_game_id, self._encode_game(params, quarters[:quarter]), 'wb')
+
+    def compact(self, game_id: str):
+        """Rewrite a log without the rewound quarters"""
+        params, quarters = effective_quarters(self.records(game_id))
+        data = self._encode_game(params, quarters)
+        path = self._path(game_id)
+        with self._lock:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _encode_game(params: Dict, quarters: List[Tuple[Dict, Optional[int]]]) -> bytes:
+        return b''.join(
+            [encode_start(GameParameters(**params))]
+            + [encode_quarter(decisions, demand) for decisions, demand in quarters]
+        )
+
+    def delete(self, game_id: str):
+        with self._lock:
+            try:
+                os.remove(self._path(game_id))
+            except FileNotFoundError:
+                pass
+
+    def records(self, game_id: str) -> List[Tuple[bytes, object]]:
+        with open(self._path(game_id), 'rb') as f:
+            return list(decode_records(f.read()))
+
+    def replay(self, game_id: str) -> FactorySimulator:
+        return replay(self.records(game_id))
+
+    def game_ids(self) -> Iterator[str]:
+        for name in os.listdir(self.directory):
+            if name.endswith(LOG_SUFFIX):
+                yield unquote(name[:-len(LOG_SUFFIX)])
+
+    def size_bytes(self, game_id: str) -> int:
+        return os.path.getsize(self._path(game_id))
+
+    def repair(self, game_id: str) -> bytes:
+        """
+        Cut a torn last record off the game's log file
+
+        Returns:
+            The remaining (complete) log contents
+        """
+        with self._lock:
+            with open(self._path(game_id), 'r+b') as f:
+                data = f.read()
+                length = complete_length(data)
+                if length < len(data):
+                    logger.warning("Decision log %s: dropping %d bytes of a torn record",
+                                   game_id, len(data) - length)
+                    f.truncate(length)
+                    data = data[:length]
+        return data
+
+    def recover(self, store) -> int:
+        """
+        Repair every log and replay the logged games the store does not hold
+
+        A log that cannot be read is reported and skipped, so that one
+        corrupt file does not keep the app from starting.
+
+        Returns:
+            Number of games recovered
+        """
+        recovered = 0
+        for game_id in self.game_ids():
+            try:
+                data = self.repair(game_id)
+                if game_id not in store:
+                    store[game_id] = replay(decode_records(data))
+                    recovered += 1
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error("Decision log %s cannot be replayed, skipped: %s", game_id, e)
+        return recovered
+
+
+class NullDecisionLog:
+    """Stand-in when logging is disabled; every call is a no-op"""
+
+    def start(self, game_id, params):
+        pass
+
+    def quarter(self, game_id, decisions, demand=None):
+        pass
+
+    def rewind(self, game_id, quarter):
+        pass
+
+    def fork(self, game_id, new_game_id, quarter):
+        pass
+
+    def delete(self, game_id):
+        pass
+
+    def recover(self, store) -> int:
+        return 0
+
+
+def create_decision_log(directory: str = None):
+    """DecisionLog in DECISION_LOG_DIR, or a NullDecisionLog if it is not set"""
+    directory = directory or os.environ.get('DECISION_LOG_DIR')
+    if not directory:
+        return NullDecisionLog()
+    fsync = os.environ.get('DECISION_LOG_FSYNC', '0').lower() in ('1', 'true', 'yes')
+    return DecisionLog(directory, fsync=fsync)
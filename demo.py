@@ -82,7 +82,7 @@ def run_demo_game():
         print(f"\nERGEBNISSE:")
         print(f"  Nachfrage: {result.sales_volume} Lose")
         print(f"  Umsatz: {result.sales_revenue:.2f} M")
-        print(f"  Kosten: {result.total_cost:.2f} M")
+        print(f"  Kosten: {result.sales_revenue - result.net_profit:.2f} M")
         print(f"  Gewinn: {result.net_profit:.2f} M")
         print(f"  Kasse: {result.cash_ending:.2f} M")
     
@@ -94,15 +94,15 @@ def run_demo_game():
     summary = simulator.get_summary()
     print(f"\nGESAMTERGEBNIS:")
     print(f"  Gesamtumsatz: {summary['total_revenue']:.2f} M")
-    print(f"  Gesamtkosten: {summary['total_cost']:.2f} M")
-    print(f"  Gesamtgewinn: {summary['total_profit']:.2f} M")
+    print(f"  Gesamtkosten: {summary['total_revenue'] - summary['total_net_profit']:.2f} M")
+    print(f"  Gesamtgewinn: {summary['total_net_profit']:.2f} M")
     print(f"  Ø Gewinn/Quartal: {summary['average_profit_per_quarter']:.2f} M")
     print(f"  Umsatzrendite: {summary['return_on_sales']:.2f}%")
     print(f"  Endbestand Kasse: {summary['final_cash']:.2f} M")
     
     # Bewertung
     print(f"\nBEWERTUNG:")
-    profit = summary['total_profit']
+    profit = summary['total_net_profit']
     ros = summary['return_on_sales']
     
     if profit > 30 and ros > 20:
@@ -133,7 +133,7 @@ def run_demo_game():
     print(f"{'Quartal':<10} {'Umsatz':<12} {'Kosten':<12} {'Gewinn':<12} {'Kasse':<12}")
     print(f"{'-'*70}")
     for result in simulator.results:
-        print(f"Q{result.quarter:<9} {result.sales_revenue:<12.2f} {result.total_cost:<12.2f} "
+        print(f"Q{result.quarter:<9} {result.sales_revenue:<12.2f} {result.sales_revenue - result.net_profit:<12.2f} "
               f"{result.net_profit:<12.2f} {result.cash_ending:<12.2f}")
     
     print("\n" + "="*70 + "\n")
@@ -195,23 +195,44 @@ def compare_all_scenarios():
     print(f"{'='*100}")
     
     for scenario, summary in results_comparison.items():
-        print(f"{scenario:<25} {summary['total_revenue']:<15.2f} {summary['total_cost']:<15.2f} "
-              f"{summary['total_profit']:<15.2f} {summary['return_on_sales']:<12.2f} "
+        print(f"{scenario:<25} {summary['total_revenue']:<15.2f} "
+              f"{summary['total_revenue'] - summary['total_net_profit']:<15.2f} "
+              f"{summary['total_net_profit']:<15.2f} {summary['return_on_sales']:<12.2f} "
               f"{summary['final_cash']:<12.2f}")
     
     # Gewinner ermitteln
-    best_scenario = max(results_comparison.items(), key=lambda x: x[1]['total_profit'])
+    best_scenario = max(results_comparison.items(), key=lambda x: x[1]['total_net_profit'])
     print(f"\n{'='*100}")
     print(f"BESTES SZENARIO: {best_scenario[0]}")
-    print(f"Gesamtgewinn: {best_scenario[1]['total_profit']:.2f} M")
+    print(f"Gesamtgewinn: {best_scenario[1]['total_net_profit']:.2f} M")
     print(f"{'='*100}\n")
 
 
+def show_best_strategy(quarters: int = 4):
+    """Zeige die bestmögliche Strategie (Benchmark für Lehrende)"""
+    from strategy_optimizer import optimize_strategy
+    
+    print("\n" + "="*70)
+    print(f"BESTMÖGLICHE STRATEGIE ({quarters} Quartale)")
+    print("="*70 + "\n")
+    
+    for objective, label in (("total_net_profit", "Gewinn nach Steuern"), ("final_cash", "Endbestand Kasse")):
+        result = optimize_strategy(quarters=quarters, objective=objective)
+        print(f"Ziel: {label} → {result.value:.2f} M ({result.evaluations} Bewertungen)")
+        print(f"{'Quartal':<10} {'Preis':<10} {'Marketing':<12} {'Produktion':<12} {'Einkauf':<10}")
+        for quarter, decision in enumerate(result.plan, 1):
+            print(f"Q{quarter:<9} {decision['sales_price']:<10.2f} {decision['marketing_budget']:<12.2f} "
+                  f"{decision['production_lots']:<12} {decision['material_purchase_lots']:<10}")
+        print()
+
+
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1 and sys.argv[1] == "--compare":
         compare_all_scenarios()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--optimize":
+        show_best_strategy(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
     else:
         run_demo_game()
         
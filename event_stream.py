@@ -0,0 +1,165 @@
+"""
+Server-Sent Events for games and market sessions
+Planspiel BWL für BDE - WiSe 2025/26
+
+The app publishes small deltas (the new quarter's result fields plus the
+updated running totals) to a channel per game ("game:<id>") and per
+market session ("session:<id>"). Every event is serialized once and
+fanned out to the subscribers' queues; each open stream only waits on
+its queue, so idle connections cost no CPU.
+
+Every open stream holds one request thread, so run the app with enough
+threads that the streams do not starve the other requests, e.g.
+
+    gunicorn --worker-class gthread --threads 32 app:app
+
+or from asgi.py with a larger ASGI_THREADS. Monkey-patching workers
+(gevent, eventlet) are not used: they do not mix with the process pool
+of offload.py.
+
+The broker lives in the worker process: with several workers use
+sticky sessions (or a single worker) for the event streams.
+"""
+
+import json
+import queue
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+
+KEEPALIVE_SECONDS = 15.0  # Comment line sent on idle streams (keeps proxies from closing them)
+REPLAY_EVENTS = 100  # Events kept per channel for reconnects with Last-Event-ID
+QUEUE_SIZE = 256  # Events buffered per subscriber before it is asked to resync
+MAX_CHANNELS = 10000  # Channels kept; the least recently used idle ones are forgotten
+RETRY_MS = 3000  # Reconnect delay suggested to EventSource clients
+
+
+def format_event(event_id: int, event: str, data: Dict) -> str:
+    """One SSE message (compact JSON payload)"""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+# Tells a client that it missed events and must reload the full state
+RESYNC_MESSAGE = "event: resync\ndata: {}\n\n"
+
+
+def _close(subscriber: queue.Queue):
+    """Replace a subscriber's pending messages by the end-of-stream marker"""
+    with subscriber.mutex:
+        subscriber.queue.clear()
+        subscriber.queue.append(None)
+        subscriber.not_empty.notify()
+
+
+class _Channel:
+    __slots__ = ('last_id', 'recent', 'subscribers')
+
+    def __init__(self, replay: int):
+        self.last_id = 0
+        self.recent: Deque[Tuple[int, str]] = deque(maxlen=replay)
+        self.subscribers: Set[queue.Queue] = set()
+
+
+class EventBroker:
+    """In-process publish/subscribe hub for SSE channels"""
+
+    def __init__(self, replay: int = REPLAY_EVENTS, queue_size: int = QUEUE_SIZE,
+                 keepalive: float = KEEPALIVE_SECONDS, max_channels: int = MAX_CHANNELS):
+        self.replay = replay
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.max_channels = max_channels
+        self._channels: 'OrderedDict[str, _Channel]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _channel(self, name: str) -> _Channel:
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = _Channel(self.replay)
+            if len(self._channels) > self.max_channels:
+                # Oldest channel without open streams
+                idle = next((key for key, c in self._channels.items() if not c.subscribers), None)
+                if idle is not None and idle != name:
+                    del self._channels[idle]
+        self._channels.move_to_end(name)
+        return channel
+
+    def publish(self, channel_name: str, event: str, data: Dict) -> int:
+        """Send an event to all subscribers of a channel; returns its event id"""
+        with self._lock:
+            channel = self._channel(channel_name)
+            channel.last_id += 1
+            message = format_event(channel.last_id, event, data)
+            channel.recent.append((channel.last_id, message))
+            for subscriber in list(channel.subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Too slow: drop the subscriber, its stream ends with a resync
+                    channel.subscribers.discard(subscriber)
+                    _close(subscriber)
+            return channel.last_id
+
+    def subscribe(self, channel_name: str, last_event_id: Optional[int] = None) -> Tuple[queue.Queue, List[str]]:
+        """
+        Register a subscriber
+
+        Returns:
+            (queue of future messages, missed messages to send first)
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            channel = self._channel(channel_name)
+            backlog: List[str] = []
+            if last_event_id is not None and last_event_id > channel.last_id:
+                backlog = [RESYNC_MESSAGE]  # Ids from before a restart
+            elif last_event_id is not None and last_event_id < channel.last_id:
+                missed = [message for event_id, message in channel.recent if event_id > last_event_id]
+                oldest = channel.recent[0][0] if channel.recent else channel.last_id + 1
+                backlog = missed if last_event_id >= oldest - 1 else [RESYNC_MESSAGE]
+            channel.subscribers.add(subscriber)
+        return subscriber, backlog
+
+    def unsubscribe(self, channel_name: str, subscriber: queue.Queue):
+        with self._lock:
+            channel = self._channels.get(channel_name)
+            if channel is not None:
+                channel.subscribers.discard(subscriber)
+                if not channel.subscribers and not channel.recent:
+                    del self._channels[channel_name]
+
+    def stream(self, channel_name: str, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """SSE response body: missed events, then live events and keepalives"""
+        subscriber, backlog = self.subscribe(channel_name, last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            yield from backlog
+            while True:
+                try:
+                    message = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield RESYNC_MESSAGE
+                    return
+                yield message
+        finally:
+            self.unsubscribe(channel_name, subscriber)
+
+    def subscriber_count(self, channel_name: str = None) -> int:
+        with self._lock:
+            if channel_name is not None:
+                channel = self._channels.get(channel_name)
+                return len(channel.subscribers) if channel else 0
+            return sum(len(channel.subscribers) for channel in self._channels.values())
+
+    def drop_channel(self, channel_name: str):
+        """Forget a channel's replay buffer (e.g. when its game is deleted)"""
+        with self._lock:
+            channel = self._channels.pop(channel_name, None)
+            if channel is not None:
+                for subscriber in channel.subscribers:
+                    _close(subscriber)
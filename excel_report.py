@@ -0,0 +1,817 @@
+"""
+Excel report generation for Factory Business Simulation
+Planspiel BWL für BDE - WiSe 2025/26
+
+Two ways to build the same four-sheet report:
+- build_workbook: classic openpyxl Workbook, styled cell by cell
+- write_report_streaming: write-only worksheets with precomputed named
+  styles, written row by row straight into a binary buffer
+- write_report_template: the streaming layout built once per number of
+  quarters and cached; a report only patches its numbers into the
+  skeleton's sheet XML
+
+The "generiert am" line shows when a workbook was built. The app caches
+the in-memory reports by game state, so a repeated download of an
+unchanged game shows the time of the first build.
+"""
+
+import io
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from copy import copy
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.compat.strings import safe_string
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.named_styles import NamedStyleList
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.utils import get_column_letter
+
+from factory_simulator import QUARTERS_PER_YEAR, FactorySimulator
+from metrics import metrics
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+# (label, attribute, is_expense, is_bold)
+GUV_ROWS = [
+    ("Umsatzerlöse", "sales_revenue", False, False),
+    ("Herstellungskosten", "herstellungskosten", True, False),
+    ("= Bruttoergebnis", "gross_profit", False, True),
+    ("Gemeinkosten", "overhead_cost", True, False),
+    ("Marketing", "marketing_cost", True, False),
+    ("Abschreibungen", "depreciation", True, False),
+    ("= EBIT", "ebit", False, True),
+    ("Zinsen", "interest", True, False),
+    ("= Gewinn vor Steuern", "profit_before_tax", False, True),
+    ("Steuern", "tax", True, False),
+    ("= Gewinn nach Steuern", "net_profit", False, True)
+]
+
+# (label, attribute, number format); an empty attribute marks a section header
+PROD_ROWS = [
+    ("MENGENSTRÖME", "", ""),
+    ("Einkauf (Lose)", "material_purchase_lots", "0"),
+    ("Produktion (Lose)", "production_lots", "0"),
+    ("Absatz (Lose)", "sales_volume", "0"),
+    ("", "", ""),
+    ("LAGERBESTÄNDE (Ende)", "", ""),
+    ("Rohmaterial", "raw_material_inventory", "0"),
+    ("Halbfertigware (WIP)", "work_in_progress", "0"),
+    ("Fertigware", "finished_goods_inventory", "0"),
+    ("", "", ""),
+    ("MARKT-DATEN", "", ""),
+    ("Verkaufspreis", "sales_price", "0.00"),
+    ("Marketing-Budget", "marketing_cost", "0.00")
+]
+
+
+# (header, annual_rollups key) of the year overview shown for multi-year games
+YEAR_COLUMNS = [
+    ("Umsatz", "revenue"),
+    ("EBIT", "ebit"),
+    ("Abschreibungen", "depreciation"),
+    ("Zinsen", "interest"),
+    ("Steuern", "tax"),
+    ("Gewinn n. St.", "net_profit"),
+    ("Kasse Jahresende", "cash_ending")
+]
+
+
+def report_columns(simulator: FactorySimulator) -> int:
+    """Quarter columns of the report: the game's horizon, or more if played beyond it"""
+    return max(simulator.params.horizon, len(simulator.results))
+
+
+def year_rows(simulator: FactorySimulator) -> List[Tuple[str, List[float]]]:
+    """(label, values in YEAR_COLUMNS order) per business year; empty for one-year games"""
+    if report_columns(simulator) <= QUARTERS_PER_YEAR:
+        return []
+    rows = []
+    for year in simulator.annual_rollups():
+        label = f"Jahr {year['year']}"
+        if year['quarters'] < QUARTERS_PER_YEAR:
+            label += f" ({year['quarters']}/{QUARTERS_PER_YEAR} Quartale)"
+        rows.append((label, [year[key] for _, key in YEAR_COLUMNS]))
+    return rows
+
+
+def kpi_title(columns: int) -> str:
+    return "Finanz-Kennzahlen (Gesamtjahr)" if columns <= QUARTERS_PER_YEAR else "Finanz-Kennzahlen (Gesamtzeitraum)"
+
+
+def build_workbook(simulator: FactorySimulator) -> Workbook:
+    """Build the multi-sheet report as a regular (in-memory) workbook"""
+    results = list(simulator.results)  # One QuarterResult view per quarter
+    summary = simulator.get_summary()
+    params = simulator.params
+    columns = report_columns(simulator)  # Q1 ... Q<columns>
+    years = year_rows(simulator)
+    quarter_headers = [f'Q{i}' for i in range(1, columns + 1)]
+
+    # Create workbook
+    wb = Workbook()
+    
+    # Styles
+    style_header = PatternFill(start_color="667eea", end_color="667eea", fill_type="solid")
+    style_subheader = PatternFill(start_color="e2e8f0", end_color="e2e8f0", fill_type="solid")
+    style_success = PatternFill(start_color="c6f6d5", end_color="c6f6d5", fill_type="solid")
+    style_danger = PatternFill(start_color="fed7d7", end_color="fed7d7", fill_type="solid")
+    
+    font_title = Font(bold=True, size=16, color="2d3748")
+    font_header = Font(bold=True, color="FFFFFF")
+    font_bold = Font(bold=True)
+    
+    border_thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    
+    def setup_header(ws, title, subtitle, last_column=6):
+        # Title rows span the table below, at least A:F
+        last = get_column_letter(max(6, last_column))
+        ws.merge_cells(f'A1:{last}1')
+        ws['A1'] = title
+        ws['A1'].font = font_title
+        ws['A1'].alignment = Alignment(horizontal='center')
+        
+        ws.merge_cells(f'A2:{last}2')
+        ws['A2'] = subtitle
+        ws['A2'].font = Font(italic=True, color="718096")
+        ws['A2'].alignment = Alignment(horizontal='center')
+        
+        ws.merge_cells(f'A3:{last}3')
+        ws['A3'] = f"TechGear Solutions GmbH - Report generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        ws['A3'].alignment = Alignment(horizontal='center')
+
+    # ==========================================
+    # SHEET 1: Management Summary
+    # ==========================================
+    ws_sum = wb.active
+    ws_sum.title = "Management Summary"
+    setup_header(ws_sum, "📊 Management Summary", "Wichtigste Kennzahlen auf einen Blick",
+                 1 + len(YEAR_COLUMNS) if years else 6)
+    
+    # KPIs Table
+    ws_sum['A5'] = kpi_title(columns)
+    ws_sum['A5'].font = Font(bold=True, size=12)
+    
+    kpis = [
+        ("Gesamtumsatz", summary['total_revenue'], "M"),
+        ("Reingewinn (Netto)", summary['total_net_profit'], "M"),
+        ("Umsatzrendite (ROS)", summary['return_on_sales'], "%"),
+        ("Endbestand Kasse", summary['final_cash'], "M"),
+        ("Gesamte Steuern", summary['total_tax'], "M")
+    ]
+    
+    row = 6
+    for label, value, unit in kpis:
+        ws_sum[f'A{row}'] = label
+        ws_sum[f'B{row}'] = value
+        ws_sum[f'B{row}'].number_format = f'0.00 "{unit}"'
+        ws_sum[f'B{row}'].font = font_bold
+        
+        # Color coding for Profit and Cash
+        if "Netto" in label or "Kasse" in label:
+             ws_sum[f'B{row}'].fill = style_success if value >= 0 else style_danger
+             
+        row += 1
+
+    # Year overview of multi-year games
+    if years:
+        row += 1
+        ws_sum[f'A{row}'] = "Jahresübersicht"
+        ws_sum[f'A{row}'].font = Font(bold=True, size=12)
+        row += 1
+        for col, h in enumerate(['Geschäftsjahr'] + [h for h, _ in YEAR_COLUMNS], 1):
+            cell = ws_sum.cell(row=row, column=col, value=h)
+            cell.fill = style_header
+            cell.font = font_header
+            cell.alignment = Alignment(horizontal='center')
+        for label, values in years:
+            row += 1
+            ws_sum.cell(row=row, column=1, value=label)
+            for col, value in enumerate(values, 2):
+                ws_sum.cell(row=row, column=col, value=value).number_format = '0.00 "M"'
+
+    ws_sum.column_dimensions['A'].width = 25
+    for i in range(2, (len(YEAR_COLUMNS) + 2) if years else 3):
+        ws_sum.column_dimensions[get_column_letter(i)].width = 15
+
+    # ==========================================
+    # SHEET 2: GuV Detail
+    # ==========================================
+    ws_guv = wb.create_sheet("GuV Detail")
+    setup_header(ws_guv, "📉 Gewinn- und Verlustrechnung", "Detaillierte Aufstellung nach Quartalen", columns + 2)
+    
+    headers = ['Position'] + quarter_headers + ['GESAMT']
+    for col, h in enumerate(headers, 1):
+        cell = ws_guv.cell(row=5, column=col, value=h)
+        cell.fill = style_header
+        cell.font = font_header
+        cell.alignment = Alignment(horizontal='center')
+    
+    current_row = 6
+    for label, attr, is_expense, is_bold in GUV_ROWS:
+        ws_guv.cell(row=current_row, column=1, value=label).font = font_bold if is_bold else None
+        
+        total_val = 0
+        for i, r in enumerate(results):
+            val = getattr(r, attr)
+            total_val += val
+            
+            # Flip sign for expenses for visual representation? 
+            # Standard GuV usually lists positive numbers but subtracts them.
+            # Let's keep them positive but maybe red text?
+            # Or use negative numbers as in the app.py logic. 
+            # The app.py logic used negative numbers for visual clarity.
+            
+            display_val = -val if is_expense else val
+            
+            c = ws_guv.cell(row=current_row, column=i+2, value=display_val)
+            c.number_format = '0.00 "M"'
+            if is_bold: c.font = font_bold
+            if is_expense: c.font = Font(color="C00000")
+            if "Brutto" in label or "EBIT" in label or "Gewinn" in label:
+                c.fill = style_subheader
+        
+        # Total Column
+        total_display = -total_val if is_expense else total_val
+        c_total = ws_guv.cell(row=current_row, column=columns + 2, value=total_display)
+        c_total.number_format = '0.00 "M"'
+        c_total.font = font_bold
+        c_total.border = Border(left=Side(style='double'))
+        
+        current_row += 1
+
+    ws_guv.column_dimensions['A'].width = 30
+    for i in range(2, columns + 3): ws_guv.column_dimensions[get_column_letter(i)].width = 15
+
+    # ==========================================
+    # SHEET 3: Cashflow & Bilanz
+    # ==========================================
+    ws_bal = wb.create_sheet("Cashflow & Bilanz")
+    setup_header(ws_bal, "💰 Cashflow & Vermögenswerte", "Liquiditätsrechnung und Bestandsbewertung", columns + 1)
+    
+    # Cashflow Headers
+    ws_bal['A5'] = "CASHFLOW RECHNUNG"
+    ws_bal['A5'].font = Font(bold=True, size=12, color="667eea")
+    
+    headers = ['Position'] + quarter_headers
+    for col, h in enumerate(headers, 1):
+        ws_bal.cell(row=6, column=col, value=h).font = font_bold
+        ws_bal.cell(row=6, column=col).border = Border(bottom=Side(style='medium'))
+
+    # Cashflow Data Construction
+    # Recalculate explicit flows for clarity
+    cf_rows = [
+        "Anfangsbestand Kasse",
+        "+ Einzahlungen (Forderungen)",
+        "- Ausz. Operativ (Mat/Prod/Gemein/Mark)",
+        "- Ausz. Finanzen (Zinsen/Steuern)",
+        "= Endbestand Kasse"
+    ]
+    
+    r_idx = 7
+    for label in cf_rows:
+        ws_bal.cell(row=r_idx, column=1, value=label)
+        r_idx += 1
+        
+    for i, res in enumerate(results):
+        col = i + 2
+        # Start
+        ws_bal.cell(row=7, column=col, value=res.cash_beginning).number_format = '0.00'
+        
+        # In: the receivables of the previous quarter are collected,
+        # so inflow = (cash_ending - cash_beginning) + cash costs
+        cash_costs_op = (res.material_cost + res.production_cost + res.assembly_cost + 
+                        res.overhead_cost + res.marketing_cost)
+        cash_costs_fin = res.interest + res.tax
+        total_out = cash_costs_op + cash_costs_fin
+        
+        inflow = (res.cash_ending - res.cash_beginning) + total_out
+        
+        ws_bal.cell(row=8, column=col, value=inflow).number_format = '0.00'
+        ws_bal.cell(row=9, column=col, value=-cash_costs_op).number_format = '0.00'
+        ws_bal.cell(row=10, column=col, value=-cash_costs_fin).number_format = '0.00'
+        
+        c_end = ws_bal.cell(row=11, column=col, value=res.cash_ending)
+        c_end.number_format = '0.00'
+        c_end.font = font_bold
+        c_end.fill = style_subheader
+
+    # Asset Valuation (Inventory)
+    r_start = 14
+    ws_bal[f'A{r_start}'] = "VERMÖGENSWERTE (Indikativ)"
+    ws_bal[f'A{r_start}'].font = Font(bold=True, size=12, color="667eea")
+    
+    # Valuation Logic
+    # Raw = Base Price (3.0)
+    # WIP = Mat + Prod (3.0 + 3.0 = 6.0)
+    # Finished = Mat + Prod + Assembly (3.0 + 3.0 + 1.0 = 7.0)
+    val_raw = params.base_material_price
+    val_wip = params.base_material_price + params.base_production_cost
+    val_fin = params.base_material_price + params.base_production_cost + params.base_assembly_cost
+    
+    asset_rows = ["Liquide Mittel", "Forderungen (aus Verkauf)", "Vorräte (Bewertet)", "SUMME UMLAUFVERMÖGEN"]
+    for i, l in enumerate(asset_rows):
+        ws_bal.cell(row=r_start+1+i, column=1, value=l)
+
+    for i, res in enumerate(results):
+        col = i + 2
+        # Cash
+        ws_bal.cell(row=r_start+1, column=col, value=res.cash_ending).number_format = '0.00'
+        # Receivables
+        ws_bal.cell(row=r_start+2, column=col, value=res.accounts_receivable).number_format = '0.00'
+        
+        # Inventory Value
+        inv_val = (res.raw_material_inventory * val_raw) + \
+                  (res.work_in_progress * val_wip) + \
+                  (res.finished_goods_inventory * val_fin)
+        ws_bal.cell(row=r_start+3, column=col, value=inv_val).number_format = '0.00'
+        
+        # Sum
+        total_assets = res.cash_ending + res.accounts_receivable + inv_val
+        c_sum = ws_bal.cell(row=r_start+4, column=col, value=total_assets)
+        c_sum.number_format = '0.00'
+        c_sum.font = font_bold
+        c_sum.border = Border(top=Side(style='thin'), bottom=Side(style='double'))
+
+    ws_bal.column_dimensions['A'].width = 35
+    
+    # ==========================================
+    # SHEET 4: Produktion & Lager
+    # ==========================================
+    ws_prod = wb.create_sheet("Produktion & Lager")
+    setup_header(ws_prod, "🏭 Produktion & Logistik", "Mengenströme und Lagerbestände", columns + 1)
+    
+    headers = ['Kennzahl'] + quarter_headers
+    for col, h in enumerate(headers, 1):
+        ws_prod.cell(row=5, column=col, value=h).font = font_bold
+        ws_prod.cell(row=5, column=col).fill = style_subheader
+
+    curr_row = 6
+    for label, attr, fmt in PROD_ROWS:
+        cell = ws_prod.cell(row=curr_row, column=1, value=label)
+        if attr == "": # Section Header
+            cell.font = Font(bold=True, color="667eea")
+        else:
+            for i, res in enumerate(results):
+                val = getattr(res, attr)
+                c = ws_prod.cell(row=curr_row, column=i+2, value=val)
+                c.number_format = fmt
+                c.alignment = Alignment(horizontal='center')
+        curr_row += 1
+
+    ws_prod.column_dimensions['A'].width = 30
+
+    return wb
+
+
+# ==========================================
+# Streaming (write-only) report
+# ==========================================
+
+# Named styles registered once per workbook; cells only reference them by name
+_NAMED_STYLES = {
+    'TG Title': dict(font=Font(bold=True, size=16, color="2d3748"), alignment=Alignment(horizontal='center')),
+    'TG Subtitle': dict(font=Font(italic=True, color="718096"), alignment=Alignment(horizontal='center')),
+    'TG Centered': dict(alignment=Alignment(horizontal='center')),
+    'TG Section': dict(font=Font(bold=True, size=12)),
+    'TG Section Blue': dict(font=Font(bold=True, size=12, color="667eea")),
+    'TG Bold': dict(font=Font(bold=True)),
+    'TG KPI M': dict(font=Font(bold=True), number_format='0.00 "M"'),
+    'TG KPI %': dict(font=Font(bold=True), number_format='0.00 "%"'),
+    'TG KPI M Good': dict(font=Font(bold=True), number_format='0.00 "M"',
+                          fill=PatternFill(start_color="c6f6d5", end_color="c6f6d5", fill_type="solid")),
+    'TG KPI M Bad': dict(font=Font(bold=True), number_format='0.00 "M"',
+                         fill=PatternFill(start_color="fed7d7", end_color="fed7d7", fill_type="solid")),
+    'TG Table Header': dict(font=Font(bold=True, color="FFFFFF"), alignment=Alignment(horizontal='center'),
+                            fill=PatternFill(start_color="667eea", end_color="667eea", fill_type="solid")),
+    'TG GuV Value': dict(number_format='0.00 "M"'),
+    'TG GuV Expense': dict(font=Font(color="C00000"), number_format='0.00 "M"'),
+    'TG GuV Result': dict(font=Font(bold=True), number_format='0.00 "M"',
+                          fill=PatternFill(start_color="e2e8f0", end_color="e2e8f0", fill_type="solid")),
+    'TG GuV Total': dict(font=Font(bold=True), number_format='0.00 "M"', border=Border(left=Side(style='double'))),
+    'TG CF Header': dict(font=Font(bold=True), border=Border(bottom=Side(style='medium'))),
+    'TG Number': dict(number_format='0.00'),
+    'TG Number Total': dict(font=Font(bold=True), number_format='0.00',
+                            fill=PatternFill(start_color="e2e8f0", end_color="e2e8f0", fill_type="solid")),
+    'TG Number Sum': dict(font=Font(bold=True), number_format='0.00',
+                          border=Border(top=Side(style='thin'), bottom=Side(style='double'))),
+    'TG Prod Header': dict(font=Font(bold=True),
+                           fill=PatternFill(start_color="e2e8f0", end_color="e2e8f0", fill_type="solid")),
+    'TG Prod Section': dict(font=Font(bold=True, color="667eea")),
+    'TG Prod Integer': dict(number_format='0', alignment=Alignment(horizontal='center')),
+    'TG Prod Decimal': dict(number_format='0.00', alignment=Alignment(horizontal='center')),
+}
+
+# Named style per PROD_ROWS number format
+_PROD_STYLES = {"0": 'TG Prod Integer', "0.00": 'TG Prod Decimal'}
+
+
+def _register_named_styles(wb: Workbook):
+    """Add the report's named styles to a new workbook"""
+    for name, spec in _NAMED_STYLES.items():
+        spec = dict(spec)
+        spec.setdefault('font', DEFAULT_FONT)  # Same as unstyled cells in build_workbook
+        wb.add_named_style(NamedStyle(name=name, **spec))
+
+
+# Workbook attributes holding the shared style tables
+_STYLE_TABLES = ('_fonts', '_alignments', '_borders', '_fills', '_number_formats', '_protections', '_cell_styles')
+
+
+@lru_cache(maxsize=None)
+def _style_template():
+    """
+    Register the named styles once per process
+
+    Returns the resulting style tables of a prototype workbook and the
+    StyleArray of every named style, so that new workbooks only copy
+    the tables and cells get their style without any name lookup.
+    """
+    prototype = Workbook(write_only=True)
+    _register_named_styles(prototype)
+    tables = {attr: list(getattr(prototype, attr)) for attr in _STYLE_TABLES}
+    named_styles = list(prototype._named_styles)
+    arrays = {style.name: style.as_tuple() for style in named_styles}
+    return tables, named_styles, arrays
+
+
+def _new_styled_workbook():
+    """Write-only workbook with the report's style tables preinstalled"""
+    tables, named_styles, arrays = _style_template()
+    wb = Workbook(write_only=True)
+    for attr, values in tables.items():
+        setattr(wb, attr, IndexedList(values))
+    wb._named_styles = NamedStyleList(named_styles)
+    return wb, arrays
+
+
+def write_report_streaming(simulator: FactorySimulator, fileobj=None):
+    """
+    Write the report with write-only worksheets
+
+    Produces the same sheets, values and formatting as build_workbook,
+    but rows are streamed to the file as they are generated and every
+    cell only references a precomputed named style.
+
+    Args:
+        simulator: Game to report on
+        fileobj: Binary file object to write to (defaults to a new BytesIO)
+
+    Returns:
+        The file object, rewound to the start
+    """
+    with metrics.stage('xlsx_build'):
+        wb = _build_streaming_workbook(simulator)
+
+    if fileobj is None:
+        fileobj = io.BytesIO()
+    with metrics.stage('xlsx_save'):
+        wb.save(fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+def _report_content(simulator: FactorySimulator) -> Dict:
+    """
+    Everything in the streaming report that depends on the game
+
+    Returns the timestamp text and, per sheet, the rows of numbers with
+    their named style; the layout around them only depends on the
+    number of quarters played and the quarter columns shown.
+    """
+    results = list(simulator.results)  # One QuarterResult view per quarter
+    summary = simulator.get_summary()
+    params = simulator.params
+
+    kpis = [
+        ("Gesamtumsatz", summary.get('total_revenue', 0), 'TG KPI M'),
+        ("Reingewinn (Netto)", summary.get('total_net_profit', 0), None),
+        ("Umsatzrendite (ROS)", summary.get('return_on_sales', 0), 'TG KPI %'),
+        ("Endbestand Kasse", summary.get('final_cash', 0), None),
+        ("Gesamte Steuern", summary.get('total_tax', 0), 'TG KPI M')
+    ]
+    # Color coding for Profit and Cash
+    kpis = [(label, value, style or ('TG KPI M Good' if value >= 0 else 'TG KPI M Bad'))
+            for label, value, style in kpis]
+
+    # (label, is_bold, value style, values, total)
+    guv_rows = []
+    for label, attr, is_expense, is_bold in GUV_ROWS:
+        if is_expense:
+            value_style = 'TG GuV Expense'
+        elif is_bold:
+            value_style = 'TG GuV Result'
+        else:
+            value_style = 'TG GuV Value'
+        values = [getattr(r, attr) for r in results]
+        sign = -1 if is_expense else 1
+        guv_rows.append((label, is_bold, value_style, [sign * v for v in values], sign * sum(values)))
+
+    # inflow = (cash_ending - cash_beginning) + cash outflows
+    cash_op = [r.material_cost + r.production_cost + r.assembly_cost + r.overhead_cost + r.marketing_cost
+               for r in results]
+    cash_fin = [r.interest + r.tax for r in results]
+    inflow = [(r.cash_ending - r.cash_beginning) + (op + fin) for r, op, fin in zip(results, cash_op, cash_fin)]
+    cf_rows = [
+        ("Anfangsbestand Kasse", [r.cash_beginning for r in results], 'TG Number'),
+        ("+ Einzahlungen (Forderungen)", inflow, 'TG Number'),
+        ("- Ausz. Operativ (Mat/Prod/Gemein/Mark)", [-v for v in cash_op], 'TG Number'),
+        ("- Ausz. Finanzen (Zinsen/Steuern)", [-v for v in cash_fin], 'TG Number'),
+        ("= Endbestand Kasse", [r.cash_ending for r in results], 'TG Number Total')
+    ]
+
+    # Asset valuation (inventory at cumulative unit costs)
+    val_raw = params.base_material_price
+    val_wip = params.base_material_price + params.base_production_cost
+    val_fin = params.base_material_price + params.base_production_cost + params.base_assembly_cost
+    inventory = [r.raw_material_inventory * val_raw + r.work_in_progress * val_wip
+                 + r.finished_goods_inventory * val_fin for r in results]
+    asset_rows = [
+        ("Liquide Mittel", [r.cash_ending for r in results], 'TG Number'),
+        ("Forderungen (aus Verkauf)", [r.accounts_receivable for r in results], 'TG Number'),
+        ("Vorräte (Bewertet)", inventory, 'TG Number'),
+        ("SUMME UMLAUFVERMÖGEN",
+         [r.cash_ending + r.accounts_receivable + inv for r, inv in zip(results, inventory)], 'TG Number Sum')
+    ]
+
+    # (label, values, style); section headers have no values
+    prod_rows = [
+        (label, None, None) if attr == "" else
+        (label, [getattr(r, attr) for r in results], _PROD_STYLES[fmt])
+        for label, attr, fmt in PROD_ROWS
+    ]
+
+    return {
+        'quarters': len(results),
+        'columns': report_columns(simulator),
+        'generated_at': datetime.now().strftime('%d.%m.%Y %H:%M'),
+        'kpis': kpis,
+        'years': year_rows(simulator),
+        'guv': guv_rows,
+        'cashflow': cf_rows,
+        'assets': asset_rows,
+        'production': prod_rows
+    }
+
+
+def _content_numbers(content: Dict) -> Iterator[Tuple[float, str]]:
+    """(value, named style) of every number cell, in the order the workbook writes them"""
+    for _, value, style in content['kpis']:
+        yield value, style
+    for _, values in content['years']:
+        for value in values:
+            yield value, 'TG GuV Value'
+    for _, _, style, values, total in content['guv']:
+        for value in values:
+            yield value, style
+        yield total, 'TG GuV Total'
+    for _, values, style in content['cashflow'] + content['assets']:
+        for value in values:
+            yield value, style
+    for _, values, style in content['production']:
+        for value in values or ():
+            yield value, style
+
+
+def _build_streaming_workbook(simulator: FactorySimulator) -> Workbook:
+    """Write-only workbook with all rows of write_report_streaming appended"""
+    return _workbook_from_content(_report_content(simulator))
+
+
+def _workbook_from_content(content: Dict) -> Workbook:
+    """Lay out the content of _report_content on the four sheets"""
+    quarters = content['columns']  # Q1 up to the horizon (or the last quarter played)
+    years = content['years']
+    generated_at = content['generated_at']
+
+    wb, style_arrays = _new_styled_workbook()
+
+    def cell(ws, value, style=None):
+        c = WriteOnlyCell(ws, value=value)
+        if style:
+            c._style = copy(style_arrays[style])
+        return c
+
+    def header_rows(ws, title, subtitle, last_column=6):
+        # Title rows span the table below, at least A:F
+        last = get_column_letter(max(6, last_column))
+        for row in (1, 2, 3):
+            ws.merged_cells.add(f'A{row}:{last}{row}')
+        ws.append([cell(ws, title, 'TG Title')])
+        ws.append([cell(ws, subtitle, 'TG Subtitle')])
+        ws.append([cell(ws, f"TechGear Solutions GmbH - Report generiert am: {generated_at}", 'TG Centered')])
+        ws.append([])
+
+    def quarter_headers(first):
+        return [first] + [f'Q{i}' for i in range(1, quarters + 1)]
+
+    # SHEET 1: Management Summary
+    ws_sum = wb.create_sheet("Management Summary")
+    ws_sum.column_dimensions['A'].width = 25
+    for i in range(2, (len(YEAR_COLUMNS) + 2) if years else 3):
+        ws_sum.column_dimensions[get_column_letter(i)].width = 15
+    header_rows(ws_sum, "📊 Management Summary", "Wichtigste Kennzahlen auf einen Blick",
+                1 + len(YEAR_COLUMNS) if years else 6)
+    ws_sum.append([cell(ws_sum, kpi_title(quarters), 'TG Section')])
+    for label, value, style in content['kpis']:
+        ws_sum.append([label, cell(ws_sum, value, style)])
+
+    # Year overview of multi-year games
+    if years:
+        ws_sum.append([])
+        ws_sum.append([cell(ws_sum, "Jahresübersicht", 'TG Section')])
+        ws_sum.append([cell(ws_sum, h, 'TG Table Header') for h in ['Geschäftsjahr'] + [h for h, _ in YEAR_COLUMNS]])
+        for label, values in years:
+            ws_sum.append([label] + [cell(ws_sum, v, 'TG GuV Value') for v in values])
+
+    # SHEET 2: GuV Detail
+    ws_guv = wb.create_sheet("GuV Detail")
+    ws_guv.column_dimensions['A'].width = 30
+    for i in range(2, quarters + 3):
+        ws_guv.column_dimensions[get_column_letter(i)].width = 15
+    header_rows(ws_guv, "📉 Gewinn- und Verlustrechnung", "Detaillierte Aufstellung nach Quartalen", quarters + 2)
+    ws_guv.append([cell(ws_guv, h, 'TG Table Header') for h in quarter_headers('Position') + ['GESAMT']])
+
+    padding = [None] * (quarters - content['quarters'])
+    for label, is_bold, value_style, values, total in content['guv']:
+        ws_guv.append(
+            [cell(ws_guv, label, 'TG Bold' if is_bold else None)]
+            + [cell(ws_guv, v, value_style) for v in values]
+            + padding
+            + [cell(ws_guv, total, 'TG GuV Total')]
+        )
+
+    # SHEET 3: Cashflow & Bilanz
+    ws_bal = wb.create_sheet("Cashflow & Bilanz")
+    ws_bal.column_dimensions['A'].width = 35
+    header_rows(ws_bal, "💰 Cashflow & Vermögenswerte", "Liquiditätsrechnung und Bestandsbewertung", quarters + 1)
+    ws_bal.append([cell(ws_bal, "CASHFLOW RECHNUNG", 'TG Section Blue')])
+    ws_bal.append([cell(ws_bal, h, 'TG CF Header') for h in quarter_headers('Position')])
+    for label, values, style in content['cashflow']:
+        ws_bal.append([label] + [cell(ws_bal, v, style) for v in values])
+    ws_bal.append([])
+    ws_bal.append([])
+
+    ws_bal.append([cell(ws_bal, "VERMÖGENSWERTE (Indikativ)", 'TG Section Blue')])
+    for label, values, style in content['assets']:
+        ws_bal.append([label] + [cell(ws_bal, v, style) for v in values])
+
+    # SHEET 4: Produktion & Lager
+    ws_prod = wb.create_sheet("Produktion & Lager")
+    ws_prod.column_dimensions['A'].width = 30
+    header_rows(ws_prod, "🏭 Produktion & Logistik", "Mengenströme und Lagerbestände", quarters + 1)
+    ws_prod.append([cell(ws_prod, h, 'TG Prod Header') for h in quarter_headers('Kennzahl')])
+
+    for label, values, style in content['production']:
+        if values is None:  # Section Header
+            ws_prod.append([cell(ws_prod, label or None, 'TG Prod Section' if label else None)])
+        else:
+            ws_prod.append([label] + [cell(ws_prod, v, style) for v in values])
+
+    return wb
+
+
+# ==========================================
+# Template report
+# ==========================================
+
+# Slots of a skeleton sheet: number cells as the write-only writer emits them, and the timestamp
+_GENERATED_AT_MARK = '@@generated_at@@'
+_SHEET_SLOT = re.compile(r'(<c r="[A-Z]+[0-9]+" s=")[0-9]+" t="n"><v>[^<]*</v></c>|' + _GENERATED_AT_MARK)
+_SHEET_MEMBER = re.compile(r'xl/worksheets/sheet[0-9]+\.xml')
+_CORE_MEMBER = 'docProps/core.xml'
+_W3CDTF = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}Z')
+
+# Skeletons kept (one per number of quarters played and shown)
+TEMPLATE_CACHE_SIZE = 32
+
+
+class _ReportTemplate:
+    """
+    Styled skeleton of the report for one layout (quarters played and shown)
+
+    static: xlsx zip with every member that is the same for all games
+    sheets: (member name, text fragments, slots) per sheet; slot i sits
+            between fragments i and i+1 and is either the start of a
+            number cell ('<c r="B6" s="') or None for the timestamp
+    core: docProps/core.xml split around its two timestamps
+    style_ids: cell style id per named style
+    """
+
+    __slots__ = ('static', 'sheets', 'core', 'style_ids')
+
+    def __init__(self, content: Dict):
+        wb = _workbook_from_content(dict(content, generated_at=_GENERATED_AT_MARK))
+        # Every named style gets a cell style id, also those this game did not use (e.g. 'TG KPI M Bad')
+        self.style_ids = {name: str(wb._cell_styles.add(array)) for name, array in _style_template()[2].items()}
+        skeleton = io.BytesIO()
+        wb.save(skeleton)
+
+        self.sheets = []
+        static = io.BytesIO()
+        with zipfile.ZipFile(skeleton) as source, \
+                zipfile.ZipFile(static, 'w', compression=zipfile.ZIP_DEFLATED) as target:
+            for name in source.namelist():
+                data = source.read(name)
+                if _SHEET_MEMBER.fullmatch(name):
+                    self.sheets.append((name,) + self._split_sheet(data.decode('utf-8')))
+                elif name == _CORE_MEMBER:
+                    self.core = _W3CDTF.split(data.decode('utf-8'))
+                else:
+                    target.writestr(name, data)
+        self.static = static.getvalue()
+
+        # One slot per number plus one timestamp per sheet
+        if sum(len(slots) for _, _, slots in self.sheets) \
+                != sum(1 for _ in _content_numbers(content)) + len(self.sheets):
+            raise ValueError("Skeleton cells do not match the report content")
+
+    @staticmethod
+    def _split_sheet(xml: str) -> Tuple[List[str], List[Optional[str]]]:
+        fragments, slots = [], []
+        position = 0
+        for match in _SHEET_SLOT.finditer(xml):
+            fragments.append(xml[position:match.start()])
+            slots.append(match.group(1))
+            position = match.end()
+        fragments.append(xml[position:])
+        return fragments, slots
+
+    def render(self, content: Dict) -> bytes:
+        """The skeleton with the numbers and timestamp of content, as xlsx bytes"""
+        buffer = io.BytesIO(self.static)
+        buffer.seek(0, io.SEEK_END)
+        numbers = _content_numbers(content)
+        style_ids = self.style_ids
+        generated_at = content['generated_at']
+        now = datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with zipfile.ZipFile(buffer, 'a', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, fragments, slots in self.sheets:
+                parts = []
+                for fragment, slot in zip(fragments, slots):
+                    parts.append(fragment)
+                    if slot is None:
+                        parts.append(generated_at)
+                    else:
+                        value, style = next(numbers)
+                        parts.append(f'{slot}{style_ids[style]}" t="n"><v>{safe_string(value)}</v></c>')
+                parts.append(fragments[-1])
+                archive.writestr(name, ''.join(parts))
+            archive.writestr(_CORE_MEMBER, now.join(self.core))
+        return buffer.getvalue()
+
+
+_templates: 'OrderedDict[Tuple[int, int], _ReportTemplate]' = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def _report_template(content: Dict) -> _ReportTemplate:
+    """Cached skeleton for the layout of content (built from content on a miss)"""
+    key = (content['quarters'], content['columns'])
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+    template = _ReportTemplate(content)
+    with _templates_lock:
+        _templates[key] = template
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return template
+
+
+def write_report_template(simulator: FactorySimulator, fileobj=None):
+    """
+    Write the report by filling a cached skeleton
+
+    The styled workbook is built once per layout, i.e. per number of
+    quarters played and shown (with write_report_streaming's layout);
+    every further report with that layout only formats its numbers into the skeleton's sheet XML and
+    compresses the four sheets. Other zip members are copied as they are.
+
+    Args:
+        simulator: Game to report on
+        fileobj: Binary file object to write to (defaults to a new BytesIO)
+
+    Returns:
+        The file object, rewound to the start
+    """
+    if fileobj is None:
+        fileobj = io.BytesIO()
+    with metrics.stage('xlsx_build'):
+        content = _report_content(simulator)
+        template = _report_template(content)
+    with metrics.stage('xlsx_save'):
+        fileobj.write(template.render(content))
+    fileobj.seek(0)
+    return fileobj
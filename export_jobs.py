@@ -0,0 +1,177 @@
+"""
+Background export jobs
+Planspiel BWL für BDE - WiSe 2025/26
+
+When a whole class exports at the end of a session, building every
+workbook inside its request would tie up the request workers. Instead an
+export request only enqueues a job and returns its id; a small local
+pool builds the workbooks (at most `max_concurrent` at a time) and the
+client polls the job status and downloads the result when it is done.
+
+Every request of a game gets its own job (id, game and file name belong
+to the caller), but a repeated request for the same game and state
+(report_key) gets the job it already has. Builds are shared by state:
+when several teams played the same decisions, their jobs wait for one
+build and all receive its payload. Finished jobs keep their payload for
+`ttl` seconds; at most `max_jobs` finished jobs are kept.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ExportQueueFull(RuntimeError):
+    """Too many jobs are waiting; the client should retry later"""
+
+
+class ExportJob:
+    """One workbook build and, once done, its payload"""
+
+    __slots__ = ('job_id', 'key', 'game_id', 'filename', 'status', 'error', 'payload',
+                 'created_at', 'finished_at')
+
+    def __init__(self, key: str, game_id: str, filename: str):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.game_id = game_id
+        self.filename = filename
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.payload: Optional[bytes] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'game_id': self.game_id,
+            'status': self.status,
+            'filename': self.filename,
+            'error': self.error,
+            'size': len(self.payload) if self.payload is not None else None,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class ExportQueue:
+    """Job registry plus a bounded pool of build threads"""
+
+    def __init__(self, max_concurrent: int = 2, max_queued: int = 1000,
+                 ttl: float = 15 * 60, max_jobs: int = 256):
+        """
+        Args:
+            max_concurrent: Workbooks built at the same time
+            max_queued: Jobs waiting for a build thread before submit() refuses
+            ttl: Seconds a finished job (and its payload) is kept
+            max_jobs: Finished jobs kept at most (oldest are dropped first)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: 'OrderedDict[str, ExportJob]' = OrderedDict()
+        self._by_key: Dict[Tuple[str, str], ExportJob] = {}  # (game_id, key) -> latest job
+        self._builds: Dict[str, List[ExportJob]] = {}  # key -> jobs waiting for its build
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='export')
+
+    def submit(self, key: str, game_id: str, filename: str, build: Callable[[], bytes],
+               payload: bytes = None) -> Tuple[ExportJob, bool]:
+        """
+        Enqueue an export unless this game already has a job for the same key
+
+        Args:
+            key: Game state key (report_key); jobs of the same key share one build
+            build: Returns the payload; runs in a build thread
+            payload: Already built payload (e.g. from the report cache);
+                     the job is finished right away
+
+        Returns:
+            (job, created) - created is False for a repeated request
+        """
+        start = False
+        with self._lock:
+            self._expire(time.time())
+            existing = self._by_key.get((game_id, key))
+            if existing is not None and existing.status != FAILED:
+                return existing, False
+            waiting = self._builds.get(key)
+            if payload is None and waiting is None and self.count(QUEUED) >= self.max_queued:
+                raise ExportQueueFull(f"{self.max_queued} exports are already waiting")
+            job = ExportJob(key, game_id, filename)
+            if payload is not None:
+                self._finish(job, payload=payload)
+            elif waiting is not None:
+                job.status = waiting[0].status  # Joins the build of another game in the same state
+                waiting.append(job)
+            else:
+                self._builds[key] = [job]
+                start = True
+            self._jobs[job.job_id] = job
+            self._by_key[(game_id, key)] = job
+        if start:
+            self._pool.submit(self._run, key, build)
+        return job, True
+
+    def _run(self, key: str, build: Callable[[], bytes]):
+        with self._lock:
+            for job in self._builds[key]:
+                job.status = RUNNING
+        try:
+            payload, error = build(), None
+        except Exception as e:  # Reported through the job status
+            payload, error = None, f"{type(e).__name__}: {e}"
+        with self._lock:
+            for job in self._builds.pop(key):
+                self._finish(job, payload=payload, error=error)
+
+    @staticmethod
+    def _finish(job: ExportJob, payload: bytes = None, error: str = None):
+        job.payload = payload
+        job.error = error
+        job.finished_at = time.time()
+        job.status = DONE if error is None else FAILED
+
+    def _expire(self, now: float):
+        """Forget finished jobs past their TTL and the oldest beyond max_jobs (lock held)"""
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        excess = len(finished) - self.max_jobs
+        for job in finished:
+            if now - job.finished_at > self.ttl or excess > 0:
+                excess -= 1
+                del self._jobs[job.job_id]
+                if self._by_key.get((job.game_id, job.key)) is job:
+                    del self._by_key[(job.game_id, job.key)]
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished_at is not None and time.time() - job.finished_at > self.ttl:
+                return None
+            return job
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status == status)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+def create_export_queue() -> ExportQueue:
+    """Export queue configured by EXPORT_CONCURRENCY / EXPORT_MAX_QUEUED"""
+    return ExportQueue(
+        max_concurrent=int(os.environ.get('EXPORT_CONCURRENCY', 2)),
+        max_queued=int(os.environ.get('EXPORT_MAX_QUEUED', 1000))
+    )
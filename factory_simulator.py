@@ -14,9 +14,15 @@ This module implements an enhanced version of the Factory game with:
 - Steuern (Taxes)
 """
 
+import bisect
+import hashlib
 import json
-from typing import Dict, List
-from dataclasses import dataclass, asdict
+import math
+import operator
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from dataclasses import dataclass, asdict, fields, replace
 from datetime import datetime
 
 
@@ -49,6 +55,15 @@ class GameParameters:
     # Production efficiency
     production_efficiency: float = 1.0  # 1.0 = normal, 0.9 = 10% cost reduction
     quality_factor: float = 1.0  # Affects production costs
+    
+    # Game length
+    horizon: int = 4  # Planned quarters (4 = one business year, 40 = ten years)
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Any parameter change invalidates the cached demand index
+        if name != '_demand_index':
+            self.__dict__.pop('_demand_index', None)
 
 
 @dataclass
@@ -94,13 +109,437 @@ class QuarterResult:
     accounts_receivable: float
 
 
+# Field order used for compact (list based) serialization of QuarterResult
+RESULT_FIELDS = tuple(f.name for f in fields(QuarterResult))
+
+# Integer valued QuarterResult fields (lots and quarter number)
+RESULT_INT_FIELDS = frozenset({
+    'quarter', 'material_purchase_lots', 'production_lots', 'sales_volume',
+    'raw_material_inventory', 'work_in_progress', 'finished_goods_inventory'
+})
+
+# Positions of the integer fields in RESULT_FIELDS order
+_INT_POSITIONS = tuple(i for i, name in enumerate(RESULT_FIELDS) if name in RESULT_INT_FIELDS)
+
+
+def whole_number(value, name: str) -> int:
+    """A lot count as int; integral floats (2.0) are accepted, fractions are not"""
+    if type(value) is int:
+        return value
+    try:
+        return operator.index(value)
+    except TypeError:
+        pass
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"{name} must be a whole number, got {value!r}")
+
+
+# get_summary key and the QuarterResult field it totals
+SUMMARY_TOTALS = (
+    ('total_revenue', 'sales_revenue'),
+    ('total_herstellungskosten', 'herstellungskosten'),
+    ('total_gross_profit', 'gross_profit'),
+    ('total_overhead', 'overhead_cost'),
+    ('total_marketing', 'marketing_cost'),
+    ('total_depreciation', 'depreciation'),
+    ('total_ebit', 'ebit'),
+    ('total_interest', 'interest'),
+    ('total_tax', 'tax'),
+    ('total_net_profit', 'net_profit'),
+)
+
+
+class SummaryDriftError(AssertionError):
+    """Running summary totals differ from a recomputation over the history"""
+
+
+class ResultHistory:
+    """
+    Columnar storage of all QuarterResults of a game
+    
+    Every QuarterResult field is kept in typed arrays ('d' for amounts,
+    'q' for lots), i.e. a quarter costs 8 bytes per field instead of a
+    dataclass instance with its own __dict__ and boxed floats. The
+    history behaves like the former list of results: indexing and
+    iteration create QuarterResult views on demand, while column() gives
+    summaries and exports direct access to the values.
+    
+    The columns are split into chunks of CHUNK_SIZE quarters. fork()
+    shares the chunks with the new history (copy-on-write): a chunk is
+    only copied when one of the histories appends to or truncates a
+    chunk it does not own, so branches of a game share their common
+    past instead of holding a deep copy each.
+    
+    Running totals of the SUMMARY_TOTALS fields are updated on every
+    append, so get_summary() does not depend on the history length.
+    They are summed in quarter order, exactly like sum() over a column.
+    """
+    
+    CHUNK_SIZE = 32
+    
+    __slots__ = ('_chunks', '_owned', '_length', 'version', 'totals')
+    
+    def __init__(self, rows: Iterable[Sequence] = ()):
+        self._chunks: List[Dict[str, array]] = []
+        self._owned: List[bool] = []  # False: chunk is shared with another history
+        self._length = 0
+        self.version = 0  # Incremented on every change (used for memoization)
+        self.totals: Dict[str, float] = dict.fromkeys((name for _, name in SUMMARY_TOTALS), 0.0)
+        for row in rows:
+            self.append_row(row)
+    
+    @staticmethod
+    def _new_chunk() -> Dict[str, array]:
+        return {name: array('q' if name in RESULT_INT_FIELDS else 'd') for name in RESULT_FIELDS}
+    
+    def _own_last(self) -> Dict[str, array]:
+        """Last chunk, copied first if it is shared with another history"""
+        if not self._owned[-1]:
+            self._chunks[-1] = {name: array(column.typecode, column) for name, column in self._chunks[-1].items()}
+            self._owned[-1] = True
+        return self._chunks[-1]
+    
+    def _writable_tail(self) -> Dict[str, array]:
+        """Chunk the next quarter goes into"""
+        if not self._chunks or len(self._chunks[-1]['quarter']) == self.CHUNK_SIZE:
+            self._chunks.append(self._new_chunk())
+            self._owned.append(True)
+        return self._own_last()
+    
+    def _rollback(self, tail: Dict[str, array], length: int):
+        """
+        Cut the columns of a failed append back to `length` quarters
+        
+        Appends are all or nothing: if a value does not fit its column
+        (e.g. 2.5 lots for an integer column), no column keeps a value of
+        that quarter.
+        """
+        for column in tail.values():
+            del column[length:]
+        if length == 0:  # Drop the chunk started for this quarter
+            self._chunks.pop()
+            self._owned.pop()
+    
+    def append(self, result: QuarterResult):
+        tail = self._writable_tail()
+        length = len(tail['quarter'])
+        try:
+            for name, column in tail.items():
+                column.append(getattr(result, name))
+        except BaseException:
+            self._rollback(tail, length)
+            raise
+        self._add_totals()
+    
+    def append_row(self, values: Sequence):
+        """Append one quarter given as values in RESULT_FIELDS order"""
+        tail = self._writable_tail()
+        length = len(tail['quarter'])
+        try:
+            if len(values) != len(RESULT_FIELDS):
+                raise ValueError(f"Expected {len(RESULT_FIELDS)} values, got {len(values)}")
+            for column, value in zip(tail.values(), values):
+                column.append(value)
+        except BaseException:
+            self._rollback(tail, length)
+            raise
+        self._add_totals()
+    
+    def _add_totals(self):
+        """Add the newest quarter to the running totals"""
+        chunk = self._chunks[-1]
+        totals = self.totals
+        for name in totals:
+            totals[name] += chunk[name][-1]
+        self._length += 1
+        self.version += 1
+    
+    def truncate(self, length: int):
+        """Drop all quarters after the first `length`"""
+        if length >= self._length:
+            return
+        self._cut(length)
+        self.totals = self.recompute_totals()
+        self.version += 1
+    
+    def _cut(self, length: int):
+        keep = -(-length // self.CHUNK_SIZE)  # Chunks still needed (ceil)
+        del self._chunks[keep:]
+        del self._owned[keep:]
+        partial = length % self.CHUNK_SIZE
+        if partial and len(self._chunks[-1]['quarter']) > partial:
+            for column in self._own_last().values():
+                del column[partial:]
+        self._length = length
+    
+    def fork(self, length: int = None) -> 'ResultHistory':
+        """New history holding the first `length` quarters, sharing their chunks"""
+        length = self._length if length is None else length
+        if not 0 <= length <= self._length:
+            raise IndexError(f"Cannot fork at quarter {length} of {self._length}")
+        keep = -(-length // self.CHUNK_SIZE)
+        for i in range(keep):
+            self._owned[i] = False
+        forked = ResultHistory()
+        forked._chunks = self._chunks[:keep]
+        forked._owned = [False] * keep
+        forked._cut(length)
+        forked.totals = dict(self.totals) if length == self._length else forked.recompute_totals()
+        return forked
+    
+    def recompute_totals(self) -> Dict[str, float]:
+        """Totals of the SUMMARY_TOTALS fields, summed from scratch"""
+        totals = {}
+        for name in self.totals:
+            total = 0.0
+            for chunk in self._chunks:
+                for value in chunk[name]:
+                    total += value
+            totals[name] = total
+        return totals
+    
+    def check_totals(self) -> Dict[str, Tuple[float, float]]:
+        """Fields whose running total drifted: {name: (running, recomputed)}"""
+        recomputed = self.recompute_totals()
+        return {
+            name: (total, recomputed[name])
+            for name, total in self.totals.items()
+            if total != recomputed[name]
+        }
+    
+    def column(self, name: str) -> array:
+        """All values of one field, oldest quarter first (do not modify)"""
+        if len(self._chunks) == 1:
+            return self._chunks[0][name]
+        column = array(self._chunks[0][name].typecode)
+        for chunk in self._chunks:
+            column.extend(chunk[name])
+        return column
+    
+    def row(self, index: int) -> Tuple:
+        """Values of one quarter in RESULT_FIELDS order"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("quarter index out of range")
+        chunk = self._chunks[index // self.CHUNK_SIZE]
+        offset = index % self.CHUNK_SIZE
+        return tuple(column[offset] for column in chunk.values())
+    
+    def rows(self, names: Sequence[str] = RESULT_FIELDS) -> Iterator[Tuple]:
+        """Value tuples of all quarters, restricted to the given fields"""
+        for chunk in self._chunks:
+            yield from zip(*(chunk[name] for name in names))
+    
+    def columns_from(self, start: int, names: Sequence[str] = RESULT_FIELDS) -> List[List]:
+        """Values of the quarters from index `start` on, one list per field"""
+        return [self.column(name)[start:].tolist() for name in names]
+    
+    def as_dicts(self, names: Sequence[str] = RESULT_FIELDS) -> List[Dict]:
+        """One dict per quarter, as produced by asdict() on the views"""
+        return [dict(zip(names, values)) for values in self.rows(names)]
+    
+    def row_dict(self, index: int, names: Sequence[str] = RESULT_FIELDS) -> Dict:
+        row = dict(zip(RESULT_FIELDS, self.row(index)))
+        return {name: row[name] for name in names}
+    
+    def nbytes(self) -> int:
+        """Size of the column buffers in bytes (shared chunks included)"""
+        return sum(column.itemsize * len(column) for chunk in self._chunks for column in chunk.values())
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __bool__(self) -> bool:
+        return self._length > 0
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [QuarterResult(*self.row(i)) for i in range(*index.indices(self._length))]
+        return QuarterResult(*self.row(index))
+    
+    def __iter__(self) -> Iterator[QuarterResult]:
+        return (QuarterResult(*values) for values in self.rows())
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ResultHistory):
+            return len(self) == len(other) and all(a == b for a, b in zip(self.rows(), other.rows()))
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"ResultHistory({len(self)} quarters)"
+
+
+def compute_demand(params: GameParameters, sales_price: float, marketing_spend: float) -> int:
+    """Scalar demand formula (see FactorySimulator.calculate_demand)"""
+    # Price effect on demand
+    price_ratio = sales_price / params.base_sales_price
+    price_effect = 1.0 - (price_ratio - 1.0) * params.price_elasticity
+    
+    # Marketing effect on demand
+    marketing_effect = 1.0 + (marketing_spend * params.marketing_effectiveness)
+    
+    # Competitive effect
+    if sales_price > params.competitor_price:
+        competitive_penalty = 0.85
+    elif sales_price < params.competitor_price:
+        competitive_penalty = 1.15
+    else:
+        competitive_penalty = 1.0
+    
+    # Calculate total demand
+    demand = params.market_demand_base * price_effect * marketing_effect * competitive_penalty
+    
+    return max(1, round(demand))  # At least 1 lot
+
+
+def _float_bits(x: float) -> int:
+    """Order-preserving integer for a non-negative float"""
+    return struct.unpack('<q', struct.pack('<d', x))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack('<d', struct.pack('<q', bits))[0]
+
+
+class DemandIndex:
+    """
+    Precomputed demand lookup for one GameParameters instance
+    
+    For a fixed marketing spend the demand is a step function of the
+    price: every operation of compute_demand is a correctly rounded float
+    operation, so the result is monotone on each side of the competitor
+    price. The exact float prices where the demand changes are found by
+    bisection over the IEEE bit patterns, using compute_demand itself as
+    the oracle. A lookup is then a binary search over these breakpoints
+    and always returns exactly what compute_demand would.
+    
+    The index is cached on the parameters and dropped automatically as
+    soon as any parameter is assigned.
+    """
+    
+    # Marketing budgets precomputed up front (web UI: 0 - 5 M in 0.5 steps)
+    MARKETING_GRID = tuple(0.5 * i for i in range(11))
+    MAX_COLUMNS = 256  # Breakpoint columns kept for other marketing values
+    
+    def __init__(self, params: GameParameters, marketing_grid=MARKETING_GRID):
+        self.params = params
+        self.price_min = 0.0
+        self.price_max = 4.0 * max(params.base_sales_price, params.competitor_price)
+        # marketing spend -> (price breakpoints, demand per segment)
+        self.columns: Dict[float, Tuple[List[float], List[int]]] = {}
+        for marketing in marketing_grid:
+            self.columns[marketing] = self._build_column(marketing)
+    
+    @classmethod
+    def for_parameters(cls, params: GameParameters) -> 'DemandIndex':
+        """Cached index of a parameter set (rebuilt after any change)"""
+        index = params.__dict__.get('_demand_index')
+        if index is None:
+            index = cls(params)
+            params._demand_index = index
+        return index
+    
+    def lookup(self, sales_price: float, marketing_spend: float) -> int:
+        """Demand for a price and marketing spend in O(log n)"""
+        if not (self.price_min <= sales_price <= self.price_max):
+            return compute_demand(self.params, sales_price, marketing_spend)
+        column = self.columns.get(marketing_spend)
+        if column is None:
+            if len(self.columns) >= self.MAX_COLUMNS + len(self.MARKETING_GRID):
+                return compute_demand(self.params, sales_price, marketing_spend)
+            column = self.columns[marketing_spend] = self._build_column(marketing_spend)
+        starts, values = column
+        return values[bisect.bisect_right(starts, sales_price) - 1]
+    
+    def _build_column(self, marketing_spend: float) -> Tuple[List[float], List[int]]:
+        """Breakpoints over [price_min, price_max] for one marketing spend"""
+        def demand(price):
+            return compute_demand(self.params, price, marketing_spend)
+        
+        competitor = self.params.competitor_price
+        segments: List[Tuple[float, int]] = []
+        if competitor <= self.price_min or competitor > self.price_max:
+            segments += self._segments(demand, self.price_min, self.price_max)
+        else:
+            # Below, exactly at and above the competitor price
+            segments += self._segments(demand, self.price_min, math.nextafter(competitor, -math.inf))
+            segments.append((competitor, demand(competitor)))
+            above = math.nextafter(competitor, math.inf)
+            if above <= self.price_max:
+                segments += self._segments(demand, above, self.price_max)
+        
+        starts = [start for start, _ in segments]
+        values = [value for _, value in segments]
+        return starts, values
+    
+    @staticmethod
+    def _segments(demand, lo: float, hi: float) -> List[Tuple[float, int]]:
+        """(start price, demand) of every constant piece of a monotone demand on [lo, hi]"""
+        segments = []
+        start, value = lo, demand(lo)
+        hi_value = demand(hi)
+        while True:
+            segments.append((start, value))
+            if value == hi_value:
+                return segments
+            # Smallest float in (start, hi] with a different demand
+            low_bits, high_bits = _float_bits(start), _float_bits(hi)
+            while high_bits - low_bits > 1:
+                mid = (low_bits + high_bits) // 2
+                if demand(_bits_float(mid)) == value:
+                    low_bits = mid
+                else:
+                    high_bits = mid
+            start = _bits_float(high_bits)
+            value = demand(start)
+
+
+# Mutable simulator state restored by rewind() and fork()
+STATE_FIELDS = (
+    'cash', 'accounts_receivable', 'raw_material_inventory', 'work_in_progress',
+    'finished_goods_inventory', 'annual_depreciation', 'annual_interest', 'annual_tax'
+)
+
+# Annual accumulators and the QuarterResult field added to them each quarter
+ANNUAL_FIELDS = (
+    ('annual_depreciation', 'depreciation'),
+    ('annual_interest', 'interest'),
+    ('annual_tax', 'tax'),
+)
+
+# Quarters of a business year; the annual accumulators start from 0 with each new year
+QUARTERS_PER_YEAR = 4
+
+# annual_rollups() key and the QuarterResult field it totals per year
+ANNUAL_TOTALS = (
+    ('revenue', 'sales_revenue'),
+    ('ebit', 'ebit'),
+    ('depreciation', 'depreciation'),
+    ('interest', 'interest'),
+    ('tax', 'tax'),
+    ('net_profit', 'net_profit'),
+)
+
+
+def year_start(quarter: int) -> int:
+    """Quarters played before the business year of `quarter` (1-based) began"""
+    return (quarter - 1) // QUARTERS_PER_YEAR * QUARTERS_PER_YEAR
+
+
 class FactorySimulator:
     """Main simulation engine for the Factory game"""
     
-    def __init__(self, parameters: GameParameters = None):
+    def __init__(self, parameters: GameParameters = None, use_demand_index: bool = False,
+                 check_summary: bool = False):
         self.params = parameters or GameParameters()
+        self.use_demand_index = use_demand_index
+        self.check_summary = check_summary  # Verify the running totals in get_summary()
         self.current_quarter = 0
-        self.results: List[QuarterResult] = []
+        self.results = ResultHistory()
         
         # Initial state (from original game)
         self.cash = 28.0  # Initial M (Münzen)
@@ -109,10 +548,16 @@ class FactorySimulator:
         self.work_in_progress = 2  # Lots
         self.finished_goods_inventory = 2  # Lots
         
-        # Annual totals for year-end reporting
+        # Totals of the current business year for year-end reporting
         self.annual_depreciation = 0.0
         self.annual_interest = 0.0
         self.annual_tax = 0.0
+        
+        # State before the first quarter, shared with forks (never modified)
+        self.initial_state = {name: getattr(self, name) for name in STATE_FIELDS}
+        
+        # (history, history version, parameter values, digest) of the most recent state_hash() call
+        self._state_hash_memo = None
     
     def calculate_demand(self, sales_price: float, marketing_spend: float) -> int:
         """
@@ -122,26 +567,13 @@ class FactorySimulator:
         - Base demand modified by price elasticity
         - Marketing investment increases demand
         - Competitor pricing affects demand
-        """
-        # Price effect on demand
-        price_ratio = sales_price / self.params.base_sales_price
-        price_effect = 1.0 - (price_ratio - 1.0) * self.params.price_elasticity
-        
-        # Marketing effect on demand
-        marketing_effect = 1.0 + (marketing_spend * self.params.marketing_effectiveness)
-        
-        # Competitive effect
-        if sales_price > self.params.competitor_price:
-            competitive_penalty = 0.85
-        elif sales_price < self.params.competitor_price:
-            competitive_penalty = 1.15
-        else:
-            competitive_penalty = 1.0
         
-        # Calculate total demand
-        demand = self.params.market_demand_base * price_effect * marketing_effect * competitive_penalty
-        
-        return max(1, round(demand))  # At least 1 lot
+        With use_demand_index the result is looked up in the precomputed
+        DemandIndex of the parameters instead (identical values).
+        """
+        if self.use_demand_index:
+            return DemandIndex.for_parameters(self.params).lookup(sales_price, marketing_spend)
+        return compute_demand(self.params, sales_price, marketing_spend)
     
     def calculate_production_cost(self, lots: int) -> float:
         """Calculate production costs with efficiency factors"""
@@ -159,7 +591,8 @@ class FactorySimulator:
                         production_lots: int = 2,
                         material_purchase_lots: int = 2,
                         material_market_factor: float = 1.0,
-                        overhead_factor: float = 1.0) -> QuarterResult:
+                        overhead_factor: float = 1.0,
+                        demand: int = None) -> QuarterResult:
         """
         Simulate one quarter with given decisions
         
@@ -170,17 +603,32 @@ class FactorySimulator:
             material_purchase_lots: Number of material lots to order
             material_market_factor: Material price multiplier (e.g., 1.1 = 10% increase)
             overhead_factor: Overhead cost multiplier
+            demand: Lots demanded from this player, as allocated by a shared
+                    market (see market_engine.py); None = calculate_demand()
         """
+        # Checked before any state changes: the history stores lots as integers
+        production_lots = whole_number(production_lots, 'production_lots')
+        material_purchase_lots = whole_number(material_purchase_lots, 'material_purchase_lots')
+        if demand is not None:
+            demand = whole_number(demand, 'demand')
+        
         self.current_quarter += 1
         cash_beginning = self.cash
         
+        # First quarter of a new business year: the annual totals start again
+        if self.current_quarter > 1 and (self.current_quarter - 1) % QUARTERS_PER_YEAR == 0:
+            self.annual_depreciation = 0.0
+            self.annual_interest = 0.0
+            self.annual_tax = 0.0
+        
         # Use base price if not specified
         if sales_price is None:
             sales_price = self.params.base_sales_price
         
         # Calculate demand based on price and marketing
-        sales_volume = self.calculate_demand(sales_price, marketing_budget)
-        sales_volume = min(sales_volume, self.finished_goods_inventory)  # Can't sell more than inventory
+        if demand is None:
+            demand = self.calculate_demand(sales_price, marketing_budget)
+        sales_volume = min(demand, self.finished_goods_inventory)  # Can't sell more than inventory
         
         # Calculate revenues (Umsatzerlöse)
         sales_revenue = sales_volume * sales_price
@@ -289,20 +737,32 @@ class FactorySimulator:
         return result
     
     def get_summary(self) -> Dict:
-        """Get summary of all quarters"""
+        """
+        Get summary of all quarters
+        
+        Reads the running totals of the result history (O(1)). With
+        check_summary enabled the totals are recomputed from the columns
+        first and a SummaryDriftError is raised if they differ.
+        """
         if not self.results:
             return {}
         
-        total_revenue = sum(r.sales_revenue for r in self.results)
-        total_herstellungskosten = sum(r.herstellungskosten for r in self.results)
-        total_overhead = sum(r.overhead_cost for r in self.results)
-        total_marketing = sum(r.marketing_cost for r in self.results)
-        total_depreciation = sum(r.depreciation for r in self.results)
-        total_interest = sum(r.interest for r in self.results)
-        total_tax = sum(r.tax for r in self.results)
-        total_net_profit = sum(r.net_profit for r in self.results)
-        total_ebit = sum(r.ebit for r in self.results)
-        total_gross_profit = sum(r.gross_profit for r in self.results)
+        if self.check_summary:
+            drift = self.results.check_totals()
+            if drift:
+                raise SummaryDriftError(f"Summary totals drifted: {drift}")
+        
+        totals = self.results.totals
+        total_revenue = totals['sales_revenue']
+        total_herstellungskosten = totals['herstellungskosten']
+        total_overhead = totals['overhead_cost']
+        total_marketing = totals['marketing_cost']
+        total_depreciation = totals['depreciation']
+        total_interest = totals['interest']
+        total_tax = totals['tax']
+        total_net_profit = totals['net_profit']
+        total_ebit = totals['ebit']
+        total_gross_profit = totals['gross_profit']
         
         return {
             "quarters_played": len(self.results),
@@ -322,19 +782,189 @@ class FactorySimulator:
             "return_on_sales": round((total_net_profit / total_revenue * 100) if total_revenue > 0 else 0, 2)
         }
     
-    def export_results(self, filename: str = "factory_results.json"):
-        """Export results to JSON file"""
-        data = {
+    def to_state(self, include_results: bool = True) -> Dict:
+        """Compact, JSON-serializable snapshot of the complete game state"""
+        state = {
+            "params": asdict(self.params),
+            "current_quarter": self.current_quarter,
+            "cash": self.cash,
+            "accounts_receivable": self.accounts_receivable,
+            "raw_material_inventory": self.raw_material_inventory,
+            "work_in_progress": self.work_in_progress,
+            "finished_goods_inventory": self.finished_goods_inventory,
+            "annual_depreciation": self.annual_depreciation,
+            "annual_interest": self.annual_interest,
+            "annual_tax": self.annual_tax,
+            "initial_state": self.initial_state
+        }
+        if include_results:
+            # One value list per quarter in RESULT_FIELDS order
+            state["results"] = [list(values) for values in self.results.rows()]
+        return state
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'FactorySimulator':
+        """Rebuild a simulator from a to_state() snapshot"""
+        simulator = cls(GameParameters(**state["params"]))
+        simulator.current_quarter = state["current_quarter"]
+        simulator.cash = state["cash"]
+        simulator.accounts_receivable = state["accounts_receivable"]
+        simulator.raw_material_inventory = state["raw_material_inventory"]
+        simulator.work_in_progress = state["work_in_progress"]
+        simulator.finished_goods_inventory = state["finished_goods_inventory"]
+        simulator.annual_depreciation = state["annual_depreciation"]
+        simulator.annual_interest = state["annual_interest"]
+        simulator.annual_tax = state["annual_tax"]
+        simulator.initial_state = state.get("initial_state", simulator.initial_state)
+        simulator.results = ResultHistory(state["results"])
+        return simulator
+    
+    def snapshot(self, quarter: int) -> Dict:
+        """
+        State (STATE_FIELDS) at the end of a quarter, 0 = before the first
+        
+        Nothing is copied per quarter: cash, receivables and inventories
+        are read from the quarter's result row, the annual accumulators
+        are re-added from the rows of the quarter's business year in
+        quarter order (at most QUARTERS_PER_YEAR rows, however long the
+        game is).
+        """
+        if not 0 <= quarter <= len(self.results):
+            raise ValueError(f"Quarter {quarter} has not been played (0-{len(self.results)})")
+        state = dict(self.initial_state)
+        if quarter == 0:
+            return state
+        
+        row = self.results.row_dict(quarter - 1)
+        state['cash'] = row['cash_ending']
+        for name in ('accounts_receivable', 'raw_material_inventory', 'work_in_progress',
+                     'finished_goods_inventory'):
+            state[name] = row[name]
+        first = year_start(quarter)
+        year_rows = [self.results.row_dict(index, [field for _, field in ANNUAL_FIELDS])
+                     for index in range(first, quarter)]
+        for name, field_name in ANNUAL_FIELDS:
+            total = state[name] if first == 0 else 0.0  # Later years start from 0
+            for year_row in year_rows:
+                total += year_row[field_name]
+            state[name] = total
+        return state
+    
+    def annual_rollups(self) -> List[Dict]:
+        """
+        Totals per business year (QUARTERS_PER_YEAR quarters each)
+        
+        The last year may still be running. Its depreciation, interest and
+        tax equal the annual accumulators; earlier years are summed from
+        the result columns in quarter order, like the accumulators were.
+        """
+        names = [field for _, field in ANNUAL_TOTALS] + ['cash_ending']
+        years = []  # [quarters, cash_ending, *totals] per year
+        for index, values in enumerate(self.results.rows(names)):
+            if index % QUARTERS_PER_YEAR == 0:
+                years.append([0, 0.0] + [0.0] * len(ANNUAL_TOTALS))
+            year = years[-1]
+            year[0] += 1
+            year[1] = values[-1]
+            for i, value in enumerate(values[:-1], 2):
+                year[i] += value
+        return [
+            dict(year=number, quarters=year[0],
+                 **{key: round(total, 2) for (key, _), total in zip(ANNUAL_TOTALS, year[2:])},
+                 cash_ending=round(year[1], 2))
+            for number, year in enumerate(years, 1)
+        ]
+    
+    def rewind(self, quarter: int):
+        """Undo all quarters after `quarter` (0 = back to the start)"""
+        state = self.snapshot(quarter)
+        self.results.truncate(quarter)
+        self.current_quarter = quarter
+        for name, value in state.items():
+            setattr(self, name, value)
+    
+    def undo(self):
+        """Undo the last quarter"""
+        if self.current_quarter == 0:
+            raise ValueError("No quarter to undo")
+        self.rewind(self.current_quarter - 1)
+    
+    def fork(self, quarter: int = None) -> 'FactorySimulator':
+        """
+        Branch the game at the end of `quarter` (default: current quarter)
+        
+        The new simulator shares the result history up to `quarter` with
+        this one (copy-on-write, see ResultHistory.fork) and continues
+        independently; this simulator is not changed.
+        """
+        quarter = self.current_quarter if quarter is None else quarter
+        state = self.snapshot(quarter)
+        
+        params = replace(self.params)
+        demand_index = self.params.__dict__.get('_demand_index')
+        if demand_index is not None:
+            params._demand_index = demand_index  # Immutable, safe to share
+        
+        forked = FactorySimulator(params, self.use_demand_index, self.check_summary)
+        forked.initial_state = self.initial_state
+        forked.results = self.results.fork(quarter)
+        forked.current_quarter = quarter
+        for name, value in state.items():
+            setattr(forked, name, value)
+        return forked
+    
+    def state_hash(self) -> str:
+        """
+        Stable SHA-256 over the parameters and all quarter results
+        
+        Two simulators with the same hash produce identical reports. The
+        digest is memoized until the results or a parameter change.
+        """
+        history = self.results
+        params = tuple(getattr(self.params, f.name) for f in fields(self.params))
+        memo = self._state_hash_memo
+        if memo is not None and memo[0] is history and memo[1] == history.version and memo[2] == params:
+            return memo[3]
+        
+        payload = json.dumps({
+            "params": asdict(self.params),
+            "results": [list(values) for values in history.rows()]
+        }, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        self._state_hash_memo = (history, history.version, params, digest)
+        return digest
+    
+    def export_data(self) -> Dict:
+        """Parameters, all quarters and the summary as exported to JSON"""
+        return {
             "parameters": asdict(self.params),
-            "quarters": [asdict(r) for r in self.results],
+            "quarters": self.results.as_dicts(),
             "summary": self.get_summary()
         }
+    
+    def export_results(self, filename: str = "factory_results.json"):
+        """Export results to JSON file"""
+        data = self.export_data()
         
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         return filename
     
+    def print_year_report(self):
+        """Print the year-end closing of the current business year"""
+        year = self.annual_rollups()[-1]
+        print(f"\n{'='*60}")
+        print(f"JAHRESABSCHLUSS - GESCHÄFTSJAHR {year['year']}")
+        print(f"{'='*60}")
+        print(f"Umsatzerlöse:              {year['revenue']:>8.2f} M")
+        print(f"Abschreibungen:            {self.annual_depreciation:>8.2f} M")
+        print(f"Zinsen:                    {self.annual_interest:>8.2f} M")
+        print(f"Steuern:                   {self.annual_tax:>8.2f} M")
+        print(f"= Gewinn nach Steuern:     {year['net_profit']:>8.2f} M")
+        print(f"Kasse Jahresende:          {year['cash_ending']:>8.2f} M")
+        print(f"{'='*60}\n")
+    
     def print_quarter_report(self, result: QuarterResult):
         """Print formatted quarter report with GuV structure"""
         print(f"\n{'='*60}")
@@ -379,8 +1009,8 @@ class FactorySimulator:
         print(f"{'='*60}\n")
 
 
-def run_interactive_game():
-    """Run interactive game session"""
+def run_interactive_game(horizon: int = 4):
+    """Run interactive game session over `horizon` quarters"""
     print("\n" + "="*60)
     print("TECHGEAR SOLUTIONS GMBH - INTERAKTIVE SIMULATION")
     print("mit Abschreibungen, Zinsen und Steuern")
@@ -388,7 +1018,7 @@ def run_interactive_game():
     print("="*60 + "\n")
     
     # Initialize game
-    params = GameParameters()
+    params = GameParameters(horizon=horizon)
     simulator = FactorySimulator(params)
     
     print("Startzustand:")
@@ -402,8 +1032,8 @@ def run_interactive_game():
     print(f"  Zinsen pro Quartal: {params.interest_per_quarter} M")
     print(f"  Steuersatz: {params.tax_rate*100:.1f}%")
     
-    # Play 4 quarters
-    for quarter in range(1, 5):
+    # Play all quarters of the horizon
+    for quarter in range(1, params.horizon + 1):
         print(f"\n{'='*60}")
         print(f"QUARTAL {quarter} - ENTSCHEIDUNGEN")
         print(f"{'='*60}")
@@ -430,10 +1060,15 @@ def run_interactive_game():
             print("Ungültige Eingabe! Verwende Standardwerte.")
             result = simulator.simulate_quarter()
             simulator.print_quarter_report(result)
+        
+        # Year-end closing of multi-year games
+        if params.horizon > QUARTERS_PER_YEAR and quarter % QUARTERS_PER_YEAR == 0:
+            simulator.print_year_report()
     
     # Final summary
     print("\n" + "="*60)
-    print("JAHRESABSCHLUSS - ZUSAMMENFASSUNG")
+    print("JAHRESABSCHLUSS - ZUSAMMENFASSUNG" if params.horizon <= QUARTERS_PER_YEAR
+          else f"GESAMTABSCHLUSS ({params.horizon} QUARTALE) - ZUSAMMENFASSUNG")
     print("="*60)
     summary = simulator.get_summary()
     
@@ -461,4 +1096,5 @@ def run_interactive_game():
 
 
 if __name__ == "__main__":
-    run_interactive_game()
+    import sys
+    run_interactive_game(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,124 @@
+"""
+Projections of cash and inventories for candidate plans
+Planspiel BWL für BDE - WiSe 2025/26
+
+Before students commit a quarter they can see where one or more plans
+would take their game over the next quarters. The projection starts
+from the live game's current state (BatchSimulator.from_simulator copies
+it); the game itself is neither changed nor extended, and nothing is
+appended to its results.
+
+All candidate plans are paths of one BatchSimulator: each quarter of
+the projection is one vectorized simulate_quarter call for every plan
+at once, so a few plans over a few quarters take about a millisecond
+and the UI can re-run the forecast while a slider moves. Each path
+matches what FactorySimulator.simulate_quarter would produce for the
+same decisions.
+
+Games in a market session get their demand from the shared market;
+their projection uses the game's own demand formula instead (what the
+market would allocate depends on the other teams' decisions).
+"""
+
+from typing import Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+
+from batch_simulator import BatchSimulator
+from factory_simulator import FactorySimulator
+
+
+# Per-quarter fields of a projected plan
+FORECAST_FIELDS = (
+    'quarter', 'sales_volume', 'sales_revenue', 'net_profit', 'cash_ending', 'accounts_receivable',
+    'raw_material_inventory', 'work_in_progress', 'finished_goods_inventory'
+)
+
+# simulate_quarter decisions a plan may set, with their defaults
+DECISION_DEFAULTS = {
+    'sales_price': None,  # None = base price of the game
+    'marketing_budget': 0.0,
+    'production_lots': 2,
+    'material_purchase_lots': 2,
+    'material_market_factor': 1.0,
+    'overhead_factor': 1.0
+}
+
+Plan = Union[Mapping, Sequence[Mapping]]
+
+
+def plan_quarters(plan: Plan, quarters: int) -> List[Mapping]:
+    """One decision dict per quarter; a single dict is repeated for every quarter"""
+    if isinstance(plan, Mapping):
+        return [plan] * quarters
+    plan = list(plan)
+    if len(plan) != quarters:
+        raise ValueError(f"Expected {quarters} quarters per plan, got {len(plan)}")
+    return plan
+
+
+def stack_decisions(plans: Sequence[Sequence[Mapping]], quarter: int, base_sales_price: float) -> Dict:
+    """simulate_quarter keywords for one quarter of all plans, one value per plan"""
+    decisions = {}
+    for name, default in DECISION_DEFAULTS.items():
+        values = [plan[quarter].get(name, default) for plan in plans]
+        if name == 'sales_price':
+            values = [base_sales_price if value is None else value for value in values]
+        decisions[name] = values
+    return decisions
+
+
+def forecast(simulator: FactorySimulator, plans: Sequence[Plan], quarters: int = None) -> Dict:
+    """
+    Project the game over the next quarters for every plan
+
+    Args:
+        simulator: Live game; only its current state is read
+        plans: Candidate plans, each one dict of decisions (simulate_quarter
+               keywords) per quarter, or a single dict used for every quarter
+        quarters: Quarters to project (default: the rest of the game's
+                  horizon, at least 1)
+
+    Returns:
+        {"start_quarter", "quarters", "plans": [{field: [value per
+         quarter], ..., "summary": {...}} per plan]}
+    """
+    if quarters is None:
+        quarters = max(1, simulator.params.horizon - simulator.current_quarter)
+    if quarters < 1:
+        raise ValueError("A forecast needs at least 1 quarter")
+    if not plans:
+        raise ValueError("Expected at least one plan")
+    plans = [plan_quarters(plan, quarters) for plan in plans]
+    unknown = {name for plan in plans for decisions in plan for name in decisions} - set(DECISION_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown decisions: {sorted(unknown)}")
+
+    batch = BatchSimulator.from_simulator(simulator, len(plans), keep_history=False)
+    columns = batch.run([
+        stack_decisions(plans, quarter, simulator.params.base_sales_price) for quarter in range(quarters)
+    ])
+
+    # Per plan: first projected quarter that ends with negative cash
+    cash = columns['cash_ending']
+    negative = cash < 0
+    first_negative = np.where(negative.any(axis=0), negative.argmax(axis=0) + simulator.current_quarter + 1, 0)
+    summary = {
+        'projected_net_profit': np.round(columns['net_profit'].sum(axis=0), 2).tolist(),
+        'total_net_profit': batch.get_summary()['total_net_profit'].tolist(),  # Whole game incl. the projection
+        'final_cash': np.round(cash[-1], 2).tolist(),
+        'min_cash': np.round(cash.min(axis=0), 2).tolist(),
+        'first_negative_cash_quarter': [int(q) or None for q in first_negative]
+    }
+
+    # Columns are (quarters, plans); every plan gets its own lists
+    per_field = {name: columns[name].T.tolist() for name in FORECAST_FIELDS}
+    return {
+        'start_quarter': simulator.current_quarter,
+        'quarters': quarters,
+        'plans': [
+            dict({name: per_field[name][i] for name in FORECAST_FIELDS},
+                 summary={key: values[i] for key, values in summary.items()})
+            for i in range(len(plans))
+        ]
+    }
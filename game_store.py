@@ -0,0 +1,449 @@
+"""
+Game state storage for the Flask app
+Planspiel BWL für BDE - WiSe 2025/26
+
+Backends keep FactorySimulator instances keyed by game_id:
+- MemoryGameStore: in-process LRU with TTL (single worker, default)
+- SQLiteGameStore: shared SQLite file with an in-worker LRU cache in
+  front, so that several gunicorn workers see the same games
+
+Select the backend with the GAME_STORE_URL environment variable,
+e.g. "memory://" or "sqlite:///games.db".
+
+Callbacks registered with on_evict() are called with the game_id of
+every game the store drops by itself (LRU eviction, TTL expiry), so
+that indexes kept next to the store (e.g. the leaderboards) can follow.
+
+Requests that change a game hold lock(game_id) from get() to put(), so
+that two requests for the same game cannot both load it and the later
+put() overwrite the other's quarters. The SQLite store extends the lock
+to all workers with a lease row per game.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from factory_simulator import FactorySimulator
+
+
+DEFAULT_CACHE_SIZE = 1000
+DEFAULT_TTL_SECONDS = 24 * 60 * 60  # Games expire one day after their last change
+
+
+def encode_simulator(simulator: FactorySimulator) -> bytes:
+    """Serialize a simulator into a compact, compressed blob"""
+    payload = json.dumps(simulator.to_state(), separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'))
+
+
+def decode_simulator(blob: bytes) -> FactorySimulator:
+    """Inverse of encode_simulator"""
+    return FactorySimulator.from_state(json.loads(zlib.decompress(blob)))
+
+
+class GameBusy(RuntimeError):
+    """The game stayed locked by another request; the client should retry later"""
+
+
+class GameStore(ABC):
+    """
+    Interface of a game-state backend
+
+    Supports the dict operations app.py needs (in, [], []=, del, len).
+    A simulator changed in place must be written back with put() (or
+    store[game_id] = simulator) so that other workers see the change,
+    with lock(game_id) held from the get() on.
+    """
+
+    # Whether several workers share the stored games
+    shared = False
+
+    def __init__(self):
+        self._evict_callbacks: List[Callable[[str], None]] = []
+        self._game_locks: Dict[str, List] = {}  # game_id -> [lock, requests holding or waiting]
+        self._game_locks_lock = threading.Lock()
+
+    @contextmanager
+    def lock(self, game_id: str):
+        """Hold the game against other requests of this worker while it is changed"""
+        with self._game_locks_lock:
+            entry = self._game_locks.setdefault(game_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._game_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._game_locks[game_id]
+
+    def on_evict(self, callback: Callable[[str], None]):
+        """Call callback(game_id) whenever the store evicts or expires a game"""
+        self._evict_callbacks.append(callback)
+
+    def _evicted(self, game_ids: Iterable[str]):
+        # Called outside the store's lock, callbacks may use the store
+        for game_id in game_ids:
+            for callback in self._evict_callbacks:
+                callback(game_id)
+
+    @abstractmethod
+    def get(self, game_id: str) -> Optional[FactorySimulator]:
+        ...
+
+    @abstractmethod
+    def put(self, game_id: str, simulator: FactorySimulator):
+        ...
+
+    @abstractmethod
+    def delete(self, game_id: str):
+        ...
+
+    @abstractmethod
+    def game_ids(self) -> Iterator[str]:
+        ...
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        """Approximate memory or disk footprint of the stored games"""
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.game_ids())
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.get(game_id) is not None
+
+    def __getitem__(self, game_id: str) -> FactorySimulator:
+        simulator = self.get(game_id)
+        if simulator is None:
+            raise KeyError(game_id)
+        return simulator
+
+    def __setitem__(self, game_id: str, simulator: FactorySimulator):
+        self.put(game_id, simulator)
+
+    def __delitem__(self, game_id: str):
+        self.delete(game_id)
+
+
+class MemoryGameStore(GameStore):
+    """In-process store with LRU eviction and TTL expiry"""
+
+    def __init__(self, max_games: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        super().__init__()
+        self.max_games = max_games
+        self.ttl = ttl
+        self._games: 'OrderedDict[str, Tuple[float, FactorySimulator]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id: str) -> Optional[FactorySimulator]:
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                return None
+            updated_at, simulator = entry
+            expired = time.time() - updated_at > self.ttl
+            if expired:
+                del self._games[game_id]
+            else:
+                self._games.move_to_end(game_id)
+        if expired:
+            self._evicted([game_id])
+            return None
+        return simulator
+
+    def put(self, game_id: str, simulator: FactorySimulator):
+        evicted = []
+        with self._lock:
+            self._games[game_id] = (time.time(), simulator)
+            self._games.move_to_end(game_id)
+            while len(self._games) > self.max_games:
+                evicted.append(self._games.popitem(last=False)[0])
+        self._evicted(evicted)
+
+    def delete(self, game_id: str):
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def purge_expired(self, now: float = None) -> int:
+        """Drop all games that were not written within the TTL"""
+        now = now or time.time()
+        with self._lock:
+            expired = [game_id for game_id, (updated_at, _) in self._games.items()
+                       if now - updated_at > self.ttl]
+            for game_id in expired:
+                del self._games[game_id]
+        self._evicted(expired)
+        return len(expired)
+
+    def game_ids(self) -> Iterator[str]:
+        self.purge_expired()
+        with self._lock:
+            return iter(list(self._games))
+
+    def size_bytes(self) -> int:
+        """Bytes held by the quarter histories (the part that grows per game)"""
+        with self._lock:
+            simulators = [simulator for _, simulator in self._games.values()]
+        return sum(simulator.results.nbytes() for simulator in simulators)
+
+    def __len__(self) -> int:
+        self.purge_expired()
+        return len(self._games)
+
+
+class SQLiteGameStore(GameStore):
+    """
+    SQLite backed store shared by all workers on one host
+
+    Each row holds the compressed simulator state plus a version token.
+    Workers keep decoded simulators in a small LRU cache and only reload
+    a game when its version in the database has changed. Rows that were
+    not written for `ttl` seconds are purged.
+
+    lock(game_id) also takes a lease row in the database, so a game is
+    changed by one request of one worker at a time. A lease left by a
+    crashed worker is taken over after LOCK_LEASE seconds.
+
+    Every write, delete and purge is also numbered in a change table, so
+    that a worker can follow the games the others changed (changes()).
+    """
+
+    PURGE_INTERVAL = 60.0  # Seconds between TTL purges
+    LOCK_LEASE = 300.0  # Seconds a game lock is held at most (longer than any request)
+    LOCK_TIMEOUT = 30.0  # Seconds to wait for a game locked by another worker
+    LOCK_POLL = 0.01  # Seconds between attempts to take the lock
+    CHANGE_RETENTION = 3600.0  # Seconds changes() can look back
+
+    shared = True
+
+    def __init__(self, path: str, cache_size: int = 256, ttl: float = DEFAULT_TTL_SECONDS):
+        super().__init__()
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache: 'OrderedDict[str, Tuple[str, FactorySimulator]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS games ("
+                " game_id TEXT PRIMARY KEY,"
+                " version TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " state BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS games_updated_at ON games (updated_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS game_locks ("
+                " game_id TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS game_changes ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " game_id TEXT NOT NULL,"
+                " changed_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def lock(self, game_id: str):
+        """Hold the game against other requests of all workers while it is changed"""
+        with super().lock(game_id):
+            owner = uuid.uuid4().hex
+            deadline = time.time() + self.LOCK_TIMEOUT
+            conn = self._connection()
+            while True:
+                now = time.time()
+                with conn:
+                    taken = conn.execute(
+                        "INSERT INTO game_locks (game_id, owner, expires_at) VALUES (?, ?, ?)"
+                        " ON CONFLICT (game_id) DO UPDATE SET"
+                        " owner = excluded.owner, expires_at = excluded.expires_at"
+                        " WHERE game_locks.expires_at < ?",
+                        (game_id, owner, now + self.LOCK_LEASE, now)
+                    ).rowcount
+                if taken:
+                    break
+                if now > deadline:
+                    raise GameBusy(f"Game {game_id} is locked by another request")
+                time.sleep(self.LOCK_POLL)
+            try:
+                yield
+            finally:
+                with conn:
+                    conn.execute("DELETE FROM game_locks WHERE game_id = ? AND owner = ?", (game_id, owner))
+
+    def get(self, game_id: str) -> Optional[FactorySimulator]:
+        with self._lock:
+            cached = self._cache.get(game_id)
+        cached_version = cached[0] if cached else None
+
+        # Only transfer the state blob when the cached copy is stale
+        row = self._connection().execute(
+            "SELECT version, updated_at, CASE WHEN version = ? THEN NULL ELSE state END"
+            " FROM games WHERE game_id = ?",
+            (cached_version, game_id)
+        ).fetchone()
+
+        if row is None or time.time() - row[1] > self.ttl:
+            if row is not None:
+                self.delete(game_id)
+                self._evicted([game_id])
+            with self._lock:
+                self._cache.pop(game_id, None)
+            return None
+
+        version, _, blob = row
+        if blob is None:
+            simulator = cached[1]
+        else:
+            simulator = decode_simulator(blob)
+        self._remember(game_id, version, simulator)
+        return simulator
+
+    def put(self, game_id: str, simulator: FactorySimulator):
+        version = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO games (game_id, version, updated_at, state) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (game_id) DO UPDATE SET"
+                " version = excluded.version, updated_at = excluded.updated_at, state = excluded.state",
+                (game_id, version, now, encode_simulator(simulator))
+            )
+            conn.execute("INSERT INTO game_changes (game_id, changed_at) VALUES (?, ?)", (game_id, now))
+        self._remember(game_id, version, simulator)
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self.purge_expired(now)
+
+    def delete(self, game_id: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+            conn.execute("INSERT INTO game_changes (game_id, changed_at) VALUES (?, ?)", (game_id, time.time()))
+        with self._lock:
+            self._cache.pop(game_id, None)
+
+    def purge_expired(self, now: float = None) -> int:
+        """Delete all games that were not written within the TTL"""
+        now = now or time.time()
+        self._last_purge = now
+        conn = self._connection()
+        with conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT game_id FROM games WHERE updated_at < ?", (now - self.ttl,)
+            )]
+            conn.executemany(
+                "DELETE FROM games WHERE game_id = ? AND updated_at < ?",
+                [(game_id, now - self.ttl) for game_id in expired]
+            )
+            conn.executemany(
+                "INSERT INTO game_changes (game_id, changed_at) VALUES (?, ?)",
+                [(game_id, now) for game_id in expired]
+            )
+            conn.execute("DELETE FROM game_changes WHERE changed_at < ?", (now - self.CHANGE_RETENTION,))
+        with self._lock:
+            for game_id in expired:
+                self._cache.pop(game_id, None)
+        self._evicted(expired)
+        return len(expired)
+
+    def changes(self, since: Optional[int]) -> Tuple[int, Optional[List[str]]]:
+        """
+        Games written, deleted or purged by any worker after change `since`
+
+        Returns:
+            (number of the last change, changed game ids in order); the ids
+            are None when since is None or changes after it were already
+            dropped (older than CHANGE_RETENTION), i.e. the caller has to
+            look at all games
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'game_changes'").fetchone()
+        last = row[0] if row else 0
+        if since is None:
+            return last, None
+        rows = conn.execute(
+            "SELECT seq, game_id FROM game_changes WHERE seq > ? AND seq <= ? ORDER BY seq", (since, last)
+        ).fetchall()
+        # Changes are numbered without gaps and dropped oldest first
+        if last > since and (not rows or rows[0][0] != since + 1):
+            return last, None
+        return last, [game_id for _, game_id in rows]
+
+    def game_ids(self) -> Iterator[str]:
+        cutoff = time.time() - self.ttl
+        rows = self._connection().execute(
+            "SELECT game_id FROM games WHERE updated_at >= ?", (cutoff,)
+        ).fetchall()
+        return (row[0] for row in rows)
+
+    def size_bytes(self) -> int:
+        """Size of the database file (without the WAL)"""
+        conn = self._connection()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def __len__(self) -> int:
+        cutoff = time.time() - self.ttl
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM games WHERE updated_at >= ?", (cutoff,)
+        ).fetchone()[0]
+
+    def _remember(self, game_id: str, version: str, simulator: FactorySimulator):
+        """Insert into the in-worker LRU cache"""
+        with self._lock:
+            self._cache[game_id] = (version, simulator)
+            self._cache.move_to_end(game_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def create_game_store(url: str = None, options: Dict = None) -> GameStore:
+    """
+    Create a game store from a URL
+
+    Args:
+        url: "memory://" or "sqlite:///relative.db" / "sqlite:////absolute.db"
+             (defaults to the GAME_STORE_URL environment variable)
+        options: Overrides for cache size and TTL (defaults to
+                 GAME_STORE_CACHE_SIZE / GAME_STORE_TTL environment variables)
+    """
+    url = url or os.environ.get('GAME_STORE_URL', 'memory://')
+    options = options or {}
+    cache_size = int(options.get('cache_size', os.environ.get('GAME_STORE_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+    ttl = float(options.get('ttl', os.environ.get('GAME_STORE_TTL', DEFAULT_TTL_SECONDS)))
+
+    if url.startswith('memory://'):
+        return MemoryGameStore(max_games=cache_size, ttl=ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteGameStore(url[len('sqlite:///'):], cache_size=cache_size, ttl=ttl)
+    raise ValueError(f"Unsupported GAME_STORE_URL: {url}")
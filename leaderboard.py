@@ -0,0 +1,268 @@
+"""
+Live leaderboards for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+Ranks games by the get_summary() figures instructors care about (net
+profit, final cash, return on sales). Every ranking is a sorted index
+(an indexable skip list) that is updated when a game finishes a quarter:
+- update a game: O(log n) per metric
+- top k / one page of k entries: O(log n + k)
+- rank of one game: O(log n)
+
+There is one board for all games and one per market session.
+
+The boards live in the process that records the quarters. The app
+removes games the store evicts or expires (GameStore.on_evict). With a
+single worker the boards are therefore always exact. When several
+workers share a SQLite store, each worker records its own quarters and,
+before serving a board, moves the games the other workers wrote since
+(SQLiteGameStore.changes()); synced_to remembers the last change applied.
+Only a worker that has fallen behind the store's retained changes
+rebuilds its boards from all games (rebuild()).
+
+Game ids are ranked as strings (ties are broken by id).
+"""
+
+import random
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+METRICS = ('total_net_profit', 'final_cash', 'return_on_sales')
+
+_MAX_LEVELS = 32
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional['_Node']] = [None] * levels
+        self.width: List[int] = [1] * levels  # Bottom-level steps spanned by each link
+
+
+class SortedIndex:
+    """
+    Indexable skip list of unique, comparable keys (ascending)
+
+    Links carry their width, so positions can be found in O(log n)
+    expected time, which makes ranks and pagination cheap.
+    """
+
+    def __init__(self):
+        self._head = _Node(None, _MAX_LEVELS)
+        self._size = 0
+        self._levels = 1  # Levels in use; links above are set up when first needed
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _random_levels() -> int:
+        """Geometric distribution: one more level with probability 1/2"""
+        bits = random.getrandbits(_MAX_LEVELS - 1)
+        levels = 1
+        while bits & 1:
+            levels += 1
+            bits >>= 1
+        return levels
+
+    def _predecessors(self, key) -> Tuple[List[_Node], List[int]]:
+        """Last node before `key` on every level and the position of that node"""
+        chain = [self._head] * _MAX_LEVELS
+        positions = [0] * _MAX_LEVELS
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        chain, positions = self._predecessors(key)
+        levels = self._random_levels()
+        for level in range(self._levels, levels):
+            self._head.width[level] = self._size + 1  # Head links straight to the end
+        self._levels = max(self._levels, levels)
+        node = _Node(key, levels)
+        position = positions[0] + 1  # Position of the new node (1-based, head = 0)
+        for level in range(levels):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            span = position - positions[level]  # Steps from the predecessor to the new node
+            node.width[level] = previous.width[level] - span + 1
+            previous.width[level] = span
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._predecessors(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), self._levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key) -> int:
+        """0-based position of a key"""
+        chain, positions = self._predecessors(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def slice(self, start: int, count: int) -> Iterator:
+        """Up to `count` keys from position `start` on"""
+        if start >= self._size or count <= 0:
+            return
+        node, remaining = self._head, start + 1
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        for _ in range(count):
+            if node is None:
+                return
+            yield node.key
+            node = node.next[0]
+
+    def __iter__(self) -> Iterator:
+        return self.slice(0, self._size)
+
+
+class Leaderboard:
+    """Rankings of a set of games, one sorted index per metric"""
+
+    def __init__(self, metrics: Tuple[str, ...] = METRICS):
+        self.metrics = metrics
+        self._indexes: Dict[str, SortedIndex] = {metric: SortedIndex() for metric in metrics}
+        self._entries: Dict[str, Dict] = {}  # str(game_id) -> summary values on the board
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, game_id) -> bool:
+        return str(game_id) in self._entries
+
+    @staticmethod
+    def _key(value: float, game_id: str) -> Tuple:
+        return (-value, game_id)  # Best first, ties by game id
+
+    def update(self, game_id, summary: Dict):
+        """Insert or move a game (summary as returned by get_summary)"""
+        game_id = str(game_id)
+        if game_id in self._entries:
+            self.remove(game_id)
+        entry = {metric: summary[metric] for metric in self.metrics}
+        entry['quarters_played'] = summary.get('quarters_played', 0)
+        for metric, index in self._indexes.items():
+            index.insert(self._key(entry[metric], game_id))
+        self._entries[game_id] = entry
+
+    def remove(self, game_id):
+        game_id = str(game_id)
+        entry = self._entries.pop(game_id, None)
+        if entry is not None:
+            for metric, index in self._indexes.items():
+                index.remove(self._key(entry[metric], game_id))
+
+    def page(self, metric: str, offset: int = 0, limit: int = 10) -> List[Dict]:
+        """Entries ranked offset+1 .. offset+limit by one metric"""
+        entries = []
+        for rank, (_, game_id) in enumerate(self._indexes[metric].slice(offset, limit), start=offset + 1):
+            entry = self._entries[game_id]
+            entries.append({
+                'rank': rank,
+                'game_id': game_id,
+                'value': entry[metric],
+                'quarters_played': entry['quarters_played']
+            })
+        return entries
+
+    def top(self, metric: str, k: int = 10) -> List[Dict]:
+        return self.page(metric, 0, k)
+
+    def rank(self, game_id, metric: str) -> Optional[int]:
+        """1-based rank of a game, None if it is not on the board"""
+        game_id = str(game_id)
+        entry = self._entries.get(game_id)
+        if entry is None:
+            return None
+        return self._indexes[metric].index(self._key(entry[metric], game_id)) + 1
+
+
+class LeaderboardService:
+    """The board of all games (session None) plus one board per market session"""
+
+    def __init__(self, metrics: Tuple[str, ...] = METRICS):
+        self.metrics = metrics
+        self._boards: Dict[Optional[str], Leaderboard] = {None: Leaderboard(metrics)}
+        self._lock = threading.Lock()
+        self.synced_to: Optional[int] = None  # Last change of a shared game store applied to the boards
+
+    def record(self, game_id: str, summary: Dict, session_id: str = None):
+        """Update the game's rankings after a quarter (empty summary: remove it)"""
+        with self._lock:
+            boards = [self._boards[None]]
+            if session_id is not None:
+                board = self._boards.get(session_id)
+                if board is None:
+                    board = self._boards[session_id] = Leaderboard(self.metrics)
+                boards.append(board)
+            for board in boards:
+                if summary:
+                    board.update(game_id, summary)
+                else:
+                    board.remove(game_id)
+
+    def remove(self, game_id: str):
+        with self._lock:
+            for board in self._boards.values():
+                board.remove(game_id)
+
+    def rebuild(self, games: Iterable[Tuple[str, Dict, Optional[str]]]):
+        """Replace all boards by the given (game_id, summary, session_id) entries"""
+        boards = {None: Leaderboard(self.metrics)}
+        for game_id, summary, session_id in games:
+            boards[None].update(game_id, summary)
+            if session_id is not None:
+                if session_id not in boards:
+                    boards[session_id] = Leaderboard(self.metrics)
+                boards[session_id].update(game_id, summary)
+        with self._lock:
+            self._boards = boards
+
+    def drop_session(self, session_id: str):
+        with self._lock:
+            self._boards.pop(session_id, None)
+
+    def page(self, metric: str, offset: int = 0, limit: int = 10,
+             session_id: str = None) -> Tuple[int, List[Dict]]:
+        """(number of ranked games, entries of the requested page)"""
+        if metric not in self.metrics:
+            raise ValueError(f"Unknown metric: {metric}")
+        with self._lock:
+            leaderboard = self._boards.get(session_id)
+            if leaderboard is None:
+                return 0, []
+            return len(leaderboard), leaderboard.page(metric, offset, limit)
+
+    def ranks(self, game_id: str, session_id: str = None) -> Dict[str, Optional[int]]:
+        """Rank of one game for every metric"""
+        with self._lock:
+            leaderboard = self._boards.get(session_id)
+            if leaderboard is None:
+                return dict.fromkeys(self.metrics)
+            return {metric: leaderboard.rank(game_id, metric) for metric in self.metrics}
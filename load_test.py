@@ -0,0 +1,145 @@
+"""
+Load test for the Factory Business Simulation
+Measures the latency of /api/simulate_quarter (p50/p95/p99) while
+concurrent Excel exports of long games load the server. With --compare
+the same run is made without (OFFLOAD_WORKERS=0) and with the exports
+offloaded to the process pool (offload.py).
+
+Usage:
+    python load_test.py                      # In-process server (werkzeug, threaded)
+    python load_test.py --compare            # Compare without / with the offload pool
+    python load_test.py --url http://localhost:8000 --duration 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Dict, List
+
+
+def request(base_url: str, method: str, path: str, body: Dict = None) -> bytes:
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=300) as response:
+        return response.read()
+
+
+def start_local_server() -> str:
+    """Serve app.py from a threaded werkzeug server on a free port"""
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No access log per request
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def run_load(base_url: str, duration: float, players: int, exporters: int, export_quarters: int) -> Dict:
+    """
+    players threads play quarters while exporters threads keep exporting
+    games of export_quarters quarters (one new quarter before every
+    export, so the report cache never answers)
+    """
+    for i in range(exporters):
+        game_id = f"load-export-{i}"
+        request(base_url, 'POST', '/api/start_game', {'game_id': game_id})
+        request(base_url, 'POST', '/api/simulate_quarters',
+                {'game_id': game_id, 'decisions': [{'sales_price': 12.5}] * export_quarters})
+    for i in range(players):
+        request(base_url, 'POST', '/api/start_game', {'game_id': f"load-play-{i}"})
+
+    latencies: List[float] = []
+    exports: List[float] = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def play(game_id: str):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            request(base_url, 'POST', '/api/simulate_quarter', {'game_id': game_id, 'sales_price': 12.5})
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)  # Think time between a player's quarters
+
+    def export(game_id: str):
+        while time.perf_counter() < stop:
+            request(base_url, 'POST', '/api/simulate_quarter', {'game_id': game_id})
+            start = time.perf_counter()
+            request(base_url, 'GET', f"/api/export_excel?game_id={game_id}")
+            with lock:
+                exports.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=play, args=(f"load-play-{i}",)) for i in range(players)]
+    threads += [threading.Thread(target=export, args=(f"load-export-{i}",)) for i in range(exporters)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ms = [value * 1000 for value in latencies]
+    return {
+        'simulate_quarter_requests': len(ms),
+        'p50_ms': round(percentile(ms, 50), 2),
+        'p95_ms': round(percentile(ms, 95), 2),
+        'p99_ms': round(percentile(ms, 99), 2),
+        'max_ms': round(max(ms), 2),
+        'exports': len(exports),
+        'export_median_ms': round(statistics.median(exports) * 1000, 2) if exports else None
+    }
+
+
+def print_result(label: str, result: Dict):
+    print(f"{label:<22} requests {result['simulate_quarter_requests']:>6}  "
+          f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+          f"p99 {result['p99_ms']:>8.2f} ms  max {result['max_ms']:>8.2f} ms  "
+          f"exports {result['exports']:>4} (median {result['export_median_ms']} ms)")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Server to test (default: start app.py in-process)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load")
+    parser.add_argument('--players', type=int, default=8, help="Threads playing quarters")
+    parser.add_argument('--exporters', type=int, default=2, help="Threads exporting workbooks")
+    parser.add_argument('--export-quarters', type=int, default=400, help="Quarters of the exported games")
+    parser.add_argument('--compare', action='store_true',
+                        help="Run the in-process server without and with the offload pool")
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        passthrough = ['--duration', str(args.duration), '--players', str(args.players),
+                       '--exporters', str(args.exporters), '--export-quarters', str(args.export_quarters), '--json']
+        for label, workers in (('inline (0 workers)', '0'), ('offload pool', os.environ.get('OFFLOAD_WORKERS', ''))):
+            env = dict(os.environ, OFFLOAD_WORKERS=workers) if workers else {
+                k: v for k, v in os.environ.items() if k != 'OFFLOAD_WORKERS'
+            }
+            output = subprocess.run([sys.executable, __file__] + passthrough, env=env,
+                                    check=True, capture_output=True, text=True).stdout
+            print_result(label, json.loads(output.strip().splitlines()[-1]))
+        return 0
+
+    base_url = args.url or start_local_server()
+    result = run_load(base_url, args.duration, args.players, args.exporters, args.export_quarters)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_result(args.url or 'in-process', result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Multiplayer market for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+The teams of a session sell into one shared market instead of competing
+against the static GameParameters.competitor_price. Every quarter each
+team submits its decisions; once all teams have submitted, the market is
+cleared in one vectorized step and each team's FactorySimulator
+simulates the quarter with the demand allocated to it.
+
+Market clearing (allocate_demand):
+- Price and marketing effect per team as in calculate_demand
+- Competitive factor from the price rank within the session (one
+  O(n log n) sort): cheapest 1.15, most expensive 0.85, equal prices
+  share their rank
+- Market volume: market_demand_base per team, scaled by the teams'
+  price and marketing effects
+- The volume is split in proportion to each team's attractiveness
+  (price effect x marketing effect x competitive factor) and rounded
+  to whole lots with the largest-remainder method; as in the single
+  player game every team gets at least 1 lot
+
+A session with a single team behaves exactly like the single player game.
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from factory_simulator import FactorySimulator, GameParameters, QuarterResult, compute_demand
+
+
+# Competitive factor of the cheapest / most expensive team
+CHEAPEST_FACTOR = 1.15
+MOST_EXPENSIVE_FACTOR = 0.85
+
+
+def price_ranks(prices: np.ndarray) -> np.ndarray:
+    """
+    Relative price rank of every team: 0.0 = cheapest, 1.0 = most expensive
+
+    Equal prices get the average of their ranks. Sorting dominates, so
+    this is O(n log n) instead of comparing all pairs of teams.
+    """
+    n = len(prices)
+    if n < 2:
+        return np.full(n, 0.5)
+    unique, inverse, counts = np.unique(prices, return_inverse=True, return_counts=True)
+    first = np.cumsum(counts) - counts
+    average_rank = first + (counts - 1) / 2.0
+    return average_rank[inverse] / (n - 1)
+
+
+def allocate_demand(params: GameParameters, prices: Sequence[float], marketing: Sequence[float]) -> np.ndarray:
+    """
+    Lots demanded from each team of a shared market
+
+    Args:
+        params: Market parameters of the session
+        prices: Sales price per team
+        marketing: Marketing budget per team
+
+    Returns:
+        Integer demand per team, in input order
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    marketing = np.asarray(marketing, dtype=np.float64)
+    if len(prices) == 1:
+        return np.array([compute_demand(params, prices[0], marketing[0])], dtype=np.int64)
+
+    price_effect = np.maximum(0.0, 1.0 - (prices / params.base_sales_price - 1.0) * params.price_elasticity)
+    marketing_effect = 1.0 + marketing * params.marketing_effectiveness
+    competitive = CHEAPEST_FACTOR - (CHEAPEST_FACTOR - MOST_EXPENSIVE_FACTOR) * price_ranks(prices)
+
+    effect = price_effect * marketing_effect
+    attractiveness = effect * competitive
+    volume = params.market_demand_base * effect.sum()
+    total = attractiveness.sum()
+    if total <= 0:
+        return np.ones(len(prices), dtype=np.int64)
+
+    # Largest-remainder rounding: the lots add up to the rounded market volume
+    exact = volume * attractiveness / total
+    lots = np.floor(exact).astype(np.int64)
+    missing = int(round(volume)) - int(lots.sum())
+    if missing > 0:
+        order = np.argsort(-(exact - lots), kind='stable')
+        lots[order[:missing]] += 1
+    return np.maximum(lots, 1)
+
+
+class MarketSession:
+    """
+    Teams playing in one shared market
+
+    Each team has its own FactorySimulator (all share the session's
+    parameters). A quarter is resolved as soon as the last team submits.
+    """
+
+    def __init__(self, session_id: str, team_ids: Sequence[str], params: GameParameters = None):
+        if not team_ids:
+            raise ValueError("A session needs at least one team")
+        if len(set(team_ids)) != len(team_ids):
+            raise ValueError("Team ids must be unique")
+        self.session_id = session_id
+        self.params = params or GameParameters()
+        self.teams: Dict[str, FactorySimulator] = {
+            team_id: FactorySimulator(self.params) for team_id in team_ids
+        }
+        self.quarter = 0
+        self.pending: Dict[str, Dict] = {}
+        # (decisions, allocated demand) per team of the last resolved quarter
+        self.last_quarter: Dict[str, Tuple[Dict, int]] = {}
+        self._lock = threading.Lock()
+
+    def waiting_for(self) -> List[str]:
+        """Teams that have not submitted the current quarter yet"""
+        return [team_id for team_id in self.teams if team_id not in self.pending]
+
+    def submit(self, team_id: str, decisions: Dict) -> Optional[Dict[str, QuarterResult]]:
+        """
+        Submit (or replace) a team's decisions for the current quarter
+
+        Args:
+            decisions: simulate_quarter keyword arguments (without demand)
+
+        Returns:
+            The results of all teams if this submission resolved the
+            quarter, otherwise None
+        """
+        if team_id not in self.teams:
+            raise KeyError(team_id)
+        with self._lock:
+            self.pending[team_id] = decisions
+            if len(self.pending) < len(self.teams):
+                return None
+            return self._resolve()
+
+    def _resolve(self) -> Dict[str, QuarterResult]:
+        team_ids = list(self.teams)
+        base_price = self.params.base_sales_price
+        prices = [self.pending[t].get('sales_price') for t in team_ids]
+        prices = [base_price if price is None else price for price in prices]  # An explicit 0.0 stays 0.0
+        marketing = [self.pending[t].get('marketing_budget', 0.0) for t in team_ids]
+        demand = allocate_demand(self.params, prices, marketing)
+
+        results = {}
+        self.last_quarter = {}
+        for team_id, price, lots in zip(team_ids, prices, demand):
+            decisions = dict(self.pending[team_id], sales_price=price)
+            results[team_id] = self.teams[team_id].simulate_quarter(demand=int(lots), **decisions)
+            self.last_quarter[team_id] = (decisions, int(lots))
+        self.pending.clear()
+        self.quarter += 1
+        return results
+
+
+class SessionRegistry:
+    """Market sessions of this process, with a lookup from team game to session"""
+
+    def __init__(self):
+        self._sessions: Dict[str, MarketSession] = {}
+        self._session_of_game: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, session_id: str, team_ids: Sequence[str], params: GameParameters = None) -> MarketSession:
+        with self._lock:
+            if session_id in self._sessions:
+                raise ValueError(f"Session already exists: {session_id}")
+            taken = [t for t in team_ids if t in self._session_of_game]
+            if taken:
+                raise ValueError(f"Games already belong to a session: {', '.join(taken)}")
+            session = MarketSession(session_id, team_ids, params)
+            self._sessions[session_id] = session
+            for team_id in team_ids:
+                self._session_of_game[team_id] = session_id
+            return session
+
+    def get(self, session_id: str) -> Optional[MarketSession]:
+        return self._sessions.get(session_id)
+
+    def session_for_game(self, game_id: str) -> Optional[MarketSession]:
+        session_id = self._session_of_game.get(game_id)
+        return self._sessions.get(session_id) if session_id is not None else None
+
+    def delete(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                for team_id in session.teams:
+                    self._session_of_game.pop(team_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
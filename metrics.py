@@ -0,0 +1,174 @@
+"""
+Timing instrumentation and Prometheus metrics
+Planspiel BWL für BDE - WiSe 2025/26
+
+Hot paths are wrapped in `with metrics.stage("simulate"):` blocks. The
+app sets the current endpoint per request, so every stage is recorded
+in a histogram labelled (endpoint, stage); the whole request is
+recorded as stage "total". /metrics renders all histograms plus gauges
+(live games, store size, ...) in the Prometheus text format.
+
+Enable with METRICS_ENABLED=1. When disabled, stage() returns a shared
+no-op context manager, so instrumented code pays one attribute check.
+
+Stages timed in an offload worker process would land in that process's
+registry, which /metrics never reads. Jobs therefore time their stages
+inside `with metrics.capture() as timings:` and return the timings with
+their result; the request worker records them with metrics.record().
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Tuple
+
+
+# Upper bounds in seconds (Prometheus client defaults, plus finer steps below 5 ms)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NO_OP = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _Stage:
+    """Context manager timing one stage of the current request"""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry: 'Metrics', name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        captured = getattr(self.registry._local, 'captured', None)
+        if captured is not None:
+            captured[self.name] = captured.get(self.name, 0.0) + seconds
+        else:
+            self.registry.observe(self.registry.current_endpoint(), self.name, seconds)
+        return False
+
+
+class Metrics:
+    """Registry of stage histograms and gauge callbacks"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._gauges: List[Tuple[str, str, Callable[[], float]]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ------------------------------------------
+    # Recording
+    # ------------------------------------------
+
+    def set_endpoint(self, endpoint: str):
+        """Label for the stages recorded by this thread until the next call"""
+        self._local.endpoint = endpoint
+
+    def current_endpoint(self) -> str:
+        return getattr(self._local, 'endpoint', 'none')
+
+    def stage(self, name: str):
+        """Time a block as a stage of the current endpoint (no-op when disabled)"""
+        if not self.enabled:
+            return _NO_OP
+        return _Stage(self, name)
+
+    def observe(self, endpoint: str, stage: str, seconds: float):
+        key = (endpoint, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def capture(self):
+        """Collect the stages timed by this thread into a dict {stage: seconds} instead of recording them"""
+        previous = getattr(self._local, 'captured', None)
+        self._local.captured = captured = {}
+        try:
+            yield captured
+        finally:
+            self._local.captured = previous
+
+    def record(self, timings: Dict[str, float]):
+        """Record stages captured elsewhere (e.g. in an offload worker) for the current endpoint"""
+        endpoint = self.current_endpoint()
+        for stage, seconds in timings.items():
+            self.observe(endpoint, stage, seconds)
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Register a gauge read at scrape time"""
+        self._gauges.append((name, help_text, read))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # ------------------------------------------
+    # Exposition
+    # ------------------------------------------
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP factory_stage_duration_seconds Duration of request stages",
+            "# TYPE factory_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(self._histograms.items())]
+        for (endpoint, stage), counts, total, count in histograms:
+            labels = f'endpoint="{_escape(endpoint)}",stage="{_escape(stage)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'factory_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'factory_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'factory_stage_duration_seconds_sum{{{labels}}} {total!r}')
+            lines.append(f'factory_stage_duration_seconds_count{{{labels}}} {count}')
+
+        for name, help_text, read in self._gauges:
+            try:
+                value = float(read())
+            except Exception:  # A failing gauge must not break the scrape
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value!r}")
+        lines.append("# HELP factory_metrics_enabled Whether stage timing is enabled")
+        lines.append("# TYPE factory_metrics_enabled gauge")
+        lines.append(f"factory_metrics_enabled {int(self.enabled)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry used by the app and the report builders
+metrics = Metrics(enabled=os.environ.get('METRICS_ENABLED', '0').lower() in ('1', 'true', 'yes'))
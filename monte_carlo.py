@@ -0,0 +1,246 @@
+"""
+Monte Carlo scenario runner for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+Plays one decision plan under many random market scenarios. Each seed
+draws its own material price and overhead factors per quarter and,
+optionally, a noisy market demand base and competitor price. Seeds are
+split into chunks, each chunk is simulated with the BatchSimulator in a
+worker process. While the chunks come in, progress summaries are
+yielded with the running means and approximate percentiles (P5/P50/P95
+of net profit and final cash) from a bounded QuantileSketch; the last
+summary's percentiles are exact, computed once over all runs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from batch_simulator import BatchSimulator
+from factory_simulator import GameParameters
+
+
+PERCENTILES = (5, 50, 95)
+SKETCH_POINTS = 512  # Weighted values a QuantileSketch keeps
+
+# Random counters are seed * 2**20 + stream * 2**12 + index: the index of a
+# stream has 12 bits, and a stream of `size` values uses 2 * size indexes
+MAX_QUARTERS = (1 << 12) // 2
+
+
+@dataclass
+class MarketNoise:
+    """Standard deviations of the random market factors"""
+    material_market_sd: float = 0.10  # Material price factor per quarter, around 1.0
+    overhead_sd: float = 0.05  # Overhead factor per quarter, around 1.0
+    demand_base_sd: float = 0.0  # Relative noise on market_demand_base per game
+    competitor_price_sd: float = 0.0  # Absolute noise (M) on competitor_price per game
+    min_factor: float = 0.1  # Lower bound for all sampled factors
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: maps counters to well-mixed 64-bit integers"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _standard_normal(seeds: np.ndarray, stream: int, size: int) -> np.ndarray:
+    """
+    Counter-based standard normals of shape (len(seeds), size)
+
+    Every value depends only on (seed, stream, index), so a seed yields the
+    same scenario no matter which chunk or process simulates it, while
+    all seeds of a chunk are drawn in one vectorized step.
+    """
+    if size > MAX_QUARTERS:
+        raise ValueError(f"At most {MAX_QUARTERS} values per stream, got {size}")
+    index = np.arange(2 * size, dtype=np.uint64)
+    counters = (seeds.astype(np.uint64)[:, None] * np.uint64(1 << 20)
+                + np.uint64(stream << 12) + index[None, :])
+    bits = _splitmix64(_splitmix64(counters))
+    # 53 random bits -> uniform in (0, 1]
+    uniform = ((bits >> np.uint64(11)).astype(np.float64) + 1.0) / 9007199254740992.0
+    u1, u2 = uniform[:, :size], uniform[:, size:]
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)  # Box-Muller
+
+
+def sample_scenarios(seeds: Sequence[int], quarters: int, params: GameParameters, noise: MarketNoise) -> Dict:
+    """Draw the market scenarios of several seeds, one row per seed"""
+    seeds = np.asarray(seeds, dtype=np.int64)
+    floor = noise.min_factor
+    material = np.maximum(floor, 1.0 + noise.material_market_sd * _standard_normal(seeds, 0, quarters))
+    overhead = np.maximum(floor, 1.0 + noise.overhead_sd * _standard_normal(seeds, 1, quarters))
+    demand_factor = np.maximum(floor, 1.0 + noise.demand_base_sd * _standard_normal(seeds, 2, 1)[:, 0])
+    competitor_price = np.maximum(
+        floor, params.competitor_price + noise.competitor_price_sd * _standard_normal(seeds, 3, 1)[:, 0]
+    )
+    return {
+        'material_market_factor': material,
+        'overhead_factor': overhead,
+        'market_demand_base': params.market_demand_base * demand_factor,
+        'competitor_price': competitor_price
+    }
+
+
+def sample_scenario(seed: int, quarters: int, params: GameParameters, noise: MarketNoise) -> Dict:
+    """Draw the market scenario of one seed"""
+    scenario = sample_scenarios([seed], quarters, params, noise)
+    return {name: values[0] for name, values in scenario.items()}
+
+
+def run_chunk(params: Dict, plan: Sequence[Dict], noise: MarketNoise,
+              seeds: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulate the plan for a chunk of seeds (runs inside a worker process)
+
+    Returns:
+        (seeds, total net profit, final cash) arrays
+    """
+    params = GameParameters(**params)
+    scenarios = sample_scenarios(seeds, len(plan), params, noise)
+
+    batch = BatchSimulator(
+        len(seeds), params, keep_history=False,
+        overrides={
+            'market_demand_base': scenarios['market_demand_base'],
+            'competitor_price': scenarios['competitor_price']
+        }
+    )
+    material = scenarios['material_market_factor']
+    overhead = scenarios['overhead_factor']
+    for q, decision in enumerate(plan):
+        batch.simulate_quarter(
+            material_market_factor=material[:, q],
+            overhead_factor=overhead[:, q],
+            **decision
+        )
+    return np.asarray(seeds), batch.totals['total_net_profit'].copy(), batch.cash.copy()
+
+
+class QuantileSketch:
+    """
+    Approximate percentiles of a stream of value arrays in bounded memory
+
+    Keeps at most `size` weighted values. When more come in, all of them
+    are replaced by `size` equally weighted values at evenly spaced ranks
+    of the values seen so far, so every update sorts at most `size` plus
+    one chunk of values, however many runs came before.
+    """
+
+    def __init__(self, size: int = SKETCH_POINTS):
+        self.size = size
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+
+    def add(self, values: np.ndarray):
+        self.values = np.concatenate([self.values, np.asarray(values, dtype=np.float64)])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        if len(self.values) > self.size:
+            values, ranks = self._ranks()
+            total = self.weights.sum()
+            self.values = np.interp((np.arange(self.size) + 0.5) / self.size, ranks, values)
+            self.weights = np.full(self.size, total / self.size)
+
+    def _ranks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted values with the fraction of the weight below each value's middle"""
+        order = np.argsort(self.values, kind='stable')
+        values, weights = self.values[order], self.weights[order]
+        return values, (np.cumsum(weights) - weights / 2) / weights.sum()
+
+    def percentiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        values, ranks = self._ranks()
+        return np.interp(np.asarray(percentiles, dtype=np.float64) / 100.0, ranks, values)
+
+
+def summarize(net_profit: np.ndarray, final_cash: np.ndarray) -> Dict:
+    """Percentile summary of all runs"""
+    summary = {'runs': int(len(net_profit))}
+    for name, values in (('net_profit', net_profit), ('final_cash', final_cash)):
+        stats = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+        stats['mean'] = round(float(values.mean()), 2)
+        summary[name] = stats
+    return summary
+
+
+def _chunks(seeds: List[int], chunk_size: int) -> Iterator[List[int]]:
+    for i in range(0, len(seeds), chunk_size):
+        yield seeds[i:i + chunk_size]
+
+
+def run_monte_carlo(params: GameParameters = None,
+                    plan: Sequence[Dict] = None,
+                    seeds: Iterable[int] = range(1000),
+                    noise: MarketNoise = None,
+                    chunk_size: int = 1000,
+                    workers: int = None) -> Iterator[Dict]:
+    """
+    Run the scenarios and stream summaries
+
+    Args:
+        params: Game parameters (defaults to GameParameters())
+        plan: One dict of decisions per quarter (simulate_quarter keywords,
+              without the market factors); defaults to params.horizon standard quarters
+        seeds: Scenario seeds; the same seed always yields the same result
+        noise: Standard deviations of the market factors
+        chunk_size: Seeds per worker task
+        workers: Worker processes (None = all cores, 0 = run in-process)
+
+    Yields:
+        After every chunk but the last, progress over the finished chunks
+        in the summarize() format, with exact means and percentiles
+        approximated by a QuantileSketch; then the summarize() summary
+        over all seeds
+    """
+    params = params or GameParameters()
+    plan = list(plan) if plan is not None else [{}] * params.horizon
+    if len(plan) > MAX_QUARTERS:
+        raise ValueError(f"At most {MAX_QUARTERS} quarters per plan")
+    noise = noise or MarketNoise()
+    seeds = list(seeds)
+    param_dict = asdict(params)
+    chunk_count = len(range(0, len(seeds), chunk_size))
+
+    profits: List[np.ndarray] = []
+    cash: List[np.ndarray] = []
+    sums = {'net_profit': 0.0, 'final_cash': 0.0}
+    sketches = {'net_profit': QuantileSketch(), 'final_cash': QuantileSketch()}
+
+    def collect(result):
+        _, chunk_profit, chunk_cash = result
+        profits.append(chunk_profit)
+        cash.append(chunk_cash)
+        if len(profits) == chunk_count:
+            return summarize(np.concatenate(profits), np.concatenate(cash))
+        # Exact percentiles need all runs; until then the sketches' estimates
+        runs = sum(len(values) for values in profits)
+        progress = {'runs': runs}
+        for name, values in (('net_profit', chunk_profit), ('final_cash', chunk_cash)):
+            sums[name] += float(values.sum())
+            sketches[name].add(values)
+            stats = {f"p{p}": round(float(v), 2)
+                     for p, v in zip(PERCENTILES, sketches[name].percentiles(PERCENTILES))}
+            stats['mean'] = round(sums[name] / runs, 2)
+            progress[name] = stats
+        return progress
+
+    if workers == 0:
+        for chunk in _chunks(seeds, chunk_size):
+            yield collect(run_chunk(param_dict, plan, noise, chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_chunk, param_dict, plan, noise, chunk) for chunk in _chunks(seeds, chunk_size)]
+        for future in as_completed(futures):
+            yield collect(future.result())
+
+
+def monte_carlo_summary(**kwargs) -> Dict:
+    """Run all scenarios and return only the final summary"""
+    summary = {}
+    for summary in run_monte_carlo(**kwargs):
+        pass
+    return summary
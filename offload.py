@@ -0,0 +1,152 @@
+"""
+Offloading CPU-bound work from the request workers
+Planspiel BWL für BDE - WiSe 2025/26
+
+Building workbooks, long batch simulations and sensitivity sweeps hold
+the GIL for tens to hundreds of milliseconds. Run in the request worker,
+they stall every other request thread of that worker. Offloader.run()
+executes such a job in a bounded pool of worker processes instead; the
+request only waits for the result, which lets the server keep answering
+/api/simulate_quarter and other light requests in the meantime.
+
+Jobs receive plain data (e.g. simulator.to_state()), never live objects,
+and must be module-level functions so that they can be pickled.
+
+Configuration:
+- OFFLOAD_WORKERS: worker processes (default: CPU count, at most 4;
+  0 runs every job inline in the request worker)
+- OFFLOAD_MAX_PENDING: jobs running or queued at once (default 4 per
+  worker); further jobs are rejected with OffloadBusy (HTTP 503)
+- OFFLOAD_TIMEOUT: seconds a request waits for its job (default 120);
+  then OffloadTimeout is raised (HTTP 504). The job keeps its slot until
+  it has actually finished in the pool.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from factory_simulator import FactorySimulator
+from metrics import metrics
+
+
+class OffloadBusy(RuntimeError):
+    """All job slots are taken; the client should retry later"""
+
+
+class OffloadTimeout(RuntimeError):
+    """A job did not finish within the timeout"""
+
+
+class Offloader:
+    """Bounded process pool for CPU-bound request work"""
+
+    def __init__(self, workers: int = None, max_pending: int = None, timeout: float = 120.0):
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        self.workers = workers
+        self.max_pending = max_pending if max_pending is not None else 4 * max(workers, 1)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use in each process, i.e. after gunicorn has forked its workers
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def run(self, func: Callable, *args):
+        """Run func(*args) in a worker process and return its result"""
+        if self.workers == 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise OffloadBusy(f"{self.max_pending} jobs are already running")
+        try:
+            future = self._executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the job ends, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # Only succeeds while the job is still queued
+            raise OffloadTimeout(f"Job did not finish within {self.timeout} s") from None
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+def create_offloader() -> Offloader:
+    """Offloader configured by the OFFLOAD_* environment variables"""
+    workers = os.environ.get('OFFLOAD_WORKERS')
+    max_pending = os.environ.get('OFFLOAD_MAX_PENDING')
+    return Offloader(
+        workers=int(workers) if workers is not None else None,
+        max_pending=int(max_pending) if max_pending is not None else None,
+        timeout=float(os.environ.get('OFFLOAD_TIMEOUT', 120.0))
+    )
+
+
+# ==========================================
+# Jobs (run inside the worker processes)
+# ==========================================
+
+def streaming_workbook_bytes(state: Dict) -> Tuple[bytes, Dict[str, float]]:
+    """The write-only report of a game as xlsx bytes, with its stage timings for metrics.record()"""
+    from excel_report import write_report_streaming
+    with metrics.capture() as timings:
+        payload = write_report_streaming(FactorySimulator.from_state(state)).getvalue()
+    return payload, timings
+
+
+def template_workbook_bytes(state: Dict) -> Tuple[bytes, Dict[str, float]]:
+    """The report of a game filled into the worker's cached skeleton, as xlsx bytes, with its stage timings"""
+    from excel_report import write_report_template
+    with metrics.capture() as timings:
+        payload = write_report_template(FactorySimulator.from_state(state)).getvalue()
+    return payload, timings
+
+
+def save_workbook(state: Dict, filepath: str) -> str:
+    """Build the classic report of a game and save it to filepath"""
+    from excel_report import build_workbook
+    build_workbook(FactorySimulator.from_state(state)).save(filepath)
+    return filepath
+
+
+def play_plan(state: Dict, plan: Sequence[Dict]) -> Tuple[List[Tuple], Dict]:
+    """
+    Simulate quarters on a copy of a game
+
+    Args:
+        state: simulator.to_state(include_results=False); the past
+               quarters are not needed to play on
+
+    Returns:
+        (value tuples of the new quarters in RESULT_FIELDS order,
+         end state without results) for apply_plan_result
+    """
+    simulator = FactorySimulator.from_state(dict(state, results=[]))
+    for decisions in plan:
+        simulator.simulate_quarter(**decisions)
+    return list(simulator.results.rows()), simulator.to_state(include_results=False)
+
+
+def apply_plan_result(simulator: FactorySimulator, rows: List[Tuple], state: Dict):
+    """Append the quarters computed by play_plan to the live simulator"""
+    for values in rows:
+        simulator.results.append_row(values)
+    for name, value in state.items():
+        if name not in ('params', 'initial_state'):
+            setattr(simulator, name, value)
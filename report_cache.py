@@ -0,0 +1,86 @@
+"""
+Content-addressed cache for generated reports
+Planspiel BWL für BDE - WiSe 2025/26
+
+Reports (Excel workbooks, JSON exports) depend only on the game
+parameters and the quarter results. They are cached under
+"<kind>-<FactorySimulator.state_hash()>", which doubles as the HTTP
+ETag, so repeated downloads of an unchanged game skip the rebuild.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from factory_simulator import FactorySimulator
+
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def report_key(kind: str, simulator: FactorySimulator) -> str:
+    """Cache key / ETag of a report kind for the current game state"""
+    return f"{kind}-{simulator.state_hash()}"
+
+
+class ReportCache:
+    """LRU cache of report payloads, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return  # Never evict everything for a single oversized report
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = payload
+            self.current_bytes += len(payload)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def get_or_build(self, key: str, build: Callable[[], bytes]) -> Tuple[bytes, bool]:
+        """
+        Return (payload, cache_hit) and build the payload on a miss
+
+        Concurrent misses for the same key may build twice; both results
+        are identical, so the last one simply wins.
+        """
+        payload = self.get(key)
+        if payload is not None:
+            return payload, True
+        payload = build()
+        self.put(key, payload)
+        return payload, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def create_report_cache() -> ReportCache:
+    """Report cache sized by the REPORT_CACHE_BYTES environment variable"""
+    return ReportCache(int(os.environ.get('REPORT_CACHE_BYTES', DEFAULT_MAX_BYTES)))
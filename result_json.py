@@ -0,0 +1,121 @@
+"""
+JSON serialization of quarter results
+Planspiel BWL für BDE - WiSe 2025/26
+
+Builds the JSON payloads of the app straight from the ResultHistory
+columns: every quarter becomes one dict in RESULT_FIELDS order (or one
+array in the compact format), without dataclass views or asdict().
+Payloads are returned as UTF-8 bytes, encoded with orjson when it is
+installed and with the stdlib json module otherwise. Both give the same
+bytes: numpy scalars become plain numbers, NaN and infinity become null
+and floats are written in orjson's notation (0.00001, 1e16, 1e-7).
+
+Compact format (array of arrays), field names listed once:
+
+    {"fields": ["quarter", "material_purchase_lots", ...],
+     "rows": [[1, 2, ...], [2, 2, ...]]}
+"""
+
+import json
+import math
+from dataclasses import asdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from factory_simulator import RESULT_FIELDS, FactorySimulator, ResultHistory
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up, the stdlib encoder gives the same JSON
+    orjson = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+def _plain(value):
+    """numpy scalars as the Python numbers both encoders know"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _float_text(value: float) -> str:
+    """
+    A float as orjson writes it
+
+    null for NaN and infinity; otherwise the shortest repr, in decimal
+    notation from 1e-5 up to 1e16 and with a bare exponent outside.
+    """
+    if value != value or value in (math.inf, -math.inf):
+        return 'null'
+    text = float.__repr__(value)
+    if 'e' not in text:
+        return text
+    mantissa, exponent = text.split('e')
+    if exponent == '-05':  # repr switches to exponents below 1e-4, orjson below 1e-5
+        sign, digits = ('-', mantissa[1:]) if mantissa.startswith('-') else ('', mantissa)
+        return sign + '0.0000' + digits.replace('.', '')
+    return f'{mantissa}e{int(exponent)}'
+
+
+def _stdlib_dumps(data, indent: bool) -> str:
+    # The C encoder has no hook for the float notation, so this runs the
+    # pure Python one that json.JSONEncoder.iterencode falls back to
+    iterencode = json.encoder._make_iterencode(
+        {}, _plain, json.encoder.encode_basestring, '  ' if indent else None, _float_text,
+        ': ' if indent else ':', ',', False, False, True)
+    return ''.join(iterencode(data, 0))
+
+
+def dumps(data, indent: bool = False) -> bytes:
+    """UTF-8 encoded JSON of plain dicts, lists, strings and numbers"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_plain, option=orjson.OPT_INDENT_2 if indent else 0)
+    return _stdlib_dumps(data, indent).encode('utf-8')
+
+
+def quarter_dict(history: ResultHistory, index: int = -1, names: Sequence[str] = RESULT_FIELDS) -> Dict:
+    """One quarter as a dict in field order"""
+    row = history.row(index)
+    if names is RESULT_FIELDS:
+        return dict(zip(RESULT_FIELDS, row))
+    return dict(zip(names, (row[RESULT_FIELDS.index(name)] for name in names)))
+
+
+def history_rows(history: ResultHistory, names: Sequence[str] = RESULT_FIELDS,
+                 compact: bool = False):
+    """All quarters as a list of dicts, or in the compact format"""
+    if compact:
+        return {'fields': list(names), 'rows': [list(values) for values in history.rows(names)]}
+    return history.as_dicts(names)
+
+
+def quarter_bytes(history: ResultHistory, index: int = -1, names: Sequence[str] = RESULT_FIELDS) -> bytes:
+    return dumps(quarter_dict(history, index, names))
+
+
+def history_bytes(history: ResultHistory, names: Sequence[str] = RESULT_FIELDS,
+                  compact: bool = False) -> bytes:
+    return dumps(history_rows(history, names, compact))
+
+
+def export_bytes(simulator: FactorySimulator, compact: bool = False) -> bytes:
+    """
+    The JSON export (parameters, quarters, summary) as bytes
+
+    The regular export is indented like FactorySimulator.export_results;
+    the compact one stores the quarters as arrays and is not indented.
+    """
+    data = {
+        "parameters": asdict(simulator.params),
+        "quarters": history_rows(simulator.results, compact=compact),
+        "summary": simulator.get_summary()
+    }
+    return dumps(data, indent=not compact)
+
+
+def results_from_compact(data: Dict) -> List[Dict]:
+    """Inverse of the compact format: one dict per quarter"""
+    fields = data['fields']
+    return [dict(zip(fields, values)) for values in data['rows']]
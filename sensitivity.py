@@ -0,0 +1,170 @@
+"""
+Sensitivity analysis of the GameParameters
+Planspiel BWL für BDE - WiSe 2025/26
+
+Shows teachers how total net profit and final cash respond to each
+GameParameters field for a fixed decision plan (one factor at a time):
+
+- "tornado": every parameter is swept from -rel_step to +rel_step
+  around its value (`points` values); effects are the outputs at the
+  low and high end and their difference (swing). Parameters are sorted
+  by swing, largest first, as in a tornado chart.
+- "finite_difference": central differences with a small step; effects
+  are the derivative and the elasticity (% output change per % change
+  of the parameter).
+
+Parameters that are 0 are varied by +/- abs_step instead. Demand is
+rounded to whole lots, so very small steps may show no effect at all.
+
+All runs of a sweep are paths of one BatchSimulator (the varied field is
+a per-path override), so the 17 parameters at 3 points are a single
+vectorized run of 52 paths. Large sweeps can be split into chunks and
+simulated in worker processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from batch_simulator import PARAMETER_FIELDS, BatchSimulator
+from factory_simulator import GameParameters
+
+
+METHODS = ('tornado', 'finite_difference')
+OUTPUTS = ('total_net_profit', 'final_cash')
+
+
+def run_paths(params: Dict, plan: Sequence[Dict], overrides: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Simulate the plan for a batch of parameter variations (runs inside a worker process)
+
+    Returns:
+        Unrounded total net profit and final cash per path
+    """
+    n = len(next(iter(overrides.values()))) if overrides else 1
+    batch = BatchSimulator(n, GameParameters(**params), overrides=overrides, keep_history=False)
+    for decision in plan:
+        batch.simulate_quarter(**decision)
+    return {
+        'total_net_profit': batch.totals['total_net_profit'].copy(),
+        'final_cash': batch.cash.copy()
+    }
+
+
+def parameter_values(value: float, method: str, rel_step: float, abs_step: float, points: int) -> List[float]:
+    """Values tried for one parameter"""
+    delta = abs(value) * rel_step if value else abs_step
+    if method == 'finite_difference':
+        return [value - delta, value + delta]
+    return [float(v) for v in np.linspace(value - delta, value + delta, points)]
+
+
+def _split(overrides: Dict[str, np.ndarray], n: int, chunk_size: int) -> List[Dict[str, np.ndarray]]:
+    return [{name: values[i:i + chunk_size] for name, values in overrides.items()} for i in range(0, n, chunk_size)]
+
+
+def sensitivity_analysis(params: GameParameters = None,
+                         plan: Sequence[Dict] = None,
+                         parameters: Sequence[str] = PARAMETER_FIELDS,
+                         method: str = 'tornado',
+                         rel_step: float = None,
+                         abs_step: float = 0.01,
+                         points: int = 3,
+                         workers: int = 0,
+                         chunk_size: int = 4096) -> Dict:
+    """
+    One-factor-at-a-time sensitivity of net profit and cash
+
+    Args:
+        params: Game parameters around which to vary (defaults to GameParameters())
+        plan: One dict of decisions per quarter (simulate_quarter keywords);
+              defaults to params.horizon standard quarters
+        parameters: GameParameters fields to vary (default: all)
+        method: "tornado" or "finite_difference"
+        rel_step: Relative change of each parameter (default 0.1 for
+                  tornado, 0.01 for finite differences)
+        abs_step: Change of parameters whose value is 0
+        points: Values per parameter for tornado sweeps (at least 2)
+        workers: Worker processes for the chunks (0 = run in-process,
+                 None = all cores)
+        chunk_size: Paths per worker task
+
+    Returns:
+        {"method", "quarters", "base": {output: value},
+         "parameters": [{"parameter", "base_value", "values",
+                         "outputs": {output: [...]}, "effects": {output: {...}}}, ...]}
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    unknown = [name for name in parameters if name not in PARAMETER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown GameParameters fields: {unknown}")
+    if points < 2:
+        raise ValueError("A sweep needs at least 2 points")
+    params = params or GameParameters()
+    plan = list(plan) if plan is not None else [{}] * params.horizon
+    if rel_step is None:
+        rel_step = 0.01 if method == 'finite_difference' else 0.1
+    if not rel_step > 0 or not abs_step > 0:
+        raise ValueError("rel_step and abs_step must be positive")
+    base_params = asdict(params)
+
+    # Path 0 is the unchanged game, then the values of every parameter in turn
+    sweeps: List[Tuple[str, List[float]]] = [
+        (name, parameter_values(float(base_params[name]), method, rel_step, abs_step, points))
+        for name in parameters
+    ]
+    n = 1 + sum(len(values) for _, values in sweeps)
+    overrides = {name: np.full(n, float(base_params[name])) for name in parameters}
+    position = 1
+    for name, values in sweeps:
+        overrides[name][position:position + len(values)] = values
+        position += len(values)
+
+    if workers == 0 or n <= chunk_size:
+        outputs = run_paths(base_params, plan, overrides)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_paths, base_params, plan, chunk)
+                       for chunk in _split(overrides, n, chunk_size)]
+            parts = [future.result() for future in futures]
+        outputs = {key: np.concatenate([part[key] for part in parts]) for key in OUTPUTS}
+
+    base = {key: float(outputs[key][0]) for key in OUTPUTS}
+    rows = []
+    position = 1
+    for name, values in sweeps:
+        value = float(base_params[name])
+        row_outputs = {key: outputs[key][position:position + len(values)].tolist() for key in OUTPUTS}
+        position += len(values)
+
+        effects = {}
+        for key in OUTPUTS:
+            low, high = row_outputs[key][0], row_outputs[key][-1]
+            effect = {'low': low, 'high': high, 'swing': high - low}
+            if method == 'finite_difference':
+                # A step below the float resolution of a large value leaves both values equal
+                span = values[-1] - values[0]
+                derivative = (high - low) / span if span else None
+                effect['derivative'] = derivative
+                effect['elasticity'] = (
+                    derivative * value / base[key] if derivative is not None and value and base[key] else None
+                )
+            effects[key] = effect
+        rows.append({
+            'parameter': name,
+            'base_value': value,
+            'values': values,
+            'outputs': row_outputs,
+            'effects': effects
+        })
+
+    rows.sort(key=lambda row: abs(row['effects'][OUTPUTS[0]]['swing']), reverse=True)
+    return {
+        'method': method,
+        'quarters': len(plan),
+        'base': base,
+        'parameters': rows
+    }
@@ -0,0 +1,371 @@
+"""
+Strategy optimizer for the Factory game
+Planspiel BWL für BDE - WiSe 2025/26
+
+Searches price, marketing, production and material decisions over a
+horizon of several quarters to find the best achievable result for a
+parameter set (maximum total net profit or final cash). Candidates are
+evaluated with the vectorized BatchSimulator.
+
+Methods:
+- "grid": search over the decision grid, quarter by quarter, with
+  dominance pruning of price/marketing pairs and of paths reaching the
+  same inventories, plus memoized transitions per state
+- "coordinate": coordinate descent on a full plan, starting from the
+  grid result (or a given plan), one quarter and decision at a time
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch_simulator import BatchSimulator
+from factory_simulator import FactorySimulator, GameParameters
+
+
+OBJECTIVES = ('total_net_profit', 'final_cash')
+DECISION_KEYS = ('sales_price', 'marketing_budget', 'production_lots', 'material_purchase_lots')
+
+
+@dataclass
+class DecisionGrid:
+    """Values tried for every decision (defaults follow the web UI limits)"""
+    sales_prices: Sequence[float] = tuple(np.arange(10.0, 16.01, 0.5))
+    marketing_budgets: Sequence[float] = tuple(np.arange(0.0, 3.01, 0.5))
+    production_lots: Sequence[int] = (0, 1, 2, 3, 4, 5)
+    material_purchase_lots: Sequence[int] = (0, 1, 2, 3, 4, 5, 6)
+
+    def values(self, key: str) -> Sequence:
+        return {
+            'sales_price': self.sales_prices,
+            'marketing_budget': self.marketing_budgets,
+            'production_lots': self.production_lots,
+            'material_purchase_lots': self.material_purchase_lots
+        }[key]
+
+
+@dataclass
+class OptimizationResult:
+    """Best plan found and its replayed summary"""
+    plan: List[Dict]
+    objective: str
+    value: float
+    summary: Dict
+    method: str
+    evaluations: int = 0
+    history: List[float] = field(default_factory=list)
+
+
+def _price_marketing_pairs(grid: DecisionGrid, params: GameParameters) -> np.ndarray:
+    """
+    Price/marketing pairs that are not dominated
+
+    Demand depends only on price and marketing. Among pairs with the same
+    demand, a higher price and lower marketing spend is never worse, so
+    only the Pareto front per demand level is kept.
+    """
+    probe = FactorySimulator(params)
+    by_demand: Dict[int, List[Tuple[float, float]]] = {}
+    for price in grid.sales_prices:
+        for marketing in grid.marketing_budgets:
+            demand = probe.calculate_demand(float(price), float(marketing))
+            by_demand.setdefault(demand, []).append((float(price), float(marketing)))
+
+    pairs = []
+    for candidates in by_demand.values():
+        candidates.sort(key=lambda pm: (pm[1], -pm[0]))  # Cheapest marketing first
+        best_price = -np.inf
+        for price, marketing in candidates:
+            if price > best_price:
+                pairs.append((price, marketing))
+                best_price = price
+    return np.array(pairs)
+
+
+def _decision_table(grid: DecisionGrid, params: GameParameters) -> Dict[str, np.ndarray]:
+    """All combinations of the pruned price/marketing pairs and lot decisions"""
+    pairs = _price_marketing_pairs(grid, params)
+    production = np.asarray(grid.production_lots, dtype=np.int64)
+    material = np.asarray(grid.material_purchase_lots, dtype=np.int64)
+    pm_idx, prod_idx, mat_idx = np.meshgrid(
+        np.arange(len(pairs)), np.arange(len(production)), np.arange(len(material)), indexing='ij'
+    )
+    pm_idx, prod_idx, mat_idx = pm_idx.ravel(), prod_idx.ravel(), mat_idx.ravel()
+    return {
+        'sales_price': pairs[pm_idx, 0],
+        'marketing_budget': pairs[pm_idx, 1],
+        'production_lots': production[prod_idx],
+        'material_purchase_lots': material[mat_idx]
+    }
+
+
+INVENTORY_KEYS = ('raw_material_inventory', 'work_in_progress', 'finished_goods_inventory')
+
+
+class _TransitionMemo:
+    """
+    Memoized quarter transitions keyed on (state, decision)
+
+    Demand, costs, taxes and the next inventories depend only on the
+    inventories and the decision - never on cash or receivables. The memo
+    therefore keys on the inventory state and stores, for every decision,
+    the next inventories, the net profit and the quarter's cash effect.
+    States reached again (in the same or a later quarter) are free.
+    """
+
+    def __init__(self, params: GameParameters, decisions: Dict[str, np.ndarray], require_material: bool):
+        self.params = params
+        self.decisions = decisions
+        self.require_material = require_material
+        self.size = len(decisions['sales_price'])
+        self.cache: Dict[Tuple, Dict[str, np.ndarray]] = {}
+        self.evaluations = 0
+
+    def expand(self, states: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Outcomes of every decision for every inventory state
+
+        Args:
+            states: Integer array of shape (S, 3) in INVENTORY_KEYS order
+
+        Returns:
+            Arrays of shape (S, D): next inventories, net_profit,
+            sales_revenue, cash_costs and feasible
+        """
+        keys = [tuple(row) for row in states.tolist()]
+        missing = [i for i, key in enumerate(keys) if key not in self.cache]
+        if missing:
+            self._evaluate([keys[i] for i in missing], states[missing])
+        rows = [self.cache[key] for key in keys]
+        return {name: np.stack([row[name] for row in rows]) for name in rows[0]}
+
+    def _evaluate(self, keys: List[Tuple], states: np.ndarray):
+        d = self.size
+        batch = BatchSimulator(len(keys) * d, self.params, keep_history=False)
+        for column, key in enumerate(INVENTORY_KEYS):
+            getattr(batch, key)[:] = np.repeat(states[:, column], d)
+        raw_before = batch.raw_material_inventory.copy()
+
+        decisions = {name: np.tile(values, len(keys)) for name, values in self.decisions.items()}
+        result = batch.simulate_quarter(**decisions)
+        self.evaluations += batch.n
+
+        if self.require_material:
+            feasible = decisions['production_lots'] <= raw_before + decisions['material_purchase_lots']
+        else:
+            feasible = np.ones(batch.n, dtype=bool)
+
+        columns = {key: getattr(batch, key) for key in INVENTORY_KEYS}
+        columns.update({
+            'net_profit': result['net_profit'],
+            'sales_revenue': result['sales_revenue'],
+            'cash_costs': result['total_operating_cost'],
+            'feasible': feasible
+        })
+        for i, key in enumerate(keys):
+            part = slice(i * d, (i + 1) * d)
+            self.cache[key] = {name: values[part].copy() for name, values in columns.items()}
+
+
+def _initial_state(start: Optional[FactorySimulator], params: GameParameters) -> FactorySimulator:
+    return start if start is not None else FactorySimulator(params)
+
+
+def _grid_search(params: GameParameters, quarters: int, objective: str, grid: DecisionGrid,
+                 beam_width: Optional[int], require_material: bool,
+                 start: FactorySimulator) -> Tuple[List[Dict], int]:
+    """
+    Quarter-by-quarter search over the decision grid, returns (plan, evaluations)
+
+    Two paths that reach the same inventories face identical futures, so
+    only the better one is kept (higher net profit so far, or higher cash
+    plus outstanding receivables). Without a beam_width this pruning is
+    exact and the result is the optimum over the grid.
+    """
+    decisions = _decision_table(grid, params)
+    memo = _TransitionMemo(params, decisions, require_material)
+
+    states = np.array([[getattr(start, key) for key in INVENTORY_KEYS]], dtype=np.int64)
+    profit = np.zeros(1)
+    liquidity = np.array([start.cash + start.accounts_receivable])  # Cash incl. receivables
+    back_pointers = []  # Per quarter: (parent index, decision index) of every kept entry
+
+    for q in range(quarters):
+        outcome = memo.expand(states)
+        d = outcome['net_profit'].shape[1]
+        next_states = np.stack([outcome[key].ravel() for key in INVENTORY_KEYS], axis=1)
+        next_profit = (profit[:, None] + outcome['net_profit']).ravel()
+        next_liquidity = (liquidity[:, None] + outcome['sales_revenue'] - outcome['cash_costs']).ravel()
+
+        last = q == quarters - 1
+        if objective == 'total_net_profit':
+            score = next_profit.copy()
+        elif last:
+            # This quarter's revenue is still a receivable at the end
+            score = next_liquidity - outcome['sales_revenue'].ravel()
+        else:
+            score = next_liquidity.copy()
+        score[~outcome['feasible'].ravel()] = -np.inf
+
+        # Keep the best path into every distinct inventory state
+        order = np.argsort(-score, kind='stable')
+        order = order[np.isfinite(score[order])]
+        _, first = np.unique(next_states[order], axis=0, return_index=True)
+        keep = order[np.sort(first)]
+        if last:
+            keep = keep[:1]
+        elif beam_width:
+            keep = keep[:beam_width]
+
+        back_pointers.append((keep // d, keep % d))
+        states = next_states[keep]
+        profit = next_profit[keep]
+        liquidity = next_liquidity[keep]
+
+    # Follow the back pointers from the best final entry
+    plan = []
+    index = 0
+    for parents, choices in reversed(back_pointers):
+        choice = choices[index]
+        plan.append({key: decisions[key][choice].item() for key in DECISION_KEYS})
+        index = parents[index]
+    plan.reverse()
+    return plan, memo.evaluations
+
+
+class _PlanEvaluator:
+    """Evaluates full plans in one BatchSimulator run, memoized per plan"""
+
+    def __init__(self, params: GameParameters, objective: str, require_material: bool, start: FactorySimulator):
+        self.params = params
+        self.objective = objective
+        self.require_material = require_material
+        self.start = start
+        self.cache: Dict[bytes, float] = {}
+        self.evaluations = 0
+
+    def __call__(self, plans: np.ndarray) -> np.ndarray:
+        """plans: array of shape (N, quarters, 4) in DECISION_KEYS order"""
+        keys = [plan.tobytes() for plan in plans]
+        missing = [i for i, key in enumerate(keys) if key not in self.cache]
+        if missing:
+            todo = plans[missing]
+            batch = BatchSimulator.from_simulator(self.start, len(missing), keep_history=False)
+            feasible = np.ones(len(missing), dtype=bool)
+            for q in range(todo.shape[1]):
+                production = todo[:, q, 2].astype(np.int64)
+                material = todo[:, q, 3].astype(np.int64)
+                if self.require_material:
+                    feasible &= production <= batch.raw_material_inventory + material
+                batch.simulate_quarter(sales_price=todo[:, q, 0], marketing_budget=todo[:, q, 1],
+                                       production_lots=production, material_purchase_lots=material)
+            self.evaluations += len(missing) * todo.shape[1]
+            if self.objective == 'total_net_profit':
+                values = batch.totals['total_net_profit']
+            else:
+                values = batch.cash
+            values = np.where(feasible, values, -np.inf)
+            for i, value in zip(missing, values):
+                self.cache[keys[i]] = float(value)
+        return np.array([self.cache[key] for key in keys])
+
+
+def _coordinate_descent(params: GameParameters, plan: List[Dict], objective: str, grid: DecisionGrid,
+                        require_material: bool, start: FactorySimulator,
+                        max_rounds: int = 10) -> Tuple[List[Dict], int, List[float]]:
+    """Improve one (quarter, decision) coordinate at a time until no move helps"""
+    evaluate = _PlanEvaluator(params, objective, require_material, start)
+    current = np.array([[decision[key] for key in DECISION_KEYS] for decision in plan], dtype=np.float64)
+    best = evaluate(current[None])[0]
+    history = [best]
+
+    for _ in range(max_rounds):
+        improved = False
+        for q in range(len(current)):
+            for k, key in enumerate(DECISION_KEYS):
+                values = np.asarray(grid.values(key), dtype=np.float64)
+                candidates = np.repeat(current[None], len(values), axis=0)
+                candidates[:, q, k] = values
+                scores = evaluate(candidates)
+                i = int(np.argmax(scores))
+                if scores[i] > best + 1e-9:
+                    best = scores[i]
+                    current = candidates[i]
+                    improved = True
+        history.append(best)
+        if not improved:
+            break
+
+    new_plan = [
+        {
+            'sales_price': float(row[0]),
+            'marketing_budget': float(row[1]),
+            'production_lots': int(row[2]),
+            'material_purchase_lots': int(row[3])
+        }
+        for row in current
+    ]
+    return new_plan, evaluate.evaluations, history
+
+
+def optimize_strategy(params: GameParameters = None,
+                      quarters: int = 4,
+                      objective: str = 'total_net_profit',
+                      method: str = 'grid',
+                      grid: DecisionGrid = None,
+                      beam_width: Optional[int] = None,
+                      require_material: bool = True,
+                      start: FactorySimulator = None,
+                      initial_plan: List[Dict] = None) -> OptimizationResult:
+    """
+    Search the decision space for the best achievable plan
+
+    Args:
+        params: Game parameters (defaults to GameParameters())
+        quarters: Planning horizon, e.g. 4 or 8
+        objective: 'total_net_profit' or 'final_cash'
+        method: 'grid' (pruned grid search) or 'coordinate' (coordinate descent,
+                refining the grid result unless initial_plan is given)
+        grid: Decision values to search
+        beam_width: Optional cap on the states kept per quarter (None = exact)
+        require_material: Only allow producing lots that are in stock or bought
+        start: Optional running game to plan from (defaults to a new game)
+        initial_plan: Starting plan for coordinate descent
+
+    Returns:
+        OptimizationResult with the plan and the summary of replaying it
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}")
+    if method not in ('grid', 'coordinate'):
+        raise ValueError("method must be 'grid' or 'coordinate'")
+
+    params = start.params if start is not None else (params or GameParameters())
+    grid = grid or DecisionGrid()
+    start = _initial_state(start, params)
+    evaluations = 0
+    history: List[float] = []
+
+    plan = initial_plan
+    if plan is None:
+        plan, evaluations = _grid_search(params, quarters, objective, grid, beam_width, require_material, start)
+    if method == 'coordinate':
+        plan, extra, history = _coordinate_descent(params, plan, objective, grid, require_material, start)
+        evaluations += extra
+
+    # Replay with the scalar engine for an exact summary
+    replay = FactorySimulator.from_state(start.to_state())
+    for decision in plan:
+        replay.simulate_quarter(**decision)
+    summary = replay.get_summary()
+
+    return OptimizationResult(
+        plan=plan,
+        objective=objective,
+        value=summary[objective],
+        summary=summary,
+        method=method,
+        evaluations=evaluations,
+        history=history
+    )
@@ -0,0 +1,28 @@
+import os
+import sys
+
+# The modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Flask test client; exports land in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    import app
+    return app.app.test_client()
+
+
+@pytest.fixture
+def new_game(client):
+    """Start a game under a fresh id and return the id"""
+    import uuid
+
+    def start(**params):
+        game_id = f"test-{uuid.uuid4().hex[:8]}"
+        response = client.post('/api/start_game', json=dict(params, game_id=game_id))
+        assert response.status_code == 200
+        return game_id
+    return start
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from batch_simulator import BatchSimulator
+from factory_simulator import RESULT_FIELDS, FactorySimulator, GameParameters
+
+
+def test_from_simulator_continues_the_summary():
+    simulator = FactorySimulator(GameParameters(horizon=12))
+    for price in (12.0, 14.0, 11.0, 13.0, 15.0):
+        simulator.simulate_quarter(sales_price=price, production_lots=3)
+    plan = [dict(sales_price=13.5, production_lots=2, material_purchase_lots=2)] * 4
+
+    batch = BatchSimulator.from_simulator(simulator, 3, keep_history=False)
+    batch.run(plan)
+    for decisions in plan:
+        simulator.simulate_quarter(**decisions)
+
+    expected = simulator.get_summary()
+    summary = batch.get_summary()
+    for key, value in expected.items():
+        assert summary[key].tolist() == [value] * 3, key
+
+
+def random_plan(rng, n, quarters):
+    """Per-quarter decision columns for n paths, with round2 ties, empty stores and overdrafts"""
+    plan = []
+    for _ in range(quarters):
+        plan.append(dict(
+            sales_price=np.round(rng.uniform(5.0, 25.0, n), 3),
+            marketing_budget=np.round(rng.uniform(0.0, 3.0, n), 3) * rng.integers(0, 2, n),
+            production_lots=rng.integers(0, 7, n),
+            material_purchase_lots=rng.integers(0, 9, n) * rng.integers(0, 4, n),
+            # 3.0 M per lot * 1.0025 = 3.0075: material costs on a .5 tie at the second decimal
+            material_market_factor=rng.choice([1.0025, 1.0075, 0.9975, 1.0], n) * rng.choice([1.0, 1.1, 0.85], n),
+            overhead_factor=np.round(rng.uniform(0.5, 2.0, n), 2)
+        ))
+    return plan
+
+
+def test_random_plans_match_the_scalar_engine_row_by_row():
+    rng = np.random.default_rng(2025)
+    n, quarters = 64, 10
+    plan = random_plan(rng, n, quarters)
+    batch = BatchSimulator(n, GameParameters(horizon=quarters))
+    batch.run(plan)
+
+    seen = {'zero_sales': False, 'negative_cash': False}
+    for path in range(n):
+        simulator = FactorySimulator(GameParameters(horizon=quarters))
+        for q, decisions in enumerate(plan):
+            simulator.simulate_quarter(**{name: values[path].item() for name, values in decisions.items()})
+            row = simulator.results.row_dict(-1)
+            for name in RESULT_FIELDS:
+                assert batch.results[q][name][path] == row[name], (path, q, name)
+            seen['zero_sales'] |= row['sales_volume'] == 0
+            seen['negative_cash'] |= row['cash_ending'] < 0
+        for key, value in simulator.get_summary().items():
+            assert batch.get_summary()[key][path] == value, (path, key)
+    assert all(seen.values()), seen
+
+
+@pytest.mark.parametrize('lots', [2.5, [2, 2.5, 2], float('nan')])
+def test_fractional_lots_are_rejected_before_the_quarter(lots):
+    batch = BatchSimulator(3)
+    with pytest.raises(ValueError):
+        batch.simulate_quarter(production_lots=lots)
+    assert batch.current_quarter == 0
+    assert batch.cash.tolist() == [batch.cash[0]] * 3
+
+    result = batch.simulate_quarter(production_lots=[2.0, 3.0, 1.0], material_purchase_lots=True)
+    assert result['production_lots'].tolist() == [2, 3, 1]
+    assert result['material_purchase_lots'].tolist() == [1, 1, 1]
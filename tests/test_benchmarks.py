@@ -0,0 +1,18 @@
+"""
+The benchmark.py cases run through pytest-benchmark (skipped when it is not installed)
+
+They are marked slow and deselected by default (see pytest.ini); run
+them with: python -m pytest -m slow tests/test_benchmarks.py
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import benchmark as cases  # noqa: E402  (the fixture below is also called benchmark)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('name', list(cases.BENCHMARKS))
+def test_benchmark(benchmark, name):
+    benchmark(cases.BENCHMARKS[name]())
@@ -0,0 +1,27 @@
+import io
+
+from cohort_export import CohortReader, CohortWriter
+from factory_simulator import FactorySimulator, GameParameters
+
+
+def played(quarters):
+    simulator = FactorySimulator(GameParameters())
+    for _ in range(quarters):
+        simulator.simulate_quarter(sales_price=GameParameters().base_sales_price)
+    return simulator
+
+
+def test_session_change_flushes_the_partition():
+    buffer = io.BytesIO()
+    writer = CohortWriter(buffer, row_group_rows=1000)
+    writer.add_game('a1', played(2), 'A')
+    writer.add_game('a2', played(3), 'A')
+    writer.add_game('b1', played(1), 'B')
+    assert list(writer._partitions) == ['B']  # Session A was written when B started
+    writer.add_game('solo', played(2))
+    writer.close()
+
+    buffer.seek(0)
+    with CohortReader(buffer) as reader:
+        assert [(group['session_id'], group['rows']) for group in reader.row_groups] == [('A', 5), ('B', 1), ('', 2)]
+        assert reader.game_ids('A') == ['a1', 'a2']
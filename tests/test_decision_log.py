@@ -0,0 +1,92 @@
+"""Decision log: torn tails, recovery and replay"""
+
+import os
+
+import pytest
+
+from decision_log import DecisionLog, encode_quarter
+from factory_simulator import FactorySimulator, GameParameters
+
+
+DECISIONS = [
+    {'sales_price': 12.5, 'marketing_budget': 1.0, 'production_lots': 3, 'material_purchase_lots': 2},
+    {'sales_price': 13.5, 'production_lots': 2, 'material_purchase_lots': 3},
+    {'sales_price': None, 'marketing_budget': 0.5},
+    {'sales_price': 14.0, 'production_lots': 1, 'material_purchase_lots': 1},
+]
+
+
+def play(log, game_id, simulator, decisions):
+    for d in decisions:
+        simulator.simulate_quarter(**d)
+        log.quarter(game_id, d)
+
+
+def test_torn_tail_recover_append_replay(tmp_path):
+    log = DecisionLog(str(tmp_path))
+    params = GameParameters()
+    simulator = FactorySimulator(params)
+    log.start('g', params)
+    play(log, 'g', simulator, DECISIONS[:2])
+
+    # Crash in the middle of the third record
+    path = log._path('g')
+    log.quarter('g', DECISIONS[2])
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 20)
+
+    store = {}
+    assert log.recover(store) == 1
+    assert store['g'].to_state() == simulator.to_state()
+    assert os.path.getsize(path) == size - len(encode_quarter(DECISIONS[2]))
+
+    play(log, 'g', simulator, DECISIONS[2:])
+    assert log.replay('g').to_state() == simulator.to_state()
+
+
+def test_recover_skips_corrupt_log(tmp_path):
+    log = DecisionLog(str(tmp_path))
+    params = GameParameters()
+    log.start('good', params)
+    play(log, 'good', FactorySimulator(params), DECISIONS)
+    with open(log._path('bad'), 'wb') as f:
+        f.write(b'\x00garbage')
+
+    store = {}
+    assert log.recover(store) == 1
+    assert list(store) == ['good']
+
+
+def test_lots_outside_int32_are_rejected():
+    with pytest.raises(ValueError):
+        encode_quarter({'production_lots': 2 ** 31})
+
+
+def test_game_without_a_log_is_not_logged(tmp_path):
+    log = DecisionLog(str(tmp_path))
+    log.quarter('unlogged', DECISIONS[0])
+    log.rewind('unlogged', 0)
+    log.fork('unlogged', 'branch', 0)  # Parent has no log: no error, no branch log
+    assert list(log.game_ids()) == []
+
+
+def test_fork_copies_the_parents_quarters(tmp_path):
+    log = DecisionLog(str(tmp_path))
+    params = GameParameters()
+    simulator = FactorySimulator(params)
+    log.start('g', params)
+    play(log, 'g', simulator, DECISIONS)
+    log.fork('g', 'branch', 2)
+    assert list(log.replay('branch').results.rows()) == list(simulator.fork(2).results.rows())
+
+
+def test_app_logs_before_the_game_changes(client, new_game, monkeypatch):
+    import app as app_module
+    game_id = new_game()
+
+    def full_disk(*args):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(app_module.decision_log, 'quarter', full_disk)
+    assert client.post('/api/simulate_quarter', json={'game_id': game_id}).status_code == 500
+    assert app_module.simulators[game_id].current_quarter == 0
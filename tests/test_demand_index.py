@@ -0,0 +1,60 @@
+"""DemandIndex must return exactly what compute_demand returns"""
+
+import math
+
+import pytest
+
+from factory_simulator import DemandIndex, FactorySimulator, GameParameters, compute_demand
+
+
+MARKETING = DemandIndex.MARKETING_GRID + (0.25, 1.3, 7.0)
+
+
+def probe_prices(index, marketing):
+    """Every breakpoint of a column and the neighbouring floats on both sides"""
+    starts, _ = index.columns[marketing]
+    for start in starts:
+        yield start
+        yield math.nextafter(start, -math.inf)
+        yield math.nextafter(start, math.inf)
+    yield index.price_max
+    yield math.nextafter(index.price_max, math.inf)
+
+
+def assert_matches(params):
+    index = DemandIndex.for_parameters(params)
+    for marketing in MARKETING:
+        index.lookup(params.base_sales_price, marketing)  # Builds the column off the grid
+        for price in probe_prices(index, marketing):
+            assert index.lookup(price, marketing) == compute_demand(params, price, marketing), (price, marketing)
+
+
+@pytest.mark.parametrize('params', [
+    GameParameters(),
+    GameParameters(competitor_price=14.0, price_elasticity=0.3, marketing_effectiveness=0.2),
+    GameParameters(base_sales_price=9.0, market_demand_base=5),
+], ids=['default', 'competitor-14', 'base-9'])
+def test_lookup_matches_formula_at_breakpoints(params):
+    assert_matches(params)
+
+
+def test_lookup_matches_grid_of_prices():
+    params = GameParameters()
+    index = DemandIndex.for_parameters(params)
+    for marketing in MARKETING:
+        for cents in range(0, 5200, 7):
+            price = cents / 100
+            assert index.lookup(price, marketing) == compute_demand(params, price, marketing)
+
+
+def test_parameter_change_invalidates_index():
+    params = GameParameters()
+    old = DemandIndex.for_parameters(params)
+    params.competitor_price = 11.0
+    params.price_elasticity = 0.4
+    assert DemandIndex.for_parameters(params) is not old
+    assert_matches(params)
+
+    simulator = FactorySimulator(params, use_demand_index=True)
+    for price in (9.5, 11.0, 12.75):
+        assert simulator.calculate_demand(price, 1.0) == compute_demand(params, price, 1.0)
@@ -0,0 +1,91 @@
+import json
+
+from event_stream import RESYNC_MESSAGE, EventBroker
+
+
+def data_of(message):
+    return json.loads(message.split('data: ', 1)[1])
+
+
+def test_publish_reaches_every_subscriber_of_the_channel():
+    broker = EventBroker()
+    first, _ = broker.subscribe('game:a')
+    second, _ = broker.subscribe('game:a')
+    other, _ = broker.subscribe('game:b')
+
+    assert broker.publish('game:a', 'quarter', {'quarter': 1}) == 1
+    assert broker.publish('game:a', 'quarter', {'quarter': 2}) == 2
+    for subscriber in (first, second):
+        messages = [subscriber.get_nowait(), subscriber.get_nowait()]
+        assert [data_of(m)['quarter'] for m in messages] == [1, 2]
+        assert messages[0].startswith('id: 1\nevent: quarter\n')
+    assert other.empty()
+    assert broker.subscriber_count('game:a') == 2
+    assert broker.subscriber_count() == 3
+
+
+def test_unsubscribed_queues_get_nothing_more():
+    broker = EventBroker()
+    subscriber, _ = broker.subscribe('game:a')
+    broker.unsubscribe('game:a', subscriber)
+    broker.publish('game:a', 'quarter', {})
+    assert subscriber.empty()
+    assert broker.subscriber_count() == 0
+
+
+def test_reconnect_replays_the_missed_events():
+    broker = EventBroker(replay=3)
+    for quarter in range(1, 6):
+        broker.publish('game:a', 'quarter', {'quarter': quarter})
+
+    _, backlog = broker.subscribe('game:a', last_event_id=3)
+    assert [data_of(m)['quarter'] for m in backlog] == [4, 5]
+    _, backlog = broker.subscribe('game:a', last_event_id=5)
+    assert backlog == []
+    # Older than the replay buffer, or from before a restart: reload everything
+    assert broker.subscribe('game:a', last_event_id=1)[1] == [RESYNC_MESSAGE]
+    assert broker.subscribe('game:a', last_event_id=9)[1] == [RESYNC_MESSAGE]
+
+
+def test_slow_subscribers_are_dropped_with_a_resync():
+    broker = EventBroker(queue_size=2)
+    slow, _ = broker.subscribe('game:a')
+    fast, _ = broker.subscribe('game:a')
+    for quarter in range(3):
+        broker.publish('game:a', 'quarter', {'quarter': quarter})
+        fast.get_nowait()
+
+    assert broker.subscriber_count('game:a') == 1
+    assert slow.get_nowait() is None  # End of stream; pending messages are discarded
+    assert slow.empty()
+    broker.publish('game:a', 'quarter', {'quarter': 3})
+    assert slow.empty()
+    assert data_of(fast.get_nowait())['quarter'] == 3
+
+
+def test_stream_sends_backlog_live_events_and_ends_after_a_drop():
+    broker = EventBroker(queue_size=1, keepalive=0.01)
+    broker.publish('game:a', 'quarter', {'quarter': 1})
+    stream = broker.stream('game:a', last_event_id=0)
+
+    assert next(stream).startswith('retry: ')
+    assert data_of(next(stream))['quarter'] == 1
+    assert next(stream) == ": keepalive\n\n"
+    broker.publish('game:a', 'quarter', {'quarter': 2})
+    assert data_of(next(stream))['quarter'] == 2
+
+    broker.publish('game:a', 'quarter', {'quarter': 3})
+    broker.publish('game:a', 'quarter', {'quarter': 4})  # Queue full: dropped
+    assert list(stream) == [RESYNC_MESSAGE]
+    assert broker.subscriber_count() == 0
+
+
+def test_idle_channels_are_forgotten_beyond_the_limit():
+    broker = EventBroker(max_channels=2)
+    subscriber, _ = broker.subscribe('game:open')
+    broker.publish('game:a', 'quarter', {})
+    broker.publish('game:b', 'quarter', {})
+    # game:a was the oldest channel without streams; the open one stays
+    assert broker.subscribe('game:a', last_event_id=0)[1] == []
+    broker.publish('game:open', 'quarter', {'quarter': 1})
+    assert data_of(subscriber.get_nowait())['quarter'] == 1
@@ -0,0 +1,58 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from factory_simulator import FactorySimulator, GameParameters
+from offload import save_workbook, streaming_workbook_bytes, template_workbook_bytes
+
+
+def played(horizon, quarters):
+    simulator = FactorySimulator(GameParameters(horizon=horizon))
+    for quarter in range(quarters):
+        simulator.simulate_quarter(sales_price=11.5 + quarter % 4, marketing_budget=0.25 * (quarter % 3),
+                                   production_lots=1 + quarter % 3, material_purchase_lots=2,
+                                   material_market_factor=1.0 + 0.05 * (quarter % 2))
+    return simulator
+
+
+def cell_values(source):
+    """{sheet: {coordinate: value}} of all non-empty cells, without the build time"""
+    wb = load_workbook(source)
+    sheets = {}
+    for ws in wb.worksheets:
+        values = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is None:
+                    continue
+                if isinstance(cell.value, str) and 'generiert am' in cell.value:
+                    values[cell.coordinate] = 'generiert am'
+                else:
+                    values[cell.coordinate] = cell.value
+        sheets[ws.title] = values
+    return sheets
+
+
+@pytest.mark.parametrize('horizon, quarters', [(4, 2), (1, 1), (4, 4), (4, 6), (8, 5), (12, 12)])
+def test_all_report_writers_produce_the_same_cells(tmp_path, horizon, quarters):
+    state = played(horizon, quarters).to_state()
+    classic = cell_values(save_workbook(state, str(tmp_path / 'classic.xlsx')))
+    streaming = cell_values(io.BytesIO(streaming_workbook_bytes(state)[0]))
+    template = cell_values(io.BytesIO(template_workbook_bytes(state)[0]))
+
+    assert list(streaming) == list(classic)
+    assert streaming == classic
+    assert template == classic
+
+
+def test_template_is_reused_for_another_game_with_the_same_layout():
+    first = cell_values(io.BytesIO(template_workbook_bytes(played(4, 3).to_state())[0]))
+    other = played(4, 3)
+    other.rewind(2)
+    other.simulate_quarter(sales_price=15.0, production_lots=0, material_purchase_lots=0)
+    second = cell_values(io.BytesIO(template_workbook_bytes(other.to_state())[0]))
+    streaming = cell_values(io.BytesIO(streaming_workbook_bytes(other.to_state())[0]))
+
+    assert second != first
+    assert second == streaming
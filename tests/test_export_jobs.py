@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from export_jobs import DONE, FAILED, QUEUED, RUNNING, ExportQueue, ExportQueueFull
+
+
+def wait_for(job, status=DONE, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status != status and time.time() < deadline:
+        time.sleep(0.005)
+    assert job.status == status
+
+
+@pytest.fixture
+def queue():
+    queue = ExportQueue(max_concurrent=1)
+    yield queue
+    queue.shutdown()
+
+
+def blocked_build(payload=b'xlsx'):
+    """A build that waits for release.set() and counts its calls"""
+    release = threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return payload
+    return build, release, calls
+
+
+def test_repeated_request_of_a_game_gets_its_job(queue):
+    build, release, calls = blocked_build()
+    job, created = queue.submit('k', 'a', 'a.xlsx', build)
+    again, created_again = queue.submit('k', 'a', 'a.xlsx', build)
+    release.set()
+    wait_for(job)
+    assert created and not created_again
+    assert again is job
+    assert calls == [1]
+
+
+def test_games_in_the_same_state_share_the_build_but_not_the_job(queue):
+    build, release, calls = blocked_build()
+    first, _ = queue.submit('k', 'a', 'TechGear_Report_a.xlsx', build)
+    second, created = queue.submit('k', 'b', 'TechGear_Report_b.xlsx', build)
+    assert created and second is not first
+    assert (second.game_id, second.filename) == ('b', 'TechGear_Report_b.xlsx')
+    assert second.status in (QUEUED, RUNNING)
+    release.set()
+    wait_for(first)
+    wait_for(second)
+    assert calls == [1]
+    assert first.payload == second.payload == b'xlsx'
+    assert queue.get(second.job_id) is second
+
+
+def test_cached_payload_finishes_right_away(queue):
+    job, _ = queue.submit('k', 'a', 'a.xlsx', lambda: pytest.fail("must not build"), payload=b'cached')
+    assert job.status == DONE and job.payload == b'cached'
+
+
+def test_failed_job_is_retried(queue):
+    def broken():
+        raise RuntimeError("disk full")
+    job, _ = queue.submit('k', 'a', 'a.xlsx', broken)
+    wait_for(job, FAILED)
+    assert job.error == "RuntimeError: disk full"
+
+    retry, created = queue.submit('k', 'a', 'a.xlsx', lambda: b'xlsx')
+    assert created and retry is not job
+    wait_for(retry)
+
+
+def test_finished_jobs_expire_after_the_ttl(queue):
+    job, _ = queue.submit('k', 'a', 'a.xlsx', None, payload=b'x')
+    job.finished_at -= queue.ttl + 1
+    assert queue.get(job.job_id) is None
+    fresh, created = queue.submit('k', 'a', 'a.xlsx', None, payload=b'x')
+    assert created and fresh is not job
+
+
+def test_oldest_finished_jobs_are_dropped_beyond_max_jobs():
+    queue = ExportQueue(max_jobs=2)
+    jobs = [queue.submit(f'k{i}', 'a', 'a.xlsx', None, payload=b'x')[0] for i in range(4)]
+    assert [queue.get(job.job_id) is not None for job in jobs] == [False, True, True, True]
+    queue.submit('k4', 'a', 'a.xlsx', None, payload=b'x')
+    assert queue.get(jobs[1].job_id) is None
+    queue.shutdown()
+
+
+def test_full_queue_refuses_new_builds():
+    queue = ExportQueue(max_concurrent=1, max_queued=1)
+    build, release, _ = blocked_build()
+    running, _ = queue.submit('k0', 'a', 'a.xlsx', build)
+    wait_for(running, RUNNING)
+    queue.submit('k1', 'a', 'a.xlsx', build)  # Waits for the build thread
+    with pytest.raises(ExportQueueFull):
+        queue.submit('k2', 'a', 'a.xlsx', build)
+    queue.submit('k1', 'b', 'b.xlsx', build)  # Joins the waiting build, no new one
+    release.set()
+    queue.shutdown()
+
+
+def test_endpoint_returns_the_callers_job(client, new_game):
+    first, second = new_game(), new_game()
+    responses = [client.post('/api/export_jobs', json={'game_id': game_id}).get_json() for game_id in (first, second)]
+    assert [response['game_id'] for response in responses] == [first, second]
+    assert responses[0]['job_id'] != responses[1]['job_id']
+    assert f"TechGear_Report_{second}_" in responses[1]['filename']
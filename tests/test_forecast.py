@@ -0,0 +1,84 @@
+import pytest
+
+from factory_simulator import FactorySimulator, GameParameters
+from forecast import FORECAST_FIELDS, forecast
+
+PLAN = [dict(sales_price=12.5, production_lots=3, material_purchase_lots=3),
+        dict(sales_price=14.0, marketing_budget=1.5, production_lots=1, material_purchase_lots=0),
+        dict(production_lots=4, material_purchase_lots=6, material_market_factor=1.15, overhead_factor=1.3)]
+
+
+def live_game(horizon=6, quarters=3):
+    simulator = FactorySimulator(GameParameters(horizon=horizon))
+    for quarter in range(quarters):
+        simulator.simulate_quarter(sales_price=12.0 + quarter, production_lots=2)
+    return simulator
+
+
+def replayed(simulator, plan):
+    """The plan played on a copy of the game, one row per quarter"""
+    copy = FactorySimulator.from_state(simulator.to_state())
+    for decisions in plan:
+        copy.simulate_quarter(**decisions)
+    return copy, [copy.results.row_dict(index) for index in range(simulator.current_quarter, len(copy.results))]
+
+
+def test_forecast_leaves_the_live_game_unchanged():
+    simulator = live_game()
+    before, digest = simulator.to_state(), simulator.state_hash()
+    forecast(simulator, [PLAN, PLAN[:1] * 3])
+    assert simulator.to_state() == before
+    assert simulator.state_hash() == digest
+
+
+def test_projection_equals_replaying_the_plan():
+    simulator = live_game()
+    projection = forecast(simulator, [PLAN])
+    copy, rows = replayed(simulator, PLAN)
+
+    assert projection['start_quarter'] == 3 and projection['quarters'] == 3
+    plan = projection['plans'][0]
+    for name in FORECAST_FIELDS:
+        assert plan[name] == [row[name] for row in rows], name
+    assert plan['summary']['total_net_profit'] == copy.get_summary()['total_net_profit']
+    assert plan['summary']['final_cash'] == round(copy.cash, 2)
+
+
+def test_a_single_dict_is_used_for_every_quarter():
+    simulator = live_game(horizon=6, quarters=2)
+    projection = forecast(simulator, [PLAN[1], [PLAN[1]] * 4])
+    assert projection['quarters'] == 4  # The rest of the horizon
+    single, repeated = projection['plans']
+    assert single == repeated
+    assert single['quarter'] == [3, 4, 5, 6]
+
+
+def test_plans_of_the_wrong_length_are_rejected():
+    with pytest.raises(ValueError):
+        forecast(live_game(), [PLAN[:2]])
+    with pytest.raises(ValueError):
+        forecast(live_game(), [PLAN], quarters=4)
+
+
+def test_forecast_endpoint(client, new_game):
+    game_id = new_game(horizon=6)
+    client.post('/api/simulate_quarter', json={'game_id': game_id, 'production_lots': 3})
+    body = {'game_id': game_id, 'plans': [PLAN[0], PLAN], 'quarters': 3}
+
+    response = client.post('/api/forecast', json=body)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] and data['start_quarter'] == 1
+    # A single dict is expanded to every quarter of the projection
+    assert [len(plan['cash_ending']) for plan in data['plans']] == [3, 3]
+
+    import app
+    simulator = app.simulators[game_id]
+    _, rows = replayed(simulator, PLAN)
+    assert data['plans'][1]['cash_ending'] == [row['cash_ending'] for row in rows]
+    assert simulator.current_quarter == 1  # Not played
+
+    body['plans'] = [PLAN[:2]]
+    response = client.post('/api/forecast', json=body)
+    assert response.status_code == 400
+    assert 'Expected 3 quarters' in response.get_json()['error']
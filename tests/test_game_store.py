@@ -0,0 +1,176 @@
+import threading
+
+import pytest
+
+import game_store
+from factory_simulator import FactorySimulator, GameParameters
+from game_store import GameBusy, GameStore, MemoryGameStore, SQLiteGameStore, create_game_store
+
+
+class Clock:
+    """Stands in for the time module of game_store"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(game_store, 'time', clock)
+    return clock
+
+
+def played(quarters=2):
+    simulator = FactorySimulator()
+    for _ in range(quarters):
+        simulator.simulate_quarter(production_lots=2, material_purchase_lots=2)
+    return simulator
+
+
+def test_game_store_is_abstract():
+    with pytest.raises(TypeError):
+        GameStore()
+
+
+def test_memory_store_evicts_the_least_recently_used_game():
+    store = MemoryGameStore(max_games=2)
+    evicted = []
+    store.on_evict(evicted.append)
+    store['a'] = played()
+    store['b'] = played()
+    store.get('a')  # b is now the least recently used
+    store['c'] = played()
+
+    assert evicted == ['b']
+    assert 'b' not in store
+    assert sorted(store.game_ids()) == ['a', 'c']
+
+
+def test_memory_store_expires_games_after_the_ttl(clock):
+    store = MemoryGameStore(ttl=60)
+    evicted = []
+    store.on_evict(evicted.append)
+    store['old'] = played()
+    clock.now += 30
+    store['new'] = played()
+    clock.now += 31
+
+    assert len(store) == 1
+    assert evicted == ['old']
+    assert store.get('old') is None
+    assert list(store.game_ids()) == ['new']
+
+
+def test_sqlite_round_trip_between_workers(tmp_path):
+    path = str(tmp_path / 'games.db')
+    first, second = SQLiteGameStore(path), SQLiteGameStore(path)
+    simulator = played(5)
+    first['game'] = simulator
+
+    loaded = second['game']
+    assert loaded is not simulator
+    assert loaded.to_state() == simulator.to_state()
+
+    # A change by one worker is seen by the other's cached copy
+    loaded.simulate_quarter(production_lots=1, material_purchase_lots=1)
+    second['game'] = loaded
+    assert first['game'].to_state() == loaded.to_state()
+    assert len(first) == 1
+
+
+def test_sqlite_store_expires_games_after_the_ttl(tmp_path, clock):
+    store = create_game_store(f"sqlite:///{tmp_path / 'games.db'}", {'ttl': 60})
+    evicted = []
+    store.on_evict(evicted.append)
+    store['game'] = played()
+    clock.now += 61
+
+    assert len(store) == 0
+    assert store.get('game') is None
+    assert evicted == ['game']
+
+
+def change_concurrently(stores, rounds):
+    def play(store):
+        for _ in range(rounds):
+            with store.lock('game'):
+                simulator = store.get('game')
+                simulator.simulate_quarter(production_lots=1, material_purchase_lots=1)
+                store['game'] = simulator
+
+    threads = [threading.Thread(target=play, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_memory_store_lock_keeps_every_quarter():
+    store = MemoryGameStore()
+    store['game'] = FactorySimulator()
+    change_concurrently([store] * 4, 10)
+    assert store['game'].current_quarter == 40
+
+
+def test_sqlite_lock_keeps_every_quarter_across_workers(tmp_path):
+    path = str(tmp_path / 'games.db')
+    stores = [SQLiteGameStore(path) for _ in range(3)]
+    stores[0]['game'] = FactorySimulator()
+    change_concurrently(stores, 10)
+    assert stores[0]['game'].current_quarter == 30
+    assert len(stores[0]._game_locks) == 0
+
+
+def test_sqlite_lock_times_out_and_expires(tmp_path, monkeypatch):
+    path = str(tmp_path / 'games.db')
+    first, second = SQLiteGameStore(path), SQLiteGameStore(path)
+    monkeypatch.setattr(SQLiteGameStore, 'LOCK_TIMEOUT', 0.05)
+    with first.lock('game'):
+        with pytest.raises(GameBusy):
+            with second.lock('game'):
+                pass
+    with second.lock('game'):  # Released
+        pass
+
+    # The lease of a worker that died while holding the lock runs out
+    monkeypatch.setattr(SQLiteGameStore, 'LOCK_LEASE', 0.0)
+    held = first.lock('game')
+    held.__enter__()
+    with second.lock('game'):
+        pass
+
+
+def test_app_stores_every_concurrent_quarter(client, new_game):
+    import app
+    game_id = new_game()
+    decisions = dict(game_id=game_id, production_lots=1, material_purchase_lots=1)
+
+    statuses = []
+
+    def play():
+        own_client = app.app.test_client()
+        for _ in range(5):
+            statuses.append(own_client.post('/api/simulate_quarter', json=decisions).status_code)
+
+    threads = [threading.Thread(target=play) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 20
+    assert app.simulators[game_id].current_quarter == 20
+    assert len(app.simulators[game_id].results) == 20
+
+
+def test_sqlite_round_trip_keeps_the_parameters(tmp_path):
+    store = SQLiteGameStore(str(tmp_path / 'games.db'))
+    store['game'] = FactorySimulator(GameParameters(horizon=8, base_material_price=3.5))
+    assert SQLiteGameStore(store.path)['game'].params == store['game'].params
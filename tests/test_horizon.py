@@ -0,0 +1,100 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from excel_report import build_workbook, write_report_streaming, write_report_template
+from factory_simulator import QUARTERS_PER_YEAR, FactorySimulator, GameParameters
+
+
+def play(horizon, quarters):
+    simulator = FactorySimulator(GameParameters(horizon=horizon))
+    for quarter in range(quarters):
+        simulator.simulate_quarter(sales_price=12.0 + quarter % 3, production_lots=2,
+                                   material_purchase_lots=2, marketing_budget=0.5 * (quarter % 2))
+    return simulator
+
+
+def test_annual_accumulators_restart_with_each_business_year():
+    simulator = play(8, QUARTERS_PER_YEAR)
+    assert simulator.annual_depreciation > 0
+
+    simulator.simulate_quarter(production_lots=2, material_purchase_lots=2)
+    last = simulator.results[-1]
+    assert simulator.annual_depreciation == pytest.approx(last.depreciation)
+    assert simulator.annual_interest == pytest.approx(last.interest)
+    assert simulator.annual_tax == pytest.approx(last.tax)
+
+
+def test_annual_rollups_total_each_year():
+    simulator = play(12, 10)
+    years = simulator.annual_rollups()
+
+    assert [year['quarters'] for year in years] == [4, 4, 2]
+    for number, year in enumerate(years):
+        rows = simulator.results[number * QUARTERS_PER_YEAR:(number + 1) * QUARTERS_PER_YEAR]
+        assert year['year'] == number + 1
+        assert year['revenue'] == pytest.approx(sum(r.sales_revenue for r in rows), abs=0.01)
+        assert year['net_profit'] == pytest.approx(sum(r.net_profit for r in rows), abs=0.01)
+        assert year['cash_ending'] == pytest.approx(rows[-1].cash_ending, abs=0.01)
+    # The running year's totals are the annual accumulators
+    assert years[-1]['depreciation'] == pytest.approx(simulator.annual_depreciation, abs=0.01)
+    assert years[-1]['tax'] == pytest.approx(simulator.annual_tax, abs=0.01)
+
+
+def test_annual_rollups_of_a_new_game_are_empty():
+    assert FactorySimulator(GameParameters(horizon=8)).annual_rollups() == []
+
+
+def test_state_round_trip_keeps_the_horizon_and_the_running_year():
+    simulator = play(8, 6)
+    restored = FactorySimulator.from_state(simulator.to_state())
+
+    assert restored.params.horizon == 8
+    assert restored.to_state() == simulator.to_state()
+    assert restored.annual_rollups() == simulator.annual_rollups()
+
+    # Both continue the second year alike
+    for sim in (simulator, restored):
+        sim.simulate_quarter(production_lots=3, material_purchase_lots=2)
+        sim.simulate_quarter(production_lots=1, material_purchase_lots=1)
+    assert restored.to_state() == simulator.to_state()
+
+
+def report_sheets(kind, simulator):
+    if kind == 'classic':
+        wb = build_workbook(simulator)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+    elif kind == 'streaming':
+        buffer = write_report_streaming(simulator)
+    else:
+        buffer = write_report_template(simulator)
+    return load_workbook(buffer)
+
+
+def column_a(ws):
+    return [row[0] for row in ws.iter_rows(min_col=1, max_col=1, values_only=True)]
+
+
+@pytest.mark.parametrize('kind', ['classic', 'streaming', 'template'])
+def test_multi_year_report_layout(kind):
+    wb = report_sheets(kind, play(12, 6))
+
+    summary = column_a(wb['Management Summary'])
+    assert 'Finanz-Kennzahlen (Gesamtzeitraum)' in summary
+    assert 'Jahresübersicht' in summary
+    assert 'Jahr 1' in summary
+    assert 'Jahr 2 (2/4 Quartale)' in summary
+
+    header = [cell.value for cell in next(wb['GuV Detail'].iter_rows(min_row=5, max_row=5))]
+    header = [value for value in header if value is not None]
+    assert header == ['Position'] + [f'Q{i}' for i in range(1, 13)] + ['GESAMT']
+
+
+@pytest.mark.parametrize('kind', ['classic', 'streaming', 'template'])
+def test_one_year_report_has_no_year_overview(kind):
+    summary = column_a(report_sheets(kind, play(4, 4))['Management Summary'])
+    assert 'Finanz-Kennzahlen (Gesamtjahr)' in summary
+    assert 'Jahresübersicht' not in summary
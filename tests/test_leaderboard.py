@@ -0,0 +1,112 @@
+import time
+
+from factory_simulator import FactorySimulator, GameParameters
+from game_store import MemoryGameStore, SQLiteGameStore
+from leaderboard import LeaderboardService
+
+
+def played(quarters=1):
+    simulator = FactorySimulator(GameParameters())
+    for _ in range(quarters):
+        simulator.simulate_quarter(sales_price=GameParameters().base_sales_price)
+    return simulator
+
+
+def ranked(store, games):
+    boards = LeaderboardService()
+    store.on_evict(boards.remove)
+    for game_id in games:
+        simulator = played()
+        store[game_id] = simulator
+        boards.record(game_id, simulator.get_summary(), 'session')
+    return boards
+
+
+def ranked_ids(boards, session_id=None):
+    return {entry['game_id'] for entry in boards.page('total_net_profit', 0, 100, session_id)[1]}
+
+
+def test_lru_eviction_leaves_the_boards():
+    store = MemoryGameStore(max_games=2)
+    boards = ranked(store, ['a', 'b', 'c'])
+    assert ranked_ids(boards) == {'b', 'c'}
+    assert ranked_ids(boards, 'session') == {'b', 'c'}
+
+
+def test_expired_games_leave_the_boards(tmp_path):
+    for store in (MemoryGameStore(ttl=60), SQLiteGameStore(str(tmp_path / 'games.db'), ttl=60)):
+        boards = ranked(store, ['a', 'b'])
+        store.ttl = -1  # Everything is expired now
+        assert store.get('a') is None
+        assert ranked_ids(boards) == {'b'}
+        if isinstance(store, SQLiteGameStore):
+            assert store.purge_expired(time.time()) == 1
+            assert ranked_ids(boards) == set()
+
+
+def test_rebuild_from_a_shared_store(tmp_path):
+    path = str(tmp_path / 'games.db')
+    mine, other = SQLiteGameStore(path), SQLiteGameStore(path)
+    boards = ranked(mine, ['a'])
+    other['b'] = played(2)  # Written by another worker
+    boards.rebuild((game_id, mine.get(game_id).get_summary(), None) for game_id in mine.game_ids())
+    assert ranked_ids(boards) == {'a', 'b'}
+    assert ranked_ids(boards, 'session') == set()
+
+
+def test_game_ids_are_ranked_as_strings():
+    boards = LeaderboardService()
+    summary = played().get_summary()
+    boards.record(7, summary)
+    boards.record('7', summary)
+    boards.record('8', summary)
+
+    total, entries = boards.page('total_net_profit')
+    assert total == 2
+    assert [entry['game_id'] for entry in entries] == ['7', '8']
+    assert boards.ranks(7)['total_net_profit'] == boards.ranks('7')['total_net_profit'] == 1
+    boards.remove(7)
+    assert ranked_ids(boards) == {'8'}
+
+
+def test_changes_of_other_workers(tmp_path):
+    path = str(tmp_path / 'games.db')
+    mine, other = SQLiteGameStore(path), SQLiteGameStore(path)
+    last, changed = mine.changes(None)
+    assert changed is None
+
+    other['a'] = played()
+    other['b'] = played()
+    other['a'] = played(2)
+    other.delete('b')
+    last, changed = mine.changes(last)
+    assert changed == ['a', 'b', 'a', 'b']
+    assert mine.changes(last) == (last, [])
+
+    # Changes older than the retention are dropped: the caller must look at all games
+    mine.CHANGE_RETENTION = -1
+    other['c'] = played()
+    mine.purge_expired()
+    assert mine.changes(last)[1] is None
+
+
+def test_app_follows_other_workers_without_rebuilding(tmp_path, monkeypatch):
+    import app
+    path = str(tmp_path / 'games.db')
+    store, other = SQLiteGameStore(path), SQLiteGameStore(path)
+    boards = LeaderboardService()
+    monkeypatch.setattr(app, 'simulators', store)
+    monkeypatch.setattr(app, 'leaderboards', boards)
+    other['a'] = played()
+    app.refresh_leaderboards()  # First call: all games
+    assert ranked_ids(boards) == {'a'}
+
+    rebuilds = []
+    monkeypatch.setattr(boards, 'rebuild', rebuilds.append)
+    other['b'] = played(2)
+    app.refresh_leaderboards()
+    assert ranked_ids(boards) == {'a', 'b'}
+    other.delete('a')
+    app.refresh_leaderboards()
+    assert ranked_ids(boards) == {'b'}
+    assert rebuilds == []
@@ -0,0 +1,11 @@
+from factory_simulator import GameParameters
+from market_engine import MarketSession
+
+
+def test_explicit_zero_price_is_kept():
+    session = MarketSession('s', ['free', 'default'])
+    session.submit('free', {'sales_price': 0.0})
+    results = session.submit('default', {})
+    assert session.teams['free'].results.row_dict(-1)['sales_price'] == 0.0
+    assert session.teams['default'].results.row_dict(-1)['sales_price'] == GameParameters().base_sales_price
+    assert results['free'].sales_revenue == 0.0
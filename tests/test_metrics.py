@@ -0,0 +1,110 @@
+import threading
+
+from metrics import BUCKETS, Histogram, Metrics
+
+
+def sample(rendered, line_start):
+    """Value of the first exposition line starting with line_start"""
+    line = next(line for line in rendered.splitlines() if line.startswith(line_start))
+    return float(line.rsplit(' ', 1)[1])
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    for seconds in (0.00005, BUCKETS[0], 0.003, 60.0):
+        histogram.observe(seconds)
+    assert histogram.count == 4
+    assert histogram.counts[0] == 2  # Upper bounds are inclusive
+    assert histogram.counts[BUCKETS.index(0.005)] == 1
+    assert histogram.counts[-1] == 1  # +Inf
+    assert histogram.sum == 0.00005 + BUCKETS[0] + 0.003 + 60.0
+
+
+def test_disabled_stages_record_nothing():
+    registry = Metrics(enabled=False)
+    with registry.stage('simulate'):
+        pass
+    assert 'factory_stage_duration_seconds_count' not in registry.render()
+    assert 'factory_metrics_enabled 0' in registry.render()
+
+
+def test_stages_are_labelled_by_the_endpoint_of_their_thread():
+    registry = Metrics(enabled=True)
+    registry.set_endpoint('simulate_quarter')
+    with registry.stage('simulate'):
+        pass
+    with registry.stage('simulate'):
+        pass
+
+    def other_request():
+        registry.set_endpoint('export_excel')
+        with registry.stage('xlsx_build'):
+            pass
+
+    thread = threading.Thread(target=other_request)
+    thread.start()
+    thread.join()
+
+    rendered = registry.render()
+    assert sample(rendered, 'factory_stage_duration_seconds_count{endpoint="simulate_quarter",stage="simulate"}') == 2
+    assert sample(rendered, 'factory_stage_duration_seconds_count{endpoint="export_excel",stage="xlsx_build"}') == 1
+    assert sample(rendered, 'factory_stage_duration_seconds_bucket'
+                            '{endpoint="simulate_quarter",stage="simulate",le="+Inf"}') == 2
+
+
+def test_buckets_are_cumulative():
+    registry = Metrics(enabled=True)
+    for seconds in (0.0002, 0.002, 0.2):
+        registry.observe('e', 's', seconds)
+    rendered = registry.render()
+    labels = 'endpoint="e",stage="s"'
+    assert sample(rendered, f'factory_stage_duration_seconds_bucket{{{labels},le="0.0001"}}') == 0
+    assert sample(rendered, f'factory_stage_duration_seconds_bucket{{{labels},le="0.00025"}}') == 1
+    assert sample(rendered, f'factory_stage_duration_seconds_bucket{{{labels},le="0.0025"}}') == 2
+    assert sample(rendered, f'factory_stage_duration_seconds_bucket{{{labels},le="10.0"}}') == 3
+    assert sample(rendered, f'factory_stage_duration_seconds_sum{{{labels}}}') == 0.0002 + 0.002 + 0.2
+
+
+def test_captured_timings_are_recorded_for_the_requesting_endpoint():
+    worker = Metrics(enabled=True)
+    with worker.capture() as timings:
+        with worker.stage('xlsx_build'):
+            pass
+        with worker.stage('xlsx_build'):
+            pass
+        with worker.stage('xlsx_save'):
+            pass
+    assert set(timings) == {'xlsx_build', 'xlsx_save'}
+    assert 'factory_stage_duration_seconds_count' not in worker.render()  # Captured, not recorded
+
+    registry = Metrics(enabled=True)
+    registry.set_endpoint('export_excel')
+    registry.record(timings)
+    rendered = registry.render()
+    assert sample(rendered, 'factory_stage_duration_seconds_count{endpoint="export_excel",stage="xlsx_build"}') == 1
+    assert sample(rendered, 'factory_stage_duration_seconds_sum{endpoint="export_excel",stage="xlsx_build"}') \
+        == timings['xlsx_build']
+
+
+def test_gauges_and_label_escaping():
+    registry = Metrics(enabled=True)
+    registry.gauge('factory_live_games', 'Games in the game store', lambda: 3)
+    registry.gauge('factory_broken', 'Fails at scrape time', lambda: 1 / 0)
+    registry.observe('a"b\\c', 'stage\n', 0.001)
+
+    rendered = registry.render()
+    assert '# TYPE factory_live_games gauge' in rendered
+    assert sample(rendered, 'factory_live_games ') == 3.0
+    assert 'factory_broken' not in rendered
+    assert 'endpoint="a\\"b\\\\c",stage="stage\\n"' in rendered
+
+    registry.reset()
+    assert 'factory_stage_duration_seconds_count' not in registry.render()
+    assert 'factory_live_games 3.0' in registry.render()
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'factory_live_games' in response.get_data(as_text=True)
@@ -0,0 +1,55 @@
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from factory_simulator import GameParameters
+from monte_carlo import (MAX_QUARTERS, PERCENTILES, MarketNoise, QuantileSketch, _standard_normal, run_chunk,
+                         run_monte_carlo, summarize)
+
+
+def test_streams_do_not_overlap_at_the_longest_plan():
+    seeds = np.array([7])
+    first, second = _standard_normal(seeds, 0, MAX_QUARTERS), _standard_normal(seeds, 1, MAX_QUARTERS)
+    assert not np.isin(first, second).any()
+
+
+def test_longer_plans_are_rejected():
+    with pytest.raises(ValueError):
+        _standard_normal(np.array([7]), 0, MAX_QUARTERS + 1)
+    with pytest.raises(ValueError):
+        next(run_monte_carlo(plan=[{}] * (MAX_QUARTERS + 1), workers=0))
+
+
+def test_progress_summaries_estimate_the_percentiles():
+    summaries = list(run_monte_carlo(seeds=range(30), chunk_size=10, workers=0))
+    assert [summary['runs'] for summary in summaries] == [10, 20, 30]
+    for summary in summaries:
+        assert set(summary['net_profit']) == {'p5', 'p50', 'p95', 'mean'}
+        assert set(summary['final_cash']) == {'p5', 'p50', 'p95', 'mean'}
+        assert summary['net_profit']['p5'] <= summary['net_profit']['p50'] <= summary['net_profit']['p95']
+
+
+def test_last_summary_is_exact():
+    params = GameParameters()
+    _, profit, cash = run_chunk(asdict(params), [{}] * params.horizon, MarketNoise(), list(range(30)))
+    summaries = list(run_monte_carlo(seeds=range(30), chunk_size=10, workers=0))
+    assert summaries[-1] == summarize(profit, cash)
+
+
+def test_sketch_stays_bounded_and_close_to_the_exact_percentiles():
+    values = np.random.default_rng(3).normal(10.0, 4.0, 50_000)
+    sketch = QuantileSketch(size=256)
+    for chunk in np.array_split(values, 100):
+        sketch.add(chunk)
+        assert len(sketch.values) <= 256 + len(chunk)
+    assert len(sketch.values) == 256
+    assert sketch.weights.sum() == pytest.approx(len(values))
+    exact = np.percentile(values, PERCENTILES)
+    assert sketch.percentiles(PERCENTILES) == pytest.approx(exact, abs=0.2)
+
+
+def test_small_sketch_is_exact_up_to_interpolation():
+    sketch = QuantileSketch()
+    sketch.add(np.arange(1.0, 102.0))
+    assert sketch.percentiles([50]) == pytest.approx([51.0])
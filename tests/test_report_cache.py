@@ -0,0 +1,30 @@
+import json
+
+
+def exported(client, game_id):
+    response = client.get(f'/api/export_results?game_id={game_id}')
+    assert response.status_code == 200
+    with open(response.get_json()['filename'], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_export_file_follows_the_state_after_a_rewind(client, new_game):
+    game_id = new_game()
+    client.post('/api/simulate_quarter', json={'game_id': game_id})
+    first = exported(client, game_id)
+    client.post('/api/simulate_quarter', json={'game_id': game_id})
+    assert exported(client, game_id) != first
+    client.post('/api/rewind', json={'game_id': game_id, 'quarter': 1})
+    assert exported(client, game_id) == first  # Cache hit, but the file is rewritten
+
+
+def test_games_with_the_same_state_get_their_own_file(client, new_game):
+    first, second = new_game(base_material_price=3.01), new_game(base_material_price=3.01)  # States unique to this test
+    for game_id in (first, second):
+        client.post('/api/simulate_quarter', json={'game_id': game_id})
+    assert exported(client, first) == exported(client, second)
+    client.post('/api/simulate_quarter', json={'game_id': first})
+    exported(client, first)
+    client.post('/api/rewind', json={'game_id': first, 'quarter': 1})
+    # Same state as the second game: served from the cache, still written for this game
+    assert len(exported(client, first)['quarters']) == 1
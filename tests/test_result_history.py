@@ -0,0 +1,83 @@
+import pytest
+
+from factory_simulator import RESULT_FIELDS, FactorySimulator, GameParameters, ResultHistory, SummaryDriftError
+
+
+def test_bad_value_leaves_the_history_unchanged():
+    simulator = FactorySimulator()
+    simulator.simulate_quarter()
+    history = simulator.results
+    row = list(history.rows())[0]
+    for length in (1, ResultHistory.CHUNK_SIZE):  # Inside a chunk and at the start of a new one
+        while len(history) < length:
+            history.append_row(row)
+        before = (list(history.rows()), dict(history.totals), history.version)
+        bad = list(row)
+        bad[RESULT_FIELDS.index('sales_volume')] = 2.5
+        with pytest.raises(TypeError):
+            history.append_row(bad)
+        with pytest.raises(ValueError):
+            history.append_row(row[:-1])
+        assert (list(history.rows()), dict(history.totals), history.version) == before
+        history.append_row(row)
+        assert len(history) == length + 1
+
+
+def test_fractional_lots_are_rejected_before_the_quarter_starts():
+    simulator = FactorySimulator()
+    simulator.simulate_quarter()
+    state = simulator.to_state()
+    with pytest.raises(ValueError):
+        simulator.simulate_quarter(production_lots=2.5)
+    assert simulator.to_state() == state
+    assert simulator.get_summary()['quarters_played'] == 1
+
+    result = simulator.simulate_quarter(production_lots=3.0, material_purchase_lots=2)
+    assert result.production_lots == 3 and type(result.production_lots) is int
+    assert simulator.get_summary()['quarters_played'] == 2
+
+
+def long_game(quarters, check_summary=False):
+    simulator = FactorySimulator(GameParameters(horizon=quarters), check_summary=check_summary)
+    for quarter in range(quarters):
+        simulator.simulate_quarter(sales_price=11.0 + quarter % 5 * 0.7, marketing_budget=0.1 * (quarter % 4),
+                                   production_lots=1 + quarter % 3)
+    return simulator
+
+
+def test_consistency_check_detects_drifted_totals():
+    simulator = long_game(6, check_summary=True)
+    assert simulator.results.check_totals() == {}
+    summary = simulator.get_summary()
+
+    simulator.results.totals['sales_revenue'] += 0.5
+    assert set(simulator.results.check_totals()) == {'sales_revenue'}
+    with pytest.raises(SummaryDriftError):
+        simulator.get_summary()
+    simulator.check_summary = False  # Without the check the running totals are trusted
+    assert simulator.get_summary()['total_revenue'] == summary['total_revenue'] + 0.5
+
+
+def test_totals_survive_rewind_and_from_state():
+    quarters = ResultHistory.CHUNK_SIZE + 5  # The history spans two chunks
+    simulator = long_game(quarters, check_summary=True)
+    for quarter in (quarters - 1, ResultHistory.CHUNK_SIZE, ResultHistory.CHUNK_SIZE - 3, 1):
+        simulator.rewind(quarter)
+        assert simulator.results.check_totals() == {}
+        expected = long_game(quarter).get_summary()
+        assert simulator.get_summary() == expected
+
+        restored = FactorySimulator.from_state(simulator.to_state())
+        restored.check_summary = True
+        assert restored.results.totals == simulator.results.totals
+        assert restored.get_summary() == expected
+
+
+def test_forks_keep_the_check_and_their_own_totals():
+    simulator = long_game(8, check_summary=True)
+    branch = simulator.fork(3)
+    assert branch.check_summary
+    assert branch.results.check_totals() == {}
+    assert branch.get_summary() == long_game(3).get_summary()
+    branch.simulate_quarter(sales_price=20.0)
+    assert simulator.get_summary() == long_game(8).get_summary()
@@ -0,0 +1,105 @@
+import json
+import random
+import struct
+
+import numpy as np
+import pytest
+
+import result_json
+from factory_simulator import RESULT_FIELDS, FactorySimulator
+from result_json import dumps, export_bytes, history_bytes, quarter_bytes, results_from_compact
+
+needs_orjson = pytest.mark.skipif(result_json.orjson is None, reason='orjson is not installed')
+
+
+def played(quarters=3):
+    simulator = FactorySimulator()
+    for quarter in range(quarters):
+        simulator.simulate_quarter(sales_price=12.0 + quarter, production_lots=2, material_purchase_lots=2)
+    return simulator
+
+
+def both_encoders(monkeypatch, data, indent=False):
+    """dumps() with orjson and with the stdlib fallback"""
+    fast = dumps(data, indent)
+    with monkeypatch.context() as patch:
+        patch.setattr(result_json, 'orjson', None)
+        stdlib = dumps(data, indent)
+    return fast, stdlib
+
+
+EDGE_CASES = [
+    float('nan'), float('inf'), -float('inf'), 0.0, -0.0, 1.0, 0.1, 1e-4, 1e-5, -2.5e-5, 8.530132475717321e-05,
+    1e-6, 1.25e-7, 5e-324, 1e15, 9999999999999998.0, 1e16, -1.5e16, 1.7976931348623157e308,
+    np.float64('nan'), np.float64(2.5e-5), np.float32(0.1), np.int64(-7), np.int32(3), np.bool_(True),
+]
+
+
+@needs_orjson
+@pytest.mark.parametrize('indent', [False, True])
+def test_orjson_and_stdlib_give_the_same_bytes(monkeypatch, indent):
+    data = {'values': EDGE_CASES, 'text': 'Gewinn € "netto"\n\x01', 'empty': [[], {}], 'none': None,
+            'nested': {'quarter': np.int64(4), 'cash': [np.float64(-1.5), 2]}}
+    fast, stdlib = both_encoders(monkeypatch, data, indent)
+    assert fast == stdlib
+    parsed = json.loads(fast)
+    assert parsed['values'][:3] == [None, None, None]
+    assert parsed['values'][-3:] == [-7, 3, True]
+    assert parsed['nested'] == {'quarter': 4, 'cash': [-1.5, 2]}
+
+
+@needs_orjson
+def test_random_floats_are_written_alike(monkeypatch):
+    rnd = random.Random(17)
+    values = [struct.unpack('d', struct.pack('Q', rnd.getrandbits(64)))[0] for _ in range(2000)]
+    values += [rnd.uniform(-1, 1) * 10 ** rnd.randint(-9, 18) for _ in range(2000)]
+    fast, stdlib = both_encoders(monkeypatch, values)
+    assert fast == stdlib
+
+
+def test_unknown_types_are_rejected(monkeypatch):
+    with pytest.raises(TypeError):
+        dumps({'when': object()})
+    monkeypatch.setattr(result_json, 'orjson', None)
+    with pytest.raises(TypeError):
+        dumps({'when': object()})
+
+
+def test_payloads_match_the_dataclass_views(monkeypatch):
+    simulator = played()
+    history = simulator.results
+    assert json.loads(quarter_bytes(history)) == history.row_dict(len(history) - 1)
+    assert list(json.loads(quarter_bytes(history, 0))) == list(RESULT_FIELDS)
+    assert json.loads(quarter_bytes(history, 0, ['quarter', 'cash_ending'])) == \
+        {'quarter': 1, 'cash_ending': history.row_dict(0)['cash_ending']}
+    assert json.loads(history_bytes(history)) == history.as_dicts()
+
+    monkeypatch.setattr(result_json, 'orjson', None)
+    assert json.loads(history_bytes(history)) == history.as_dicts()
+
+
+def test_compact_format_round_trip():
+    simulator = played()
+    compact = json.loads(history_bytes(simulator.results, compact=True))
+    assert compact['fields'] == list(RESULT_FIELDS)
+    assert len(compact['rows']) == 3
+    assert results_from_compact(compact) == simulator.results.as_dicts()
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_export_equals_export_results(tmp_path, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(result_json, 'orjson', None)
+    simulator = played()
+    simulator.export_results(str(tmp_path / 'results.json'))
+    with open(tmp_path / 'results.json', encoding='utf-8') as f:
+        exported = json.load(f)
+
+    regular = export_bytes(simulator)
+    assert regular.startswith(b'{\n  "parameters"')  # Indented like export_results
+    assert json.loads(regular) == exported
+
+    compact = json.loads(export_bytes(simulator, compact=True))
+    assert compact['parameters'] == exported['parameters']
+    assert compact['summary'] == exported['summary']
+    assert results_from_compact(compact['quarters']) == exported['quarters']
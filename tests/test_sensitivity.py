@@ -0,0 +1,17 @@
+import pytest
+
+from sensitivity import sensitivity_analysis
+
+
+@pytest.mark.parametrize('step', [{'rel_step': 0.0}, {'rel_step': -0.1}, {'abs_step': 0.0}])
+def test_non_positive_steps_are_rejected(step):
+    with pytest.raises(ValueError):
+        sensitivity_analysis(method='finite_difference', parameters=['base_sales_price'], **step)
+
+
+def test_zero_parameter_uses_the_absolute_step():
+    analysis = sensitivity_analysis(method='finite_difference', parameters=['marketing_budget'],
+                                    rel_step=0.01, abs_step=0.5)
+    row = analysis['parameters'][0]
+    assert row['values'][-1] - row['values'][0] > 0
+    assert row['effects']['total_net_profit']['derivative'] is not None
@@ -0,0 +1,41 @@
+import pytest
+
+import app as app_module
+from offload import OffloadBusy
+
+PLAN = [{'sales_price': 12.5, 'production_lots': 3}, {'sales_price': 14, 'marketing_budget': 1}]
+
+
+@pytest.mark.parametrize('body', [None, [], ['x'], 'text'])
+def test_non_object_body_is_rejected(client, body):
+    if body is None:
+        response = client.post('/api/simulate_quarters')
+    else:
+        response = client.post('/api/simulate_quarters', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_batch_equals_single_quarters(client, new_game):
+    batch, single = new_game(), new_game()
+    response = client.post('/api/simulate_quarters', json={'game_id': batch, 'decisions': PLAN}).get_json()
+    for decisions in PLAN:
+        client.post('/api/simulate_quarter', json=dict(decisions, game_id=single))
+    simulators = app_module.simulators
+    assert list(simulators[batch].results.rows()) == list(simulators[single].results.rows())
+    assert response['games'][batch]['summary'] == simulators[single].get_summary()
+
+
+def test_failing_game_leaves_every_game_unchanged(client, new_game, monkeypatch):
+    short, long = new_game(), new_game()
+    monkeypatch.setattr(app_module, 'OFFLOAD_MIN_QUARTERS', 2)
+
+    def busy(*args):
+        raise OffloadBusy("busy")
+    monkeypatch.setattr(app_module.offloader, 'run', busy)
+
+    response = client.post('/api/simulate_quarters', json={'games': {short: PLAN[:1], long: PLAN}})
+    assert response.status_code == 503
+    for game_id in (short, long):
+        assert app_module.simulators[game_id].current_quarter == 0
+        assert len(app_module.simulators[game_id].results) == 0
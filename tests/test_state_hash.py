@@ -0,0 +1,54 @@
+from factory_simulator import FactorySimulator, GameParameters
+
+PLAN = [dict(sales_price=12.0, production_lots=3), dict(sales_price=14.5, marketing_budget=1.0),
+        dict(production_lots=1, material_purchase_lots=4), dict(sales_price=13.25)]
+
+
+def played(quarters, params=None):
+    simulator = FactorySimulator(params)
+    for decisions in PLAN[:quarters]:
+        simulator.simulate_quarter(**decisions)
+    return simulator
+
+
+def test_hash_follows_every_quarter():
+    simulator = played(0)
+    hashes = [simulator.state_hash()]
+    for decisions in PLAN:
+        simulator.simulate_quarter(**decisions)
+        hashes.append(simulator.state_hash())
+    assert len(set(hashes)) == len(hashes)
+    assert simulator.state_hash() == played(len(PLAN)).state_hash()
+
+
+def test_rewind_and_undo_return_to_the_earlier_hash():
+    simulator = played(4)
+    simulator.rewind(2)
+    assert simulator.state_hash() == played(2).state_hash()
+    simulator.undo()
+    assert simulator.state_hash() == played(1).state_hash()
+
+    # Replaying a different quarter after the rewind changes the hash again
+    simulator.simulate_quarter(sales_price=20.0)
+    assert simulator.state_hash() != played(2).state_hash()
+
+
+def test_fork_has_the_hash_of_its_branch_point():
+    simulator = played(4)
+    before = simulator.state_hash()
+    branch = simulator.fork(2)
+    assert branch.state_hash() == played(2).state_hash()
+
+    branch.simulate_quarter(**PLAN[2])
+    assert branch.state_hash() == played(3).state_hash()
+    assert simulator.state_hash() == before
+
+
+def test_parameter_changes_are_not_hidden_by_the_memo():
+    simulator = played(2)
+    before = simulator.state_hash()
+    simulator.params.base_overhead_cost = 7.5
+    changed = simulator.state_hash()
+    assert changed != before
+    simulator.params = GameParameters()
+    assert simulator.state_hash() == before